@@ -0,0 +1,72 @@
+"""add stock balances
+
+Revision ID: a5c3e7f1b209
+Revises: 91f6d2ad4e71
+Create Date: 2026-05-12 09:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a5c3e7f1b209"
+down_revision = "91f6d2ad4e71"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stock_balances",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("warehouse_id", sa.Integer(), nullable=False),
+        sa.Column("on_hand", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("reserved", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("damaged", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("quarantined", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+        sa.PrimaryKeyConstraint("product_id", "warehouse_id"),
+    )
+    op.create_index(op.f("ix_stock_balances_warehouse_id"), "stock_balances", ["warehouse_id"], unique=False)
+
+    op.execute(
+        """
+        INSERT INTO stock_balances (product_id, warehouse_id, on_hand, reserved, damaged, quarantined)
+        SELECT keys.product_id,
+               keys.warehouse_id,
+               COALESCE(ledger.on_hand, 0),
+               COALESCE(reservations.reserved, 0),
+               COALESCE(ledger.damaged, 0),
+               COALESCE(ledger.quarantined, 0)
+        FROM (
+            SELECT product_id, warehouse_id FROM inventory_transactions
+            UNION
+            SELECT product_id, warehouse_id FROM stock_reservations WHERE status = 'ACTIVE'
+        ) AS keys
+        LEFT JOIN (
+            SELECT product_id,
+                   warehouse_id,
+                   SUM(CASE WHEN direction = 'IN' THEN quantity WHEN direction = 'OUT' THEN -quantity ELSE 0 END) AS on_hand,
+                   SUM(CASE WHEN transaction_type = 'DAMAGED' THEN quantity ELSE 0 END) AS damaged,
+                   SUM(CASE WHEN transaction_type = 'QUARANTINED' THEN quantity ELSE 0 END) AS quarantined
+            FROM inventory_transactions
+            GROUP BY product_id, warehouse_id
+        ) AS ledger
+          ON ledger.product_id = keys.product_id AND ledger.warehouse_id = keys.warehouse_id
+        LEFT JOIN (
+            SELECT product_id, warehouse_id, SUM(quantity) AS reserved
+            FROM stock_reservations
+            WHERE status = 'ACTIVE'
+            GROUP BY product_id, warehouse_id
+        ) AS reservations
+          ON reservations.product_id = keys.product_id AND reservations.warehouse_id = keys.warehouse_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_stock_balances_warehouse_id"), table_name="stock_balances")
+    op.drop_table("stock_balances")
@@ -0,0 +1,67 @@
+"""add product week cube
+
+Revision ID: a7c3e9f1d402
+Revises: f2a8c4e6b931
+Create Date: 2026-06-16 09:20:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a7c3e9f1d402"
+down_revision = "f2a8c4e6b931"
+branch_labels = None
+depends_on = None
+
+
+def _week_start(bind, column: str) -> str:
+    if bind.dialect.name == "postgresql":
+        return f"date_trunc('week', {column})::date"
+    return f"date({column}, 'weekday 0', '-6 days')"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_week_cube",
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("week_start", sa.Date(), nullable=False),
+        sa.Column("units_sold", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("returned_units", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("refund_amount", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("replacement_cost", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.PrimaryKeyConstraint("owner_id", "product_id", "week_start"),
+    )
+    op.create_index("ix_product_week_cube_owner_id_week_start", "product_week_cube", ["owner_id", "week_start"], unique=False)
+
+    bind = op.get_bind()
+    sale_week = _week_start(bind, "sales.sale_date")
+    return_week = _week_start(bind, "return_orders.return_date")
+    op.execute(
+        f"""
+        INSERT INTO product_week_cube (owner_id, product_id, week_start, units_sold, revenue, returned_units, refund_amount, replacement_cost)
+        SELECT owner_id, product_id, week_start, SUM(units_sold), SUM(revenue), SUM(returned_units), SUM(refund_amount), SUM(replacement_cost)
+        FROM (
+            SELECT sales.owner_id, sales.product_id, {sale_week} AS week_start, sales.quantity AS units_sold,
+                   sales.total_amount AS revenue, 0 AS returned_units, 0 AS refund_amount, 0 AS replacement_cost
+            FROM sales
+            UNION ALL
+            SELECT return_orders.owner_id, return_order_items.product_id, {return_week}, 0, 0,
+                   return_order_items.quantity, COALESCE(return_order_items.refund_amount, 0), COALESCE(return_order_items.replacement_cost, 0)
+            FROM return_order_items JOIN return_orders ON return_orders.id = return_order_items.return_order_id
+            WHERE return_orders.owner_id IS NOT NULL
+        ) AS cells
+        GROUP BY owner_id, product_id, week_start
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_week_cube_owner_id_week_start", table_name="product_week_cube")
+    op.drop_table("product_week_cube")
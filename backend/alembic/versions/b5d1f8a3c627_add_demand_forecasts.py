@@ -0,0 +1,36 @@
+"""add demand forecasts
+
+Revision ID: b5d1f8a3c627
+Revises: a7c3e9f1d402
+Create Date: 2026-06-23 10:05:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b5d1f8a3c627"
+down_revision = "a7c3e9f1d402"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "demand_forecasts",
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("method", sa.String(), nullable=False),
+        sa.Column("daily_demand", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("demand_std", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("history_days", sa.Integer(), nullable=False),
+        sa.Column("fitted_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.PrimaryKeyConstraint("owner_id", "product_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("demand_forecasts")
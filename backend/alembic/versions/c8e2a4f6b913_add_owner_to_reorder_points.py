@@ -0,0 +1,41 @@
+"""add owner to reorder points
+
+Revision ID: c8e2a4f6b913
+Revises: b5d1f8a3c627
+Create Date: 2026-06-30 09:40:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c8e2a4f6b913"
+down_revision = "b5d1f8a3c627"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("reorder_points", sa.Column("owner_id", sa.Integer(), nullable=True))
+    op.create_index(op.f("ix_reorder_points_owner_id"), "reorder_points", ["owner_id"], unique=False)
+    op.create_foreign_key(
+        "fk_reorder_points_owner_id_users",
+        "reorder_points",
+        "users",
+        ["owner_id"],
+        ["id"],
+    )
+    op.execute(
+        """
+        UPDATE reorder_points
+        SET owner_id = (SELECT products.owner_id FROM products WHERE products.id = reorder_points.product_id)
+        WHERE owner_id IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("fk_reorder_points_owner_id_users", "reorder_points", type_="foreignkey")
+    op.drop_index(op.f("ix_reorder_points_owner_id"), table_name="reorder_points")
+    op.drop_column("reorder_points", "owner_id")
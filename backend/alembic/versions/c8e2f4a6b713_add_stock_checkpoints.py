@@ -0,0 +1,46 @@
+"""add stock checkpoints
+
+Revision ID: c8e2f4a6b713
+Revises: a5c3e7f1b209
+Create Date: 2026-05-14 08:15:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "c8e2f4a6b713"
+down_revision = "a5c3e7f1b209"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stock_checkpoints",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("warehouse_id", sa.Integer(), nullable=False),
+        sa.Column("checkpoint_date", sa.Date(), nullable=False),
+        sa.Column("on_hand", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("damaged", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("quarantined", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+        sa.PrimaryKeyConstraint("product_id", "warehouse_id", "checkpoint_date"),
+    )
+    op.create_index(op.f("ix_stock_checkpoints_checkpoint_date"), "stock_checkpoints", ["checkpoint_date"], unique=False)
+    # Point-in-time reads replay the ledger tail for one (product, warehouse) after a checkpoint.
+    op.create_index(
+        "ix_inventory_transactions_product_warehouse_created_at",
+        "inventory_transactions",
+        ["product_id", "warehouse_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_inventory_transactions_product_warehouse_created_at", table_name="inventory_transactions")
+    op.drop_index(op.f("ix_stock_checkpoints_checkpoint_date"), table_name="stock_checkpoints")
+    op.drop_table("stock_checkpoints")
@@ -0,0 +1,50 @@
+"""add supplier lead times
+
+Revision ID: d4a6c8e1f352
+Revises: c8e2a4f6b913
+Create Date: 2026-07-06 11:15:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d4a6c8e1f352"
+down_revision = "c8e2a4f6b913"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "supplier_lead_times",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("supplier_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=True),
+        sa.Column("receipt_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("mean_days", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("variance_days", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("p90_days", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("histogram", sa.JSON(), nullable=False),
+        sa.Column("folded_through", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["supplier_id"], ["suppliers.id"]),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_supplier_lead_times_id"), "supplier_lead_times", ["id"], unique=False)
+    op.create_index(
+        "ix_supplier_lead_times_owner_id_supplier_id_product_id",
+        "supplier_lead_times",
+        ["owner_id", "supplier_id", "product_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_supplier_lead_times_owner_id_supplier_id_product_id", table_name="supplier_lead_times")
+    op.drop_index(op.f("ix_supplier_lead_times_id"), table_name="supplier_lead_times")
+    op.drop_table("supplier_lead_times")
@@ -0,0 +1,55 @@
+"""add low stock flags
+
+Revision ID: d9a3b5c7e124
+Revises: c8e2f4a6b713
+Create Date: 2026-05-15 10:05:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "d9a3b5c7e124"
+down_revision = "c8e2f4a6b713"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("products", sa.Column("is_low_stock", sa.Boolean(), nullable=False, server_default=sa.true()))
+    op.create_index(op.f("ix_products_is_low_stock"), "products", ["is_low_stock"], unique=False)
+    op.add_column("stock_balances", sa.Column("is_low_stock", sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.create_index("ix_stock_balances_warehouse_id_is_low_stock", "stock_balances", ["warehouse_id", "is_low_stock"], unique=False)
+
+    op.execute(
+        """
+        UPDATE stock_balances
+        SET is_low_stock = (
+            stock_balances.on_hand - stock_balances.reserved - stock_balances.damaged - stock_balances.quarantined
+            <= (SELECT COALESCE(products.min_stock_threshold, 0) FROM products WHERE products.id = stock_balances.product_id)
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE products
+        SET is_low_stock = (
+            COALESCE(
+                (
+                    SELECT SUM(on_hand - reserved - damaged - quarantined)
+                    FROM stock_balances
+                    WHERE stock_balances.product_id = products.id
+                ),
+                0
+            ) <= COALESCE(products.min_stock_threshold, 0)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stock_balances_warehouse_id_is_low_stock", table_name="stock_balances")
+    op.drop_column("stock_balances", "is_low_stock")
+    op.drop_index(op.f("ix_products_is_low_stock"), table_name="products")
+    op.drop_column("products", "is_low_stock")
@@ -0,0 +1,133 @@
+"""partition inventory ledger by month
+
+Revision ID: e4b7d2c9a815
+Revises: d9a3b5c7e124
+Create Date: 2026-06-02 07:40:00.000000
+"""
+
+from datetime import date, datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e4b7d2c9a815"
+down_revision = "d9a3b5c7e124"
+branch_labels = None
+depends_on = None
+
+
+LEDGER_COLUMNS = (
+    "id, product_id, warehouse_id, transaction_type, quantity, direction, reference_type, "
+    "reference_id, reason, notes, created_by, approved_by, created_at"
+)
+LEDGER_INDEXES = (
+    ("ix_inventory_transactions_id", ["id"]),
+    ("ix_inventory_transactions_product_id", ["product_id"]),
+    ("ix_inventory_transactions_warehouse_id", ["warehouse_id"]),
+    ("ix_inventory_transactions_transaction_type", ["transaction_type"]),
+    ("ix_inventory_transactions_direction", ["direction"]),
+    ("ix_inventory_transactions_reference_type", ["reference_type"]),
+    ("ix_inventory_transactions_reference_id", ["reference_id"]),
+    ("ix_inventory_transactions_created_at", ["created_at"]),
+    ("ix_inventory_transactions_product_warehouse_created_at", ["product_id", "warehouse_id", "created_at"]),
+)
+MONTHS_AHEAD = 3
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _ledger_table_sql(partitioned: bool) -> str:
+    # Postgres requires the partition key in the primary key of a partitioned table.
+    primary_key = "PRIMARY KEY (id, created_at)" if partitioned else "PRIMARY KEY (id)"
+    suffix = " PARTITION BY RANGE (created_at)" if partitioned else ""
+    created_at = "NOT NULL DEFAULT now()" if partitioned else "DEFAULT now()"
+    return f"""
+        CREATE TABLE inventory_transactions (
+            id INTEGER NOT NULL DEFAULT nextval('inventory_transactions_id_seq'::regclass),
+            product_id INTEGER NOT NULL REFERENCES products (id),
+            warehouse_id INTEGER NOT NULL REFERENCES warehouses (id),
+            transaction_type VARCHAR NOT NULL,
+            quantity INTEGER NOT NULL,
+            direction VARCHAR NOT NULL,
+            reference_type VARCHAR,
+            reference_id VARCHAR,
+            reason VARCHAR,
+            notes TEXT,
+            created_by INTEGER REFERENCES users (id),
+            approved_by INTEGER REFERENCES users (id),
+            created_at TIMESTAMP WITH TIME ZONE {created_at},
+            {primary_key}
+        ){suffix}
+    """
+
+
+def _swap_ledger_table(partitioned: bool) -> None:
+    for name, _ in LEDGER_INDEXES:
+        op.drop_index(name, table_name="inventory_transactions")
+    op.execute("ALTER TABLE inventory_transactions RENAME TO inventory_transactions_previous")
+    op.execute("ALTER TABLE inventory_transactions_previous RENAME CONSTRAINT inventory_transactions_pkey TO inventory_transactions_previous_pkey")
+    op.execute(_ledger_table_sql(partitioned))
+    op.execute("ALTER SEQUENCE inventory_transactions_id_seq OWNED BY inventory_transactions.id")
+
+
+def _copy_ledger_rows() -> None:
+    op.execute(
+        f"INSERT INTO inventory_transactions ({LEDGER_COLUMNS}) "
+        f"SELECT {LEDGER_COLUMNS.replace('created_at', 'COALESCE(created_at, now())')} FROM inventory_transactions_previous"
+    )
+    op.execute("DROP TABLE inventory_transactions_previous")
+    for name, columns in LEDGER_INDEXES:
+        op.create_index(name, "inventory_transactions", columns, unique=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_archives",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("period_end", sa.Date(), nullable=False),
+        sa.Column("partition_name", sa.String(), nullable=True),
+        sa.Column("row_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_ledger_archives_id"), "ledger_archives", ["id"], unique=False)
+    op.create_index(op.f("ix_ledger_archives_period_end"), "ledger_archives", ["period_end"], unique=False)
+
+    # Declarative partitioning is Postgres-only; other databases keep the plain ledger table.
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    first_movement = bind.execute(sa.text("SELECT min(created_at) FROM inventory_transactions")).scalar()
+    today = datetime.utcnow().date()
+    month = (first_movement.date() if first_movement is not None else today).replace(day=1)
+    last_month = today.replace(day=1)
+    for _ in range(MONTHS_AHEAD):
+        last_month = _next_month(last_month)
+
+    _swap_ledger_table(partitioned=True)
+    while month <= last_month:
+        op.execute(
+            f"CREATE TABLE inventory_transactions_p{month:%Y%m} PARTITION OF inventory_transactions "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{_next_month(month).isoformat()} 00:00:00+00')"
+        )
+        month = _next_month(month)
+    op.execute("CREATE TABLE inventory_transactions_default PARTITION OF inventory_transactions DEFAULT")
+    _copy_ledger_rows()
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # Partitions detached by archiving are standalone tables and are not folded back in.
+        _swap_ledger_table(partitioned=False)
+        _copy_ledger_rows()
+
+    op.drop_index(op.f("ix_ledger_archives_period_end"), table_name="ledger_archives")
+    op.drop_index(op.f("ix_ledger_archives_id"), table_name="ledger_archives")
+    op.drop_table("ledger_archives")
@@ -0,0 +1,66 @@
+"""add import jobs
+
+Revision ID: e9b3d5f7a214
+Revises: d4a6c8e1f352
+Create Date: 2026-07-13 10:20:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e9b3d5f7a214"
+down_revision = "d4a6c8e1f352"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "import_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="PENDING"),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("original_filename", sa.String(), nullable=True),
+        sa.Column("total_rows", sa.Integer(), nullable=True),
+        sa.Column("processed_rows", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("warning_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failure_reason", sa.Text(), nullable=True),
+        sa.Column("first_sale_date", sa.Date(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_import_jobs_id"), "import_jobs", ["id"], unique=False)
+    op.create_index(op.f("ix_import_jobs_owner_id"), "import_jobs", ["owner_id"], unique=False)
+    op.create_index(op.f("ix_import_jobs_status"), "import_jobs", ["status"], unique=False)
+
+    op.create_table(
+        "import_job_errors",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_id", sa.Integer(), nullable=False),
+        sa.Column("row_number", sa.Integer(), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(["job_id"], ["import_jobs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_import_job_errors_id"), "import_job_errors", ["id"], unique=False)
+    op.create_index(op.f("ix_import_job_errors_job_id"), "import_job_errors", ["job_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_import_job_errors_job_id"), table_name="import_job_errors")
+    op.drop_index(op.f("ix_import_job_errors_id"), table_name="import_job_errors")
+    op.drop_table("import_job_errors")
+    op.drop_index(op.f("ix_import_jobs_status"), table_name="import_jobs")
+    op.drop_index(op.f("ix_import_jobs_owner_id"), table_name="import_jobs")
+    op.drop_index(op.f("ix_import_jobs_id"), table_name="import_jobs")
+    op.drop_table("import_jobs")
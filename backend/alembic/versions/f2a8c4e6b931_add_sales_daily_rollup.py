@@ -0,0 +1,46 @@
+"""add sales daily rollup
+
+Revision ID: f2a8c4e6b931
+Revises: e4b7d2c9a815
+Create Date: 2026-06-09 10:05:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f2a8c4e6b931"
+down_revision = "e4b7d2c9a815"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sales_daily_rollup",
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("units", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("order_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.PrimaryKeyConstraint("owner_id", "product_id", "day"),
+    )
+    op.create_index("ix_sales_daily_rollup_owner_id_day", "sales_daily_rollup", ["owner_id", "day"], unique=False)
+    op.execute(
+        """
+        INSERT INTO sales_daily_rollup (owner_id, product_id, day, units, revenue, order_count)
+        SELECT owner_id, product_id, date(sale_date), SUM(quantity), SUM(total_amount), COUNT(id)
+        FROM sales
+        GROUP BY owner_id, product_id, date(sale_date)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sales_daily_rollup_owner_id_day", table_name="sales_daily_rollup")
+    op.drop_table("sales_daily_rollup")
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+from app.mcp.client import InternalMCPClient
+from app.mcp.schemas import MCPRequestContext
+from app.models import AgentRecommendation
+from app.services.stock_ledger_service import write_stock_checkpoints
+
+
+JOB_NAME = "daily_stock_checkpoint"
+
+
+def run_daily_stock_checkpoint(
+    db: Session,
+    client: InternalMCPClient,
+    context: MCPRequestContext,
+) -> list[AgentRecommendation]:
+    write_stock_checkpoints(db, commit=False)
+    return []
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+from app.mcp.client import InternalMCPClient
+from app.mcp.schemas import MCPRequestContext
+from app.models import AgentRecommendation
+from app.services.forecasting_service import refresh_all_demand_forecasts
+
+
+JOB_NAME = "demand_forecast_refresh"
+
+
+def run_demand_forecast_refresh(
+    db: Session,
+    client: InternalMCPClient,
+    context: MCPRequestContext,
+) -> list[AgentRecommendation]:
+    refresh_all_demand_forecasts(db, commit=False)
+    return []
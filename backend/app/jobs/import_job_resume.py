@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import logging
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.mcp.client import InternalMCPClient
+from app.mcp.schemas import MCPRequestContext
+from app.models import AgentRecommendation
+from app.services.import_job_service import list_resumable_import_job_ids, run_import_job
+
+
+JOB_NAME = "import_job_resume"
+logger = logging.getLogger(__name__)
+
+
+def process_import_job(job_id: int) -> None:
+    """Run one import job on its own session, off the request that queued it."""
+    db = SessionLocal()
+    try:
+        run_import_job(db, job_id)
+    except Exception:
+        logger.exception("Import job %s failed", job_id)
+    finally:
+        db.close()
+
+
+def run_import_job_resume(
+    db: Session,
+    client: InternalMCPClient,
+    context: MCPRequestContext,
+) -> list[AgentRecommendation]:
+    # Jobs left PENDING or stalled by a crash continue from their last committed chunk.
+    for job_id in list_resumable_import_job_ids(db):
+        threading.Thread(target=process_import_job, args=(job_id,), name=f"import-job-{job_id}", daemon=True).start()
+    return []
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import os
+from datetime import date, datetime
+
+from sqlalchemy.orm import Session
+
+from app.mcp.client import InternalMCPClient
+from app.mcp.schemas import MCPRequestContext
+from app.models import AgentRecommendation
+from app.services.ledger_partition_service import archive_ledger_history, ensure_ledger_partitions
+
+
+JOB_NAME = "ledger_partition_maintenance"
+
+
+def _retention_cutoff(months: int) -> date:
+    month = datetime.utcnow().date().replace(day=1)
+    year, month_index = divmod(month.year * 12 + month.month - 1 - months, 12)
+    return month.replace(year=year, month=month_index + 1)
+
+
+def run_ledger_partition_maintenance(
+    db: Session,
+    client: InternalMCPClient,
+    context: MCPRequestContext,
+) -> list[AgentRecommendation]:
+    ensure_ledger_partitions(db, commit=False)
+    # Archiving is opt-in: LEDGER_RETENTION_MONTHS keeps that many closed months in the live ledger.
+    retention_months = int(os.getenv("LEDGER_RETENTION_MONTHS", "0"))
+    if retention_months > 0:
+        archive_ledger_history(db, before=_retention_cutoff(retention_months), commit=False)
+    return []
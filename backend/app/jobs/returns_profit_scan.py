@@ -26,25 +26,17 @@ def run_returns_profit_scan(
         "end_date": end_date.isoformat(),
     }
 
-    high_return_result = client.read_resource_with_context(
+    # Catalog-wide margins and spikes in two grouped calls instead of two tool calls per product.
+    margins_result = client.invoke_tool_with_context(
         db=db,
         context=context,
-        uri="returns://high-return-products",
+        tool_name="returns.get_catalog_return_margins",
+        payload=iso_range,
     )
-    high_return_products = high_return_result.data or []
-
-    for item in high_return_products:
-        product_id = item.get("product_id")
-        if product_id is None:
-            continue
-
-        margin_result = client.invoke_tool_with_context(
-            db=db,
-            context=context,
-            tool_name="returns.calculate_return_adjusted_margin",
-            payload={"product_id": product_id, **iso_range},
-        )
-        margin = margin_result.data or {}
+    for row in (margins_result.data or {}).get("products", []):
+        product_id = row.get("product_id")
+        margin = row.get("margin") or {}
+        item = {key: value for key, value in row.items() if key != "margin"}
         recommendations.append(
             create_agent_recommendation(
                 db,
@@ -52,36 +44,35 @@ def run_returns_profit_scan(
                 domain="returns",
                 recommendation_type="PROFIT_LEAKAGE",
                 severity="high",
-                title=f"Return-driven profit leakage: {item.get('sku', product_id)}",
+                title=f"Return-driven profit leakage: {row.get('sku', product_id)}",
                 summary=(
                     f"Return-adjusted profit estimate is {margin.get('return_adjusted_profit')} "
                     f"with confidence {margin.get('confidence_level')}."
                 ),
                 payload={"high_return_product": item, "margin": margin},
-                source_target="returns.calculate_return_adjusted_margin",
+                source_target="returns.get_catalog_return_margins",
             )
         )
 
-        spike_result = client.invoke_tool_with_context(
-            db=db,
-            context=context,
-            tool_name="returns.detect_return_spike",
-            payload={"product_id": product_id, "days": 7, "threshold_ratio": 0.5},
-        )
-        spike = spike_result.data or {}
-        if spike.get("is_spike"):
-            recommendations.append(
-                create_agent_recommendation(
-                    db,
-                    job_name=JOB_NAME,
-                    domain="returns",
-                    recommendation_type="RETURN_SPIKE",
-                    severity="critical",
-                    title=f"Return spike: {item.get('sku', product_id)}",
-                    summary=spike.get("summary", "Return activity has spiked materially against the prior window."),
-                    payload=spike,
-                    source_target="returns.detect_return_spike",
-                )
+    spikes_result = client.invoke_tool_with_context(
+        db=db,
+        context=context,
+        tool_name="returns.detect_catalog_return_spikes",
+        payload={"days": 7, "threshold_ratio": 0.5},
+    )
+    for spike in (spikes_result.data or {}).get("spikes", []):
+        recommendations.append(
+            create_agent_recommendation(
+                db,
+                job_name=JOB_NAME,
+                domain="returns",
+                recommendation_type="RETURN_SPIKE",
+                severity="critical",
+                title=f"Return spike: {spike.get('sku') or spike.get('product_id')}",
+                summary=f"Return rate rose {round(spike['relative_change'] * 100, 1)}% against the prior 7-day window.",
+                payload=spike,
+                source_target="returns.detect_catalog_return_spikes",
             )
+        )
 
     return recommendations
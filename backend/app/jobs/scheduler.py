@@ -117,8 +117,13 @@ def should_enable_scheduler() -> bool:
 
 def build_default_scheduler(server: InternalMCPServer) -> AgentJobScheduler:
     from app.jobs.daily_inventory_scan import run_daily_inventory_scan
+    from app.jobs.daily_stock_checkpoint import run_daily_stock_checkpoint
+    from app.jobs.demand_forecast_refresh import run_demand_forecast_refresh
+    from app.jobs.import_job_resume import run_import_job_resume
+    from app.jobs.ledger_partition_maintenance import run_ledger_partition_maintenance
     from app.jobs.logistics_scan import run_logistics_scan
     from app.jobs.returns_profit_scan import run_returns_profit_scan
+    from app.jobs.supplier_lead_time_refresh import run_supplier_lead_time_refresh
     from app.jobs.weekly_sales_scan import run_weekly_sales_scan
 
     return AgentJobScheduler(
@@ -129,6 +134,31 @@ def build_default_scheduler(server: InternalMCPServer) -> AgentJobScheduler:
                 interval_seconds=24 * 60 * 60,
                 runner=run_daily_inventory_scan,
             ),
+            ScheduledJob(
+                name="daily_stock_checkpoint",
+                interval_seconds=24 * 60 * 60,
+                runner=run_daily_stock_checkpoint,
+            ),
+            ScheduledJob(
+                name="demand_forecast_refresh",
+                interval_seconds=24 * 60 * 60,
+                runner=run_demand_forecast_refresh,
+            ),
+            ScheduledJob(
+                name="supplier_lead_time_refresh",
+                interval_seconds=6 * 60 * 60,
+                runner=run_supplier_lead_time_refresh,
+            ),
+            ScheduledJob(
+                name="import_job_resume",
+                interval_seconds=5 * 60,
+                runner=run_import_job_resume,
+            ),
+            ScheduledJob(
+                name="ledger_partition_maintenance",
+                interval_seconds=24 * 60 * 60,
+                runner=run_ledger_partition_maintenance,
+            ),
             ScheduledJob(
                 name="weekly_sales_scan",
                 interval_seconds=7 * 24 * 60 * 60,
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from sqlalchemy.orm import Session
+
+from app.mcp.client import InternalMCPClient
+from app.mcp.schemas import MCPRequestContext
+from app.models import AgentRecommendation
+from app.services.lead_time_service import refresh_all_supplier_lead_times
+
+
+JOB_NAME = "supplier_lead_time_refresh"
+
+
+def run_supplier_lead_time_refresh(
+    db: Session,
+    client: InternalMCPClient,
+    context: MCPRequestContext,
+) -> list[AgentRecommendation]:
+    refresh_all_supplier_lead_times(db, commit=False)
+    return []
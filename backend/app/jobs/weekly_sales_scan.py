@@ -48,15 +48,9 @@ def run_weekly_sales_scan(
         if product_id is None:
             continue
 
-        velocity_result = client.invoke_tool_with_context(
-            db=db,
-            context=context,
-            tool_name="sales.calculate_sales_velocity",
-            payload={"product_id": product_id, "days": 7},
-        )
-        velocity = velocity_result.data or {}
-        change = velocity.get("velocity_change_pct")
-        if change is not None and abs(change) >= 25:
+        # The ranking already carries current vs previous velocity for every product.
+        change = product.get("sales_velocity_change")
+        if change is not None and abs(change) >= 0.25:
             recommendations.append(
                 create_agent_recommendation(
                     db,
@@ -65,32 +59,36 @@ def run_weekly_sales_scan(
                     recommendation_type="VELOCITY_CHANGE",
                     severity="medium",
                     title=f"Sales velocity change: {product.get('sku', product_id)}",
-                    summary=f"Sales velocity changed by {change}% versus the prior comparison window.",
-                    payload=velocity,
-                    source_target="sales.calculate_sales_velocity",
+                    summary=f"Sales velocity changed by {round(change * 100, 1)}% versus the prior comparison window.",
+                    payload=product,
+                    source_target="sales.get_best_selling_products",
                 )
             )
 
-        anomaly_result = client.invoke_tool_with_context(
-            db=db,
-            context=context,
-            tool_name="sales.detect_sales_anomaly",
-            payload={"product_id": product_id, "days": 7, "threshold_ratio": 0.5},
-        )
-        anomaly = anomaly_result.data or {}
-        if anomaly.get("is_anomaly"):
-            recommendations.append(
-                create_agent_recommendation(
-                    db,
-                    job_name=JOB_NAME,
-                    domain="sales",
-                    recommendation_type="DEMAND_ANOMALY",
-                    severity="high",
-                    title=f"Demand anomaly: {product.get('sku', product_id)}",
-                    summary=anomaly.get("summary", "Sales behavior deviated materially from the prior trend."),
-                    payload=anomaly,
-                    source_target="sales.detect_sales_anomaly",
-                )
+    # One catalog-wide pass instead of a per-product anomaly call for the top sellers only.
+    anomalies_result = client.invoke_tool_with_context(
+        db=db,
+        context=context,
+        tool_name="sales.detect_catalog_anomalies",
+        payload={"window_days": 28, "recent_days": 7, "threshold": 3.0, "method": "robust", "limit": 25},
+    )
+    for anomaly in (anomalies_result.data or {}).get("anomalies", []):
+        direction = "above" if anomaly.get("anomaly_type") == "SPIKE" else "below"
+        recommendations.append(
+            create_agent_recommendation(
+                db,
+                job_name=JOB_NAME,
+                domain="sales",
+                recommendation_type="DEMAND_ANOMALY",
+                severity="high",
+                title=f"Demand anomaly: {anomaly.get('sku', anomaly.get('product_id'))}",
+                summary=(
+                    f"Recent daily demand of {anomaly.get('recent_daily_units')} units is {direction} "
+                    f"the baseline of {anomaly.get('baseline_daily_units')} units."
+                ),
+                payload=anomaly,
+                source_target="sales.detect_catalog_anomalies",
             )
+        )
 
     return recommendations
@@ -12,7 +12,9 @@ from app.routers import (
     customers,
     demo,
     einvoicing,
+    exports,
     free_integrations,
+    imports,
     ingestion,
     inventory,
     logistics,
@@ -65,6 +67,8 @@ app.include_router(products.router, prefix="/api/products", tags=["products"])
 app.include_router(sales.router, prefix="/api/sales", tags=["sales"])
 app.include_router(customers.router, prefix="/api/customers", tags=["customers"])
 app.include_router(suppliers.router, prefix="/api/suppliers", tags=["suppliers"])
+app.include_router(imports.router, prefix="/api/imports", tags=["imports"])
+app.include_router(exports.router, prefix="/api/exports", tags=["exports"])
 app.include_router(sales_orders.router, prefix="/api/sales-orders", tags=["sales-orders"])
 app.include_router(purchase_orders.router, prefix="/api/purchase-orders", tags=["purchase-orders"])
 app.include_router(reorder.router, prefix="/api", tags=["reorder"])
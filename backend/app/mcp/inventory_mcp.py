@@ -7,7 +7,7 @@ from app.mcp.schemas import (
     MCPToolSpec,
     PlanLevel,
 )
-from app.services import stock_ledger_service
+from app.services import atp_service, lead_time_service, rebalancing_service, stock_ledger_service
 
 
 def _resource_inventory_by_sku(db, context: MCPRequestContext, payload: dict) -> dict:
@@ -51,10 +51,11 @@ def _tool_get_available_to_promise(db, context: MCPRequestContext, payload: dict
     if product_id is None and "sku" in payload:
         product = stock_ledger_service.get_product_by_sku(db, payload["sku"], owner_id=context.user_id)
         product_id = product.id
-    return stock_ledger_service.get_available_to_promise(
+    return atp_service.get_available_to_promise(
         db,
         int(product_id),
         payload.get("warehouse_id"),
+        owner_id=context.user_id,
     )
 
 
@@ -87,6 +88,29 @@ def _tool_recommend_stock_transfer(db, context: MCPRequestContext, payload: dict
     )
 
 
+def _tool_get_supplier_lead_times(db, context: MCPRequestContext, payload: dict) -> list[dict]:
+    product_id = payload.get("product_id")
+    if product_id is None and "sku" in payload:
+        product = stock_ledger_service.get_product_by_sku(db, payload["sku"], owner_id=context.user_id)
+        product_id = product.id
+    return lead_time_service.list_supplier_lead_times(
+        db,
+        owner_id=context.user_id,
+        supplier_id=int(payload["supplier_id"]) if payload.get("supplier_id") is not None else None,
+        product_id=int(product_id) if product_id is not None else None,
+    )
+
+
+def _tool_get_rebalancing_plan(db, context: MCPRequestContext, payload: dict) -> dict:
+    return rebalancing_service.build_rebalancing_plan(
+        db,
+        owner_id=context.user_id,
+        target_cover_days=int(payload.get("target_cover_days", rebalancing_service.DEFAULT_TARGET_COVER_DAYS)),
+        lookback_days=int(payload.get("lookback_days", rebalancing_service.DEFAULT_DEMAND_LOOKBACK_DAYS)),
+        limit=int(payload["limit"]) if payload.get("limit") is not None else None,
+    )
+
+
 def _tool_create_stock_adjustment_request(db, context: MCPRequestContext, payload: dict) -> dict:
     product_id = payload.get("product_id")
     if product_id is None and "sku" in payload:
@@ -167,7 +191,7 @@ def register_inventory_mcp() -> MCPModuleSpec:
             MCPToolSpec(
                 name="inventory.get_available_to_promise",
                 domain="inventory",
-                description="Read ATP based on ledger available stock.",
+                description="Read time-phased ATP from ledger availability plus open purchase orders and in-transit transfers.",
                 min_plan=PlanLevel.PRO,
                 read_only=True,
                 handler=_tool_get_available_to_promise,
@@ -188,6 +212,14 @@ def register_inventory_mcp() -> MCPModuleSpec:
                 read_only=True,
                 handler=_tool_calculate_days_of_cover,
             ),
+            MCPToolSpec(
+                name="inventory.get_supplier_lead_times",
+                domain="inventory",
+                description="Read observed supplier lead times (mean, variance, p90 days) from purchase order receipts.",
+                min_plan=PlanLevel.PRO,
+                read_only=True,
+                handler=_tool_get_supplier_lead_times,
+            ),
             MCPToolSpec(
                 name="inventory.recommend_stock_transfer",
                 domain="inventory",
@@ -196,6 +228,14 @@ def register_inventory_mcp() -> MCPModuleSpec:
                 read_only=True,
                 handler=_tool_recommend_stock_transfer,
             ),
+            MCPToolSpec(
+                name="inventory.get_rebalancing_plan",
+                domain="inventory",
+                description="Solve a ranked multi-warehouse transfer plan for every SKU without mutating inventory.",
+                min_plan=PlanLevel.BOOST,
+                read_only=True,
+                handler=_tool_get_rebalancing_plan,
+            ),
             MCPToolSpec(
                 name="inventory.create_stock_adjustment_request",
                 domain="inventory",
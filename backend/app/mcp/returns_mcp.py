@@ -24,7 +24,8 @@ def _parse_range(payload: dict, *, default_days: int = 30) -> tuple[datetime, da
 
 def _resource_weekly_returns(db, context: MCPRequestContext, payload: dict) -> dict:
     weeks = int(payload.get("weeks", 8))
-    return returns_service.get_weekly_returns(db, owner_id=int(context.user_id), weeks=weeks)
+    offset = int(payload.get("offset", 0))
+    return returns_service.get_weekly_returns(db, owner_id=int(context.user_id), weeks=weeks, offset=offset)
 
 
 def _resource_returns_by_sku(db, context: MCPRequestContext, payload: dict) -> dict:
@@ -66,6 +67,38 @@ def _tool_calculate_return_adjusted_margin(db, context: MCPRequestContext, paylo
     return returns_service.calculate_return_adjusted_margin(db, int(product_id), start, end)
 
 
+def _tool_get_catalog_return_margins(db, context: MCPRequestContext, payload: dict) -> dict:
+    start, end = _parse_range(payload)
+    limit = payload.get("limit")
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "products": returns_service.get_catalog_return_margins(
+            db,
+            start,
+            end,
+            owner_id=int(context.user_id),
+            only_with_returns=bool(payload.get("only_with_returns", True)),
+            limit=int(limit) if limit is not None else None,
+        ),
+    }
+
+
+def _tool_detect_catalog_return_spikes(db, context: MCPRequestContext, payload: dict) -> dict:
+    days = int(payload.get("days", 7))
+    threshold_ratio = float(payload.get("threshold_ratio", 0.5))
+    return {
+        "days": days,
+        "threshold_ratio": threshold_ratio,
+        "spikes": returns_service.detect_catalog_return_spikes(
+            db,
+            owner_id=int(context.user_id),
+            days=days,
+            threshold_ratio=threshold_ratio,
+        ),
+    }
+
+
 def _tool_detect_return_spike(db, context: MCPRequestContext, payload: dict) -> dict:
     product_id = payload.get("product_id")
     if product_id is None and "sku" in payload:
@@ -169,6 +202,22 @@ def register_returns_mcp() -> MCPModuleSpec:
                 read_only=True,
                 handler=_tool_detect_return_spike,
             ),
+            MCPToolSpec(
+                name="returns.get_catalog_return_margins",
+                domain="returns",
+                description="Calculate return-adjusted margin for every product in one grouped pass, worst profit first.",
+                min_plan=PlanLevel.PRO,
+                read_only=True,
+                handler=_tool_get_catalog_return_margins,
+            ),
+            MCPToolSpec(
+                name="returns.detect_catalog_return_spikes",
+                domain="returns",
+                description="Detect return-rate spikes across the whole catalog against the prior comparison window.",
+                min_plan=PlanLevel.PRO,
+                read_only=True,
+                handler=_tool_detect_catalog_return_spikes,
+            ),
             MCPToolSpec(
                 name="returns.link_returns_to_supplier",
                 domain="returns",
@@ -12,12 +12,14 @@ from app.services import analytics_service, sales_service
 
 def _resource_weekly(db, context: MCPRequestContext, payload: dict) -> dict:
     weeks = int(payload.get("weeks", 8))
-    return analytics_service.get_weekly_sales(db=db, owner_id=int(context.user_id), weeks=weeks)
+    offset = int(payload.get("offset", 0))
+    return analytics_service.get_weekly_sales(db=db, owner_id=int(context.user_id), weeks=weeks, offset=offset)
 
 
 def _resource_sku_weekly(db, context: MCPRequestContext, payload: dict) -> dict:
     weeks = int(payload.get("weeks", 8))
-    return analytics_service.get_weekly_sales(db=db, owner_id=int(context.user_id), sku=payload["sku"], weeks=weeks)
+    offset = int(payload.get("offset", 0))
+    return analytics_service.get_weekly_sales(db=db, owner_id=int(context.user_id), sku=payload["sku"], weeks=weeks, offset=offset)
 
 
 def _resource_top_products(db, context: MCPRequestContext, payload: dict) -> dict:
@@ -73,6 +75,19 @@ def _tool_detect_sales_anomaly(db, context: MCPRequestContext, payload: dict) ->
     )
 
 
+def _tool_detect_catalog_anomalies(db, context: MCPRequestContext, payload: dict) -> dict:
+    limit = payload.get("limit")
+    return analytics_service.detect_catalog_sales_anomalies(
+        db=db,
+        owner_id=int(context.user_id),
+        window_days=int(payload.get("window_days", 28)),
+        recent_days=int(payload.get("recent_days", 7)),
+        threshold=float(payload.get("threshold", 3.0)),
+        method=payload.get("method", "robust"),
+        limit=int(limit) if limit is not None else None,
+    )
+
+
 def _tool_compare_sales_by_channel(db, context: MCPRequestContext, payload: dict) -> dict:
     return analytics_service.compare_sales_by_channel(
         db=db,
@@ -154,6 +169,14 @@ def register_sales_mcp() -> MCPModuleSpec:
                 read_only=True,
                 handler=_tool_detect_sales_anomaly,
             ),
+            MCPToolSpec(
+                name="sales.detect_catalog_anomalies",
+                domain="sales",
+                description="Scan every SKU's daily demand against its own rolling or robust baseline and return only the anomalous ones.",
+                min_plan=PlanLevel.PRO,
+                read_only=True,
+                handler=_tool_detect_catalog_anomalies,
+            ),
             MCPToolSpec(
                 name="sales.compare_sales_by_channel",
                 domain="sales",
@@ -9,6 +9,7 @@ from sqlalchemy import (
     ForeignKey,
     Text,
     Boolean,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -82,6 +83,8 @@ class Product(Base):
     cost = Column(Float, nullable=False)
     current_stock = Column(Integer, default=0)
     min_stock_threshold = Column(Integer, default=10)
+    # Maintained by the ledger write path: available stock across warehouses is at or below the threshold.
+    is_low_stock = Column(Boolean, nullable=False, default=True, index=True)
     supplier = Column(String, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -106,6 +109,16 @@ class Product(Base):
         back_populates="product",
         cascade="all, delete-orphan",
     )
+    stock_balances = relationship(
+        "StockBalance",
+        back_populates="product",
+        cascade="all, delete-orphan",
+    )
+    stock_checkpoints = relationship(
+        "StockCheckpoint",
+        back_populates="product",
+        cascade="all, delete-orphan",
+    )
 
 class Sale(Base):
     __tablename__ = "sales"
@@ -125,6 +138,71 @@ class Sale(Base):
     owner = relationship("User", back_populates="sales")
     e_invoice_documents = relationship("EInvoiceDocument", back_populates="sale")
 
+
+class SalesDailyRollup(Base):
+    __tablename__ = "sales_daily_rollup"
+    __table_args__ = (
+        Index("ix_sales_daily_rollup_owner_id_day", "owner_id", "day"),
+    )
+
+    # Per-day sales totals maintained alongside every Sale insert; dashboards never scan `sales`.
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    order_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ProductWeekCube(Base):
+    __tablename__ = "product_week_cube"
+    __table_args__ = (
+        Index("ix_product_week_cube_owner_id_week_start", "owner_id", "week_start"),
+    )
+
+    # Per-product ISO-week sales and return totals, maintained alongside Sale and return item inserts.
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    week_start = Column(Date, primary_key=True)
+    units_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    returned_units = Column(Integer, nullable=False, default=0)
+    refund_amount = Column(Float, nullable=False, default=0.0)
+    replacement_cost = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class DemandForecast(Base):
+    __tablename__ = "demand_forecasts"
+
+    # Latest fitted daily demand per product, refreshed off the request path by the forecast job.
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    method = Column(String, nullable=False)
+    daily_demand = Column(Float, nullable=False, default=0.0)
+    demand_std = Column(Float, nullable=False, default=0.0)
+    history_days = Column(Integer, nullable=False)
+    fitted_at = Column(DateTime(timezone=True), nullable=False)
+
+class SupplierLeadTime(Base):
+    __tablename__ = "supplier_lead_times"
+    __table_args__ = (
+        Index("ix_supplier_lead_times_owner_id_supplier_id_product_id", "owner_id", "supplier_id", "product_id"),
+    )
+
+    # Observed order-to-receipt days per supplier and product; product_id is null on the supplier-wide row.
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True)
+    receipt_count = Column(Integer, nullable=False, default=0)
+    mean_days = Column(Float, nullable=False, default=0.0)
+    variance_days = Column(Float, nullable=False, default=0.0)
+    p90_days = Column(Float, nullable=False, default=0.0)
+    histogram = Column(JSON, nullable=False, default=dict)
+    # Receipts stamped at or before this time have been folded in.
+    folded_through = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class InventoryHistory(Base):
     __tablename__ = "inventory_history"
     
@@ -163,6 +241,16 @@ class Warehouse(Base):
         back_populates="warehouse",
         cascade="all, delete-orphan",
     )
+    stock_balances = relationship(
+        "StockBalance",
+        back_populates="warehouse",
+        cascade="all, delete-orphan",
+    )
+    stock_checkpoints = relationship(
+        "StockCheckpoint",
+        back_populates="warehouse",
+        cascade="all, delete-orphan",
+    )
     outbound_transfers = relationship(
         "StockTransfer",
         foreign_keys="StockTransfer.from_warehouse_id",
@@ -177,6 +265,9 @@ class Warehouse(Base):
 
 class InventoryTransaction(Base):
     __tablename__ = "inventory_transactions"
+    __table_args__ = (
+        Index("ix_inventory_transactions_product_warehouse_created_at", "product_id", "warehouse_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
@@ -223,6 +314,55 @@ class StockReservation(Base):
     warehouse = relationship("Warehouse", back_populates="stock_reservations")
 
 
+class StockBalance(Base):
+    __tablename__ = "stock_balances"
+    __table_args__ = (
+        Index("ix_stock_balances_warehouse_id_is_low_stock", "warehouse_id", "is_low_stock"),
+    )
+
+    # Materialized per-(product, warehouse) totals maintained by the ledger write path.
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), primary_key=True, index=True)
+    on_hand = Column(Integer, nullable=False, default=0)
+    reserved = Column(Integer, nullable=False, default=0)
+    damaged = Column(Integer, nullable=False, default=0)
+    quarantined = Column(Integer, nullable=False, default=0)
+    is_low_stock = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    product = relationship("Product", back_populates="stock_balances")
+    warehouse = relationship("Warehouse", back_populates="stock_balances")
+
+
+class StockCheckpoint(Base):
+    __tablename__ = "stock_checkpoints"
+
+    # Daily closing physical stock per (product, warehouse), written only for pairs that moved that day.
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    warehouse_id = Column(Integer, ForeignKey("warehouses.id"), primary_key=True)
+    checkpoint_date = Column(Date, primary_key=True, index=True)
+    on_hand = Column(Integer, nullable=False, default=0)
+    damaged = Column(Integer, nullable=False, default=0)
+    quarantined = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    product = relationship("Product", back_populates="stock_checkpoints")
+    warehouse = relationship("Warehouse", back_populates="stock_checkpoints")
+
+
+class LedgerArchive(Base):
+    __tablename__ = "ledger_archives"
+
+    # One row per archived month of inventory_transactions; checkpoints dated the day before
+    # `period_end` carry the closing balance of every pair whose history was archived.
+    id = Column(Integer, primary_key=True, index=True)
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False, index=True)
+    partition_name = Column(String, nullable=True)
+    row_count = Column(Integer, nullable=False, default=0)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class StockTransfer(Base):
     __tablename__ = "stock_transfers"
 
@@ -505,6 +645,7 @@ class ReorderPoint(Base):
     __tablename__ = "reorder_points"
 
     id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     warehouse_id = Column(Integer, ForeignKey("warehouses.id"), nullable=False, index=True)
     minimum_quantity = Column(Integer, nullable=False)
@@ -766,6 +907,39 @@ class AgentRecommendation(Base):
     owner = relationship("User", back_populates="agent_recommendations")
 
 
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    # A staged upload processed in committed chunks; processed_rows is the resume point after a crash.
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    entity = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="PENDING", index=True)
+    file_path = Column(String, nullable=False)
+    original_filename = Column(String, nullable=True)
+    total_rows = Column(Integer, nullable=True)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    created_count = Column(Integer, nullable=False, default=0)
+    updated_count = Column(Integer, nullable=False, default=0)
+    error_count = Column(Integer, nullable=False, default=0)
+    warning_count = Column(Integer, nullable=False, default=0)
+    failure_reason = Column(Text, nullable=True)
+    # Earliest sale date across committed chunks; derived aggregates are refreshed from here.
+    first_sale_date = Column(Date, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class ImportJobError(Base):
+    __tablename__ = "import_job_errors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("import_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    row_number = Column(Integer, nullable=False)
+    message = Column(Text, nullable=False)
+
+
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 
 from app.models import Product, RiskAlert, Sale
 from app.schemas import RoadmapTask
-from app.services.stock_ledger_service import get_stock_position
+from app.services.stock_ledger_service import get_stock_positions
 
 
 class RAGSystem:
@@ -23,9 +23,10 @@ class RAGSystem:
         context_parts: list[str] = []
 
         products = db.query(Product).filter(Product.owner_id == user_id).all()
+        positions = get_stock_positions(db, [product.id for product in products])
         product_data = []
         for product in products:
-            stock_position = get_stock_position(db, product.id)
+            stock_position = positions[product.id]
             product_data.append(
                 {
                     "name": product.name,
@@ -1,15 +1,21 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import func
 from datetime import datetime, timedelta
 from typing import List
 from app.database import get_db
-from app.models import Product, Sale, RiskAlert, User
+from app.models import Product, RiskAlert, User
 from app.schemas import (
     DashboardStats, BestSeller, SalesTrend, InventoryRisk
 )
 from app.auth import get_current_user
-from app.services.stock_ledger_service import get_available
+from app.services.sales_rollup_service import (
+    get_daily_sales_trend,
+    get_sales_totals,
+    get_top_sellers,
+    get_units_sold_by_product,
+)
+from app.services.stock_ledger_service import count_low_stock_products, get_stock_positions
 
 router = APIRouter()
 
@@ -18,89 +24,37 @@ async def get_dashboard_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Total revenue (last 30 days)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    revenue_result = db.query(func.sum(Sale.total_amount)).filter(
-        Sale.owner_id == current_user.id,
-        Sale.sale_date >= thirty_days_ago
-    ).scalar()
-    total_revenue = float(revenue_result) if revenue_result else 0.0
-    
-    # Total orders (last 30 days)
-    total_orders = db.query(func.count(Sale.id)).filter(
-        Sale.owner_id == current_user.id,
-        Sale.sale_date >= thirty_days_ago
-    ).scalar() or 0
+    today = datetime.utcnow().date()
+    thirty_days_ago = today - timedelta(days=30)
+    totals = get_sales_totals(db, owner_id=current_user.id, start_date=thirty_days_ago)
+    total_revenue = totals["revenue"]
+    total_orders = totals["order_count"]
     
     # Total products
     total_products = db.query(func.count(Product.id)).filter(
         Product.owner_id == current_user.id
     ).scalar() or 0
     
-    all_products = db.query(Product).filter(Product.owner_id == current_user.id).all()
-    low_stock_alerts = sum(
-        1 for product in all_products
-        if get_available(db, product.id) <= product.min_stock_threshold
-    )
+    low_stock_alerts = count_low_stock_products(db, owner_id=current_user.id)
     
     # Top sellers (last 30 days)
-    top_sellers_query = db.query(
-        Sale.product_id,
-        Product.name,
-        func.sum(Sale.quantity).label("total_quantity"),
-        func.sum(Sale.total_amount).label("total_revenue"),
-        func.count(Sale.id).label("total_sales")
-    ).join(Product).filter(
-        Sale.owner_id == current_user.id,
-        Sale.sale_date >= thirty_days_ago
-    ).group_by(Sale.product_id, Product.name).order_by(
-        desc("total_revenue")
-    ).limit(10).all()
-    
     top_sellers = [
-        BestSeller(
-            product_id=row.product_id,
-            product_name=row.name,
-            total_quantity=int(row.total_quantity),
-            total_revenue=float(row.total_revenue),
-            total_sales=int(row.total_sales)
-        )
-        for row in top_sellers_query
+        BestSeller(**row)
+        for row in get_top_sellers(db, owner_id=current_user.id, start_date=thirty_days_ago, limit=10)
     ]
     
-    # Recent trends (last 7 days, daily)
-    trends = []
-    for i in range(7):
-        date = datetime.utcnow() - timedelta(days=i)
-        start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = date.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        day_revenue = db.query(func.sum(Sale.total_amount)).filter(
-            Sale.owner_id == current_user.id,
-            Sale.sale_date >= start_of_day,
-            Sale.sale_date <= end_of_day
-        ).scalar() or 0.0
-        
-        day_quantity = db.query(func.sum(Sale.quantity)).filter(
-            Sale.owner_id == current_user.id,
-            Sale.sale_date >= start_of_day,
-            Sale.sale_date <= end_of_day
-        ).scalar() or 0
-        
-        day_orders = db.query(func.count(Sale.id)).filter(
-            Sale.owner_id == current_user.id,
-            Sale.sale_date >= start_of_day,
-            Sale.sale_date <= end_of_day
-        ).scalar() or 0
-        
-        trends.append(SalesTrend(
-            date=start_of_day.strftime("%Y-%m-%d"),
-            revenue=float(day_revenue),
-            quantity=int(day_quantity),
-            order_count=int(day_orders)
-        ))
-    
-    trends.reverse()  # Oldest to newest
+    # Recent trends (last 7 days, daily, oldest to newest)
+    trends = [
+        SalesTrend(
+            date=row["date"].strftime("%Y-%m-%d"),
+            revenue=row["revenue"],
+            quantity=row["units"],
+            order_count=row["order_count"],
+        )
+        for row in get_daily_sales_trend(
+            db, owner_id=current_user.id, start_date=today - timedelta(days=6), end_date=today
+        )
+    ]
     
     return DashboardStats(
         total_revenue=total_revenue,
@@ -118,30 +72,10 @@ async def get_best_sellers(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    top_sellers_query = db.query(
-        Sale.product_id,
-        Product.name,
-        func.sum(Sale.quantity).label("total_quantity"),
-        func.sum(Sale.total_amount).label("total_revenue"),
-        func.count(Sale.id).label("total_sales")
-    ).join(Product).filter(
-        Sale.owner_id == current_user.id,
-        Sale.sale_date >= start_date
-    ).group_by(Sale.product_id, Product.name).order_by(
-        desc("total_revenue")
-    ).limit(limit).all()
-    
+    start_date = datetime.utcnow().date() - timedelta(days=days)
     return [
-        BestSeller(
-            product_id=row.product_id,
-            product_name=row.name,
-            total_quantity=int(row.total_quantity),
-            total_revenue=float(row.total_revenue),
-            total_sales=int(row.total_sales)
-        )
-        for row in top_sellers_query
+        BestSeller(**row)
+        for row in get_top_sellers(db, owner_id=current_user.id, start_date=start_date, limit=limit)
     ]
 
 @router.get("/inventory-risks", response_model=List[InventoryRisk])
@@ -150,19 +84,25 @@ async def get_inventory_risks(
     current_user: User = Depends(get_current_user)
 ):
     low_stock_products = []
-    for product in db.query(Product).filter(Product.owner_id == current_user.id).all():
-        available_stock = get_available(db, product.id)
-        if available_stock <= product.min_stock_threshold:
-            low_stock_products.append((product, available_stock))
+    products = db.query(Product).filter(
+        Product.owner_id == current_user.id,
+        Product.is_low_stock.is_(True),
+    ).all()
+    positions = get_stock_positions(db, [product.id for product in products])
+    for product in products:
+        low_stock_products.append((product, positions[product.id]["available"]))
+
+    # Days of stock are based on recent sales velocity
+    units_sold = get_units_sold_by_product(
+        db,
+        [product.id for product in products],
+        owner_id=current_user.id,
+        start_date=datetime.utcnow().date() - timedelta(days=30),
+    )
 
     risks = []
     for product, available_stock in low_stock_products:
-        # Calculate days of stock based on recent sales velocity
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_sales = db.query(func.sum(Sale.quantity)).filter(
-            Sale.product_id == product.id,
-            Sale.sale_date >= thirty_days_ago
-        ).scalar() or 0
+        recent_sales = units_sold.get(product.id, 0)
         
         daily_velocity = recent_sales / 30.0 if recent_sales > 0 else 0
         days_of_stock = (available_stock / daily_velocity) if daily_velocity > 0 else None
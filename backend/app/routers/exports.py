@@ -0,0 +1,28 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.auth import get_current_user
+from app.database import get_db
+from app.models import User
+from app.services.columnar_export_service import EXPORT_FORMATS, export_dataset, resolve_export_format
+
+router = APIRouter()
+
+
+@router.get("/{dataset}")
+async def get_columnar_export(
+    dataset: str,
+    format: Optional[str] = Query(None, description="parquet, arrow or ndjson; defaults to parquet when pyarrow is installed."),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    export_format = resolve_export_format(format)
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        export_dataset(db, dataset, owner_id=current_user.id, export_format=export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="intelliflow-{dataset}.{extension}"'},
+    )
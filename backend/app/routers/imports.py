@@ -0,0 +1,73 @@
+from typing import List
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Query, UploadFile, status
+from sqlalchemy.orm import Session
+
+from app.auth import get_current_user
+from app.database import get_db
+from app.jobs.import_job_resume import process_import_job
+from app.models import User
+from app.schemas import ImportJobErrorRead, ImportJobRead
+from app.services.import_job_service import (
+    create_import_job,
+    get_import_job,
+    list_import_job_errors,
+    list_import_jobs,
+    retry_import_job,
+)
+
+router = APIRouter()
+
+
+@router.post("/{entity}", response_model=ImportJobRead, status_code=status.HTTP_202_ACCEPTED)
+def post_import_job(
+    entity: str,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = create_import_job(db, owner_id=current_user.id, entity=entity, upload=file.file, filename=file.filename)
+    background_tasks.add_task(process_import_job, job.id)
+    return job
+
+
+@router.get("", response_model=List[ImportJobRead])
+async def get_import_jobs(
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return list_import_jobs(db, owner_id=current_user.id, limit=limit)
+
+
+@router.get("/{job_id}", response_model=ImportJobRead)
+async def get_import_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return get_import_job(db, job_id, owner_id=current_user.id)
+
+
+@router.get("/{job_id}/errors", response_model=List[ImportJobErrorRead])
+async def get_import_job_errors(
+    job_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return list_import_job_errors(db, job_id, owner_id=current_user.id, offset=offset, limit=limit)
+
+
+@router.post("/{job_id}/retry", response_model=ImportJobRead, status_code=status.HTTP_202_ACCEPTED)
+async def post_import_job_retry(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = retry_import_job(db, job_id, owner_id=current_user.id)
+    background_tasks.add_task(process_import_job, job.id)
+    return job
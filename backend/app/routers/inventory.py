@@ -1,6 +1,8 @@
+from datetime import datetime, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
@@ -10,9 +12,12 @@ from app.models import InventoryTransaction, Product, StockReservation, User, Wa
 from app.schemas import (
     CsvImportRequest,
     CsvImportResult,
+    DailyClosingStockRead,
     InventoryTransactionRead,
+    RebalancingPlanRead,
     ReceivePurchaseRequest,
     StockAdjustmentRequest,
+    StockPositionAsOfRead,
     StockPositionRead,
     StockReservationRead,
     StockReservationRequest,
@@ -26,14 +31,17 @@ from app.services.csv_service import export_warehouses_csv, import_warehouses_cs
 from app.services.stock_ledger_service import (
     adjust_stock,
     consume_reservation,
+    get_daily_closing_stock,
     get_default_warehouse,
     get_stock_position,
+    get_stock_position_as_of,
     receive_purchase,
     release_reservation,
     reserve_stock,
     transfer_stock,
 )
 from app.services.notification_service import create_notification
+from app.services.rebalancing_service import build_rebalancing_plan
 from app.services.tenant_service import get_owned_product, get_owned_warehouse
 
 router = APIRouter()
@@ -52,6 +60,35 @@ async def get_inventory_stock(
     return get_stock_position(db, product_id, warehouse_id)
 
 
+@router.get("/inventory/stock/{product_id}/as-of", response_model=StockPositionAsOfRead)
+async def get_inventory_stock_as_of(
+    product_id: int,
+    at: datetime,
+    warehouse_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    get_owned_product(db, owner_id=current_user.id, product_id=product_id)
+    if warehouse_id is not None:
+        get_owned_warehouse(db, owner_id=current_user.id, warehouse_id=warehouse_id)
+    return get_stock_position_as_of(db, product_id, warehouse_id, at)
+
+
+@router.get("/inventory/stock/{product_id}/daily-closing", response_model=List[DailyClosingStockRead])
+async def get_inventory_daily_closing(
+    product_id: int,
+    warehouse_id: Optional[int] = None,
+    days: int = Query(default=30, ge=1, le=366),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    get_owned_product(db, owner_id=current_user.id, product_id=product_id)
+    if warehouse_id is not None:
+        get_owned_warehouse(db, owner_id=current_user.id, warehouse_id=warehouse_id)
+    end_date = datetime.utcnow().date()
+    return get_daily_closing_stock(db, product_id, warehouse_id, end_date - timedelta(days=days - 1), end_date)
+
+
 @router.get("/inventory/transactions", response_model=List[InventoryTransactionRead])
 async def get_inventory_transactions(
     product_id: Optional[int] = None,
@@ -249,6 +286,25 @@ async def transfer_inventory_stock(
     return transfer
 
 
+@router.get("/inventory/rebalancing-plan", response_model=RebalancingPlanRead)
+async def get_inventory_rebalancing_plan(
+    target_cover_days: int = Query(default=14, ge=1, le=365),
+    lookback_days: int = Query(default=30, ge=1, le=365),
+    limit: Optional[int] = Query(default=None, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    plan_user: User = Depends(require_plan("BOOST")),
+    current_user: User = Depends(get_current_user),
+):
+    _ = plan_user
+    return build_rebalancing_plan(
+        db,
+        owner_id=current_user.id,
+        target_cover_days=target_cover_days,
+        lookback_days=lookback_days,
+        limit=limit,
+    )
+
+
 @router.get("/warehouses", response_model=List[WarehouseRead])
 async def get_warehouses(
     db: Session = Depends(get_db),
@@ -263,9 +319,8 @@ async def get_warehouses_csv(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    csv_content = export_warehouses_csv(db, user=current_user)
-    return Response(
-        content=csv_content,
+    return StreamingResponse(
+        export_warehouses_csv(db, user=current_user),
         media_type="text/csv",
         headers={"Content-Disposition": 'attachment; filename="intelliflow-warehouses.csv"'},
     )
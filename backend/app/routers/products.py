@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import logging
 from app.database import get_db
 from app.models import Product, User
@@ -11,16 +12,18 @@ from app.services.stock_ledger_service import (
     adjust_stock,
     get_default_warehouse,
     get_stock_position,
+    get_stock_positions,
+    refresh_low_stock_flags,
     seed_product_stock_from_legacy_current_stock,
-    sync_product_current_stock,
 )
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-def _serialize_product(db: Session, product: Product) -> dict:
-    position = get_stock_position(db, product.id)
+def _serialize_product(db: Session, product: Product, position: Optional[dict] = None) -> dict:
+    if position is None:
+        position = get_stock_position(db, product.id)
     return {
         "id": product.id,
         "name": product.name,
@@ -44,9 +47,8 @@ async def get_products_csv(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    csv_content = export_products_csv(db, user=current_user)
-    return Response(
-        content=csv_content,
+    return StreamingResponse(
+        export_products_csv(db, user=current_user),
         media_type="text/csv",
         headers={"Content-Disposition": 'attachment; filename="intelliflow-products.csv"'},
     )
@@ -120,9 +122,8 @@ async def get_products(
     products = db.query(Product).filter(
         Product.owner_id == current_user.id
     ).offset(skip).limit(limit).all()
-    for product in products:
-        sync_product_current_stock(db, product.id)
-    return [_serialize_product(db, product) for product in products]
+    positions = get_stock_positions(db, [product.id for product in products])
+    return [_serialize_product(db, product, positions[product.id]) for product in products]
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
@@ -139,7 +140,6 @@ async def get_product(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
-    sync_product_current_stock(db, product.id)
     return _serialize_product(db, product)
 
 @router.put("/{product_id}", response_model=ProductResponse)
@@ -163,13 +163,15 @@ async def update_product(
     requested_current_stock = update_data.pop("current_stock", None)
     for field, value in update_data.items():
         setattr(product, field, value)
+    if "min_stock_threshold" in update_data:
+        db.flush()
+        refresh_low_stock_flags(db, [product.id])
 
     db.commit()
     db.refresh(product)
 
     if requested_current_stock is not None:
-        sync_product_current_stock(db, product.id, commit=True)
-        current_available = product.current_stock
+        current_available = get_stock_position(db, product.id)["available"]
         delta = requested_current_stock - current_available
         if delta != 0:
             default_warehouse = get_default_warehouse(db, owner_id=current_user.id)
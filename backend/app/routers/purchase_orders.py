@@ -1,6 +1,7 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Response, status
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
@@ -27,9 +28,8 @@ async def get_purchase_orders_csv(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    csv_content = export_purchase_orders_csv(db, user=current_user)
-    return Response(
-        content=csv_content,
+    return StreamingResponse(
+        export_purchase_orders_csv(db, user=current_user),
         media_type="text/csv",
         headers={"Content-Disposition": 'attachment; filename="intelliflow-purchase-orders.csv"'},
     )
@@ -1,19 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime, timedelta
 from app.database import get_db
 from app.models import Sale, Product, User, InventoryHistory
-from app.schemas import SaleCreate, SaleResponse
+from app.schemas import CsvImportRequest, CsvImportResult, SaleCreate, SaleResponse
 from app.auth import get_current_user
-from app.services.csv_service import export_sales_csv
+from app.services.csv_service import export_sales_csv, import_sales_csv
 from app.services.stock_ledger_service import (
     create_inventory_transaction,
     get_default_warehouse,
     get_stock_position,
-    sync_product_current_stock,
 )
 from app.services.notification_service import create_notification
+from app.services.product_cube_service import record_sales_in_cube
+from app.services.sales_rollup_service import record_sales_in_rollup
 
 router = APIRouter()
 
@@ -23,13 +25,21 @@ async def get_sales_csv(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    csv_content = export_sales_csv(db, user=current_user)
-    return Response(
-        content=csv_content,
+    return StreamingResponse(
+        export_sales_csv(db, user=current_user),
         media_type="text/csv",
         headers={"Content-Disposition": 'attachment; filename="intelliflow-sales.csv"'},
     )
 
+
+@router.post("/import/csv", response_model=CsvImportResult)
+async def post_sales_csv_import(
+    payload: CsvImportRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return import_sales_csv(db, user=current_user, csv_text=payload.csv_text)
+
 @router.post("/", response_model=SaleResponse, status_code=status.HTTP_201_CREATED)
 async def create_sale(
     sale: SaleCreate,
@@ -69,6 +79,8 @@ async def create_sale(
     try:
         db.add(db_sale)
         db.flush()
+        record_sales_in_rollup(db, [db_sale])
+        record_sales_in_cube(db, [db_sale])
 
         create_inventory_transaction(
             db,
@@ -84,7 +96,6 @@ async def create_sale(
             commit=False,
         )
 
-        sync_product_current_stock(db, product.id)
         inventory_history = InventoryHistory(
             product_id=product.id,
             quantity_change=-sale.quantity,
@@ -7,13 +7,14 @@ from app.auth import get_current_user
 from app.core.plan import require_plan
 from app.database import get_db
 from app.models import User
-from app.schemas import FulfillSalesOrderItemRequest, SalesOrderCreate, SalesOrderRead
+from app.schemas import FulfillSalesOrderItemRequest, SalesOrderAtpRead, SalesOrderCreate, SalesOrderRead
 from app.services.sales_service import (
     cancel_sales_order,
     confirm_sales_order,
     create_sales_order,
     fulfill_sales_order_item,
     get_sales_order,
+    get_sales_order_atp,
     list_sales_orders,
 )
 from app.services.notification_service import create_notification
@@ -68,6 +69,15 @@ async def fetch_sales_order(
     return get_sales_order(db, sales_order_id, owner_id=current_user.id)
 
 
+@router.get("/{sales_order_id}/atp", response_model=SalesOrderAtpRead)
+async def fetch_sales_order_atp(
+    sales_order_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    return get_sales_order_atp(db, sales_order_id, owner_id=current_user.id)
+
+
 @router.post("/{sales_order_id}/confirm", response_model=SalesOrderRead)
 async def confirm_order(
     sales_order_id: int,
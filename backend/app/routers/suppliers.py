@@ -1,6 +1,7 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
@@ -26,9 +27,8 @@ async def get_suppliers_csv(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    csv_content = export_suppliers_csv(db, user=current_user)
-    return Response(
-        content=csv_content,
+    return StreamingResponse(
+        export_suppliers_csv(db, user=current_user),
         media_type="text/csv",
         headers={"Content-Disposition": 'attachment; filename="intelliflow-suppliers.csv"'},
     )
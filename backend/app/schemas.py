@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
 
 # Auth schemas
@@ -283,6 +283,33 @@ class CsvImportResult(BaseModel):
     warnings: List[str] = []
 
 
+class ImportJobRead(BaseModel):
+    id: int
+    entity: str
+    status: str
+    original_filename: Optional[str]
+    total_rows: Optional[int]
+    processed_rows: int
+    created_count: int
+    updated_count: int
+    error_count: int
+    warning_count: int
+    failure_reason: Optional[str]
+    first_sale_date: Optional[date]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    completed_at: Optional[datetime]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ImportJobErrorRead(BaseModel):
+    row_number: int
+    message: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class UserDeviceRead(BaseModel):
     id: int
     platform: str
@@ -399,6 +426,53 @@ class StockPositionRead(BaseModel):
     quarantined: int
 
 
+class StockPositionAsOfRead(BaseModel):
+    product_id: int
+    warehouse_id: Optional[int]
+    as_of: datetime
+    on_hand: int
+    damaged: int
+    quarantined: int
+    checkpoint_date: Optional[date] = None
+
+
+class DailyClosingStockRead(BaseModel):
+    date: date
+    product_id: int
+    warehouse_id: Optional[int]
+    on_hand: int
+    damaged: int
+    quarantined: int
+
+
+class RebalancingTransferRead(BaseModel):
+    rank: int
+    product_id: int
+    sku: str
+    product_name: str
+    from_warehouse_id: int
+    from_warehouse_name: str
+    to_warehouse_id: int
+    to_warehouse_name: str
+    quantity: int
+    target_available_before: int
+    target_stock: int
+    target_days_of_cover: Optional[float]
+    target_daily_demand: float
+
+
+class RebalancingPlanRead(BaseModel):
+    owner_id: int
+    target_cover_days: int
+    lookback_days: int
+    products_considered: int
+    warehouses_considered: int
+    total_deficit: int
+    total_transfer_quantity: int
+    unmet_deficit: int
+    transfers: List[RebalancingTransferRead]
+
+
 class ReceivePurchaseRequest(BaseModel):
     product_id: int
     warehouse_id: int
@@ -531,6 +605,26 @@ class SalesOrderRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class SalesOrderAtpLineRead(BaseModel):
+    item_id: int
+    product_id: int
+    warehouse_id: Optional[int]
+    quantity: int
+    available_now: int
+    cumulative_demand: int
+    promise_date: Optional[date]
+    can_fulfill_now: bool
+    undated_inbound: int
+
+
+class SalesOrderAtpRead(BaseModel):
+    sales_order_id: int
+    as_of: date
+    promise_date: Optional[date]
+    can_fulfill_now: bool
+    lines: List[SalesOrderAtpLineRead]
+
+
 class FulfillSalesOrderItemRequest(BaseModel):
     quantity: int = Field(gt=0)
 
@@ -650,6 +744,13 @@ class ReorderSuggestionRead(BaseModel):
     suggested_reorder_quantity: int
     supplier_name: Optional[str]
     supplier_lead_time_days: Optional[int]
+    forecast_daily_demand: Optional[float] = None
+    days_of_cover: Optional[float] = None
+    safety_stock: Optional[float] = None
+    reorder_level: Optional[float] = None
+    economic_order_quantity: Optional[int] = None
+    observed_lead_time_days: Optional[float] = None
+    observed_lead_time_p90_days: Optional[float] = None
 
 
 class WarehouseLocationCreate(BaseModel):
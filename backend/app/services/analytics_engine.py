@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import threading
+import time as time_module
+import weakref
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models import InventoryTransaction, Product, Sale
+
+FRAME_MAX_AGE_SECONDS = 15 * 60
+# Rows stamped this close to the newest one already loaded are read again on every append, so a
+# transaction that commits after a higher id was loaded is still picked up. Held ids are skipped.
+FRAME_APPEND_OVERLAP = timedelta(minutes=10)
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def _empty_int() -> np.ndarray:
+    return np.zeros(0, dtype=np.int64)
+
+
+def _empty_float() -> np.ndarray:
+    return np.zeros(0, dtype=np.float64)
+
+
+@dataclass
+class TenantAnalyticsFrame:
+    """Column arrays for one tenant's sales and outbound ledger rows.
+
+    Row arrays hold an index into `product_ids` rather than the product id itself, and
+    timestamps are UTC epoch seconds, so every aggregate is a mask plus a bincount.
+    """
+
+    owner_id: int
+    product_ids: np.ndarray = field(default_factory=_empty_int)
+    skus: list = field(default_factory=list)
+    names: list = field(default_factory=list)
+    costs: np.ndarray = field(default_factory=_empty_float)
+    sale_product: np.ndarray = field(default_factory=_empty_int)
+    sale_ts: np.ndarray = field(default_factory=_empty_int)
+    sale_qty: np.ndarray = field(default_factory=_empty_int)
+    sale_amount: np.ndarray = field(default_factory=_empty_float)
+    sale_unit_price: np.ndarray = field(default_factory=_empty_float)
+    sale_id: np.ndarray = field(default_factory=_empty_int)
+    shipment_product: np.ndarray = field(default_factory=_empty_int)
+    shipment_warehouse: np.ndarray = field(default_factory=_empty_int)
+    shipment_ts: np.ndarray = field(default_factory=_empty_int)
+    shipment_qty: np.ndarray = field(default_factory=_empty_int)
+    shipment_id: np.ndarray = field(default_factory=_empty_int)
+    last_sale_id: int = 0
+    last_shipment_id: int = 0
+    last_sale_at: Optional[datetime] = None
+    last_shipment_at: Optional[datetime] = None
+    built_at: float = 0.0
+
+    @property
+    def product_count(self) -> int:
+        return len(self.product_ids)
+
+    def index_of(self, product_id: int) -> Optional[int]:
+        position = int(np.searchsorted(self.product_ids, product_id))
+        if position < len(self.product_ids) and self.product_ids[position] == product_id:
+            return position
+        return None
+
+
+_frames: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_frames_lock = threading.Lock()
+
+
+def epoch_seconds(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return int((value - datetime(1970, 1, 1)).total_seconds())
+
+
+def _epoch_day(value: date) -> int:
+    return (value - date(1970, 1, 1)).days
+
+
+def _columns(rows: list, count: int) -> list[list]:
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in range(count)]
+
+
+def _load_products(db: Session, owner_id: int) -> list:
+    return (
+        db.query(Product.id, Product.sku, Product.name, Product.cost)
+        .filter(Product.owner_id == owner_id)
+        .order_by(Product.id.asc())
+        .all()
+    )
+
+
+def _newer_than(id_column, stamp_column, last_id: int, last_at: Optional[datetime]):
+    condition = id_column > last_id
+    if last_at is not None:
+        condition = or_(condition, stamp_column >= last_at - FRAME_APPEND_OVERLAP)
+    return condition
+
+
+def _unseen(ids: np.ndarray, held: np.ndarray, last_id: int) -> np.ndarray:
+    fresh = ids > last_id
+    overlap = ~fresh
+    if overlap.any():
+        fresh[overlap] = ~np.isin(ids[overlap], held)
+    return fresh
+
+
+def _latest(last_at: Optional[datetime], stamps: list) -> Optional[datetime]:
+    return max([value for value in (last_at, *stamps) if value is not None], default=None)
+
+
+def _append_rows(frame: TenantAnalyticsFrame, db: Session) -> None:
+    owner_id = frame.owner_id
+    sales = (
+        db.query(Sale.id, Sale.product_id, Sale.sale_date, Sale.quantity, Sale.total_amount, Sale.unit_price, Sale.created_at)
+        .filter(
+            Sale.owner_id == owner_id,
+            _newer_than(Sale.id, Sale.created_at, frame.last_sale_id, frame.last_sale_at),
+        )
+        .all()
+    )
+    shipments = (
+        db.query(
+            InventoryTransaction.id,
+            InventoryTransaction.product_id,
+            InventoryTransaction.created_at,
+            InventoryTransaction.quantity,
+            InventoryTransaction.warehouse_id,
+        )
+        .join(Product, Product.id == InventoryTransaction.product_id)
+        .filter(
+            Product.owner_id == owner_id,
+            InventoryTransaction.transaction_type == "SALE_SHIPPED",
+            _newer_than(InventoryTransaction.id, InventoryTransaction.created_at, frame.last_shipment_id, frame.last_shipment_at),
+        )
+        .all()
+    )
+
+    def _indexed(product_ids: list) -> tuple[np.ndarray, np.ndarray]:
+        ids = np.asarray(product_ids, dtype=np.int64)
+        positions = np.searchsorted(frame.product_ids, ids)
+        known = positions < frame.product_count
+        known[known] = frame.product_ids[positions[known]] == ids[known]
+        return positions, known
+
+    ids, products, dates, quantities, amounts, prices, stamps = _columns(sales, 7)
+    ids = np.asarray(ids, dtype=np.int64)
+    positions, known = _indexed(products)
+    keep = known & _unseen(ids, frame.sale_id, frame.last_sale_id)
+    frame.sale_product = np.concatenate([frame.sale_product, positions[keep]])
+    frame.sale_ts = np.concatenate([frame.sale_ts, np.asarray([epoch_seconds(value) for value in dates], dtype=np.int64)[keep]])
+    frame.sale_qty = np.concatenate([frame.sale_qty, np.asarray(quantities, dtype=np.int64)[keep]])
+    frame.sale_amount = np.concatenate([frame.sale_amount, np.asarray(amounts, dtype=np.float64)[keep]])
+    frame.sale_unit_price = np.concatenate([frame.sale_unit_price, np.asarray(prices, dtype=np.float64)[keep]])
+    frame.sale_id = np.concatenate([frame.sale_id, ids[keep]])
+    frame.last_sale_id = max([frame.last_sale_id, *ids.tolist()])
+    frame.last_sale_at = _latest(frame.last_sale_at, stamps)
+
+    ids, products, dates, quantities, warehouses = _columns(shipments, 5)
+    ids = np.asarray(ids, dtype=np.int64)
+    positions, known = _indexed(products)
+    keep = known & _unseen(ids, frame.shipment_id, frame.last_shipment_id)
+    frame.shipment_product = np.concatenate([frame.shipment_product, positions[keep]])
+    frame.shipment_ts = np.concatenate(
+        [frame.shipment_ts, np.asarray([epoch_seconds(value) for value in dates], dtype=np.int64)[keep]]
+    )
+    frame.shipment_qty = np.concatenate([frame.shipment_qty, np.asarray(quantities, dtype=np.int64)[keep]])
+    frame.shipment_warehouse = np.concatenate([frame.shipment_warehouse, np.asarray(warehouses, dtype=np.int64)[keep]])
+    frame.shipment_id = np.concatenate([frame.shipment_id, ids[keep]])
+    frame.last_shipment_id = max([frame.last_shipment_id, *ids.tolist()])
+    frame.last_shipment_at = _latest(frame.last_shipment_at, dates)
+
+
+def get_tenant_frame(db: Session, owner_id: int) -> TenantAnalyticsFrame:
+    """Return the cached frame for a tenant, appending rows written since the last call.
+
+    Frames are rebuilt from scratch when they age out or a product disappears from the catalog.
+    """
+    engine = db.get_bind()
+    with _frames_lock:
+        frames = _frames.setdefault(engine, {})
+        frame = frames.get(owner_id)
+
+    products = _load_products(db, owner_id)
+    product_ids = np.asarray([product.id for product in products], dtype=np.int64)
+    stale = (
+        frame is None
+        or time_module.monotonic() - frame.built_at > FRAME_MAX_AGE_SECONDS
+        or not np.array_equal(product_ids[: frame.product_count], frame.product_ids)
+    )
+    # Refreshes work on a copy, so concurrent readers keep a consistent frame and the last refresh wins.
+    frame = TenantAnalyticsFrame(owner_id=owner_id, built_at=time_module.monotonic()) if stale else replace(frame)
+    frame.product_ids = product_ids
+    frame.skus = [product.sku for product in products]
+    frame.names = [product.name for product in products]
+    frame.costs = np.asarray([product.cost or 0.0 for product in products], dtype=np.float64)
+    _append_rows(frame, db)
+
+    with _frames_lock:
+        frames[owner_id] = frame
+    return frame
+
+
+def invalidate_tenant_frame(db: Session, owner_id: Optional[int] = None) -> None:
+    with _frames_lock:
+        frames = _frames.get(db.get_bind())
+        if frames is None:
+            return
+        if owner_id is None:
+            frames.clear()
+        else:
+            frames.pop(owner_id, None)
+
+
+def _window(timestamps: np.ndarray, start: datetime, end: datetime, *, include_end: bool = True) -> np.ndarray:
+    start_ts, end_ts = epoch_seconds(start), epoch_seconds(end)
+    return (timestamps >= start_ts) & ((timestamps <= end_ts) if include_end else (timestamps < end_ts))
+
+
+def _per_product(frame: TenantAnalyticsFrame, products: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    return np.bincount(products, weights=weights, minlength=frame.product_count)
+
+
+def sales_window_totals(frame: TenantAnalyticsFrame, start: datetime, end: datetime) -> dict[str, np.ndarray]:
+    """Per-product units, revenue, gross margin and sale count for sales in [start, end]."""
+    mask = _window(frame.sale_ts, start, end)
+    products = frame.sale_product[mask]
+    quantities = frame.sale_qty[mask]
+    margin = (frame.sale_unit_price[mask] - frame.costs[products]) * quantities
+    return {
+        "units": _per_product(frame, products, quantities).astype(np.int64),
+        "revenue": _per_product(frame, products, frame.sale_amount[mask]),
+        "cost_of_goods": _per_product(frame, products, frame.costs[products] * quantities),
+        "gross_margin": _per_product(frame, products, margin),
+        "orders": _per_product(frame, products).astype(np.int64),
+    }
+
+
+def growth(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """Relative change per product, NaN where the previous value is zero."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(previous != 0, (current - previous) / np.where(previous != 0, previous, 1), np.nan)
+
+
+def sales_velocity(frame: TenantAnalyticsFrame, days: int, *, end: Optional[datetime] = None) -> dict[str, np.ndarray]:
+    """Units per day over the last `days` and the `days` before that, for every product."""
+    end = end or datetime.utcnow()
+    start = end - timedelta(days=days)
+    current = sales_window_totals(frame, start, end)["units"]
+    previous = sales_window_totals(frame, start - timedelta(days=days), start)["units"]
+    current_velocity = current / days
+    previous_velocity = previous / days
+    return {
+        "current_units": current,
+        "previous_units": previous,
+        "current_velocity": current_velocity,
+        "previous_velocity": previous_velocity,
+        "velocity_change": growth(current_velocity, previous_velocity),
+    }
+
+
+def daily_units(frame: TenantAnalyticsFrame, start_date: date, end_date: date) -> np.ndarray:
+    """Units sold per product per day: shape (products, days) covering start_date..end_date."""
+    days = (end_date - start_date).days + 1
+    matrix = np.zeros((frame.product_count, max(days, 0)), dtype=np.float64)
+    if days <= 0 or not frame.product_count:
+        return matrix
+    day_index = frame.sale_ts // SECONDS_PER_DAY - _epoch_day(start_date)
+    mask = (day_index >= 0) & (day_index < days)
+    flat = frame.sale_product[mask] * days + day_index[mask]
+    matrix += np.bincount(flat, weights=frame.sale_qty[mask], minlength=frame.product_count * days).reshape(frame.product_count, days)
+    return matrix
+
+
+def zscores(series: np.ndarray, window: int, *, recent: int = 1, robust: bool = False) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Score each row's mean over its last `recent` values against the `window` values before them.
+
+    Returns (scores, centers, spreads). The robust variant uses the median and the scaled median
+    absolute deviation, floored for intermittent rows whose MAD is 0 by the standard deviation or
+    the Poisson spread sqrt(mean), whichever is larger. Rows with no spread at all score 0 when the
+    recent mean matches the baseline and +/-inf when it does not.
+    """
+    history = series[:, -(window + recent) : -recent]
+    current = series[:, -recent:].mean(axis=1)
+    if robust:
+        centers = np.median(history, axis=1)
+        spreads = 1.4826 * np.median(np.abs(history - centers[:, None]), axis=1)
+        # A SKU that sells on fewer than half its days has a median and MAD of 0.
+        floors = np.maximum(history.std(axis=1), np.sqrt(history.mean(axis=1)))
+        spreads = np.where(spreads > 0, spreads, floors)
+    else:
+        centers = history.mean(axis=1)
+        spreads = history.std(axis=1)
+    deviation = current - centers
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(spreads > 0, deviation / np.where(spreads > 0, spreads, 1), np.sign(deviation) * np.inf)
+    scores = np.where((spreads == 0) & (deviation == 0), 0.0, scores)
+    return scores, centers, spreads
+
+
+def shipped_units_by_warehouse(frame: TenantAnalyticsFrame, start: datetime, end: datetime) -> dict[tuple[int, int], int]:
+    """SALE_SHIPPED units per (product_id, warehouse_id) in [start, end]."""
+    mask = _window(frame.shipment_ts, start, end)
+    if not mask.any():
+        return {}
+    keys = np.stack([frame.shipment_product[mask], frame.shipment_warehouse[mask]], axis=1)
+    unique_keys, bucket = np.unique(keys, axis=0, return_inverse=True)
+    totals = np.bincount(bucket.ravel(), weights=frame.shipment_qty[mask], minlength=len(unique_keys))
+    return {
+        (int(frame.product_ids[product]), int(warehouse)): int(total)
+        for (product, warehouse), total in zip(unique_keys, totals)
+    }
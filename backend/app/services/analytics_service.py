@@ -1,19 +1,19 @@
 from __future__ import annotations
 
-from collections import defaultdict
 from datetime import datetime, timedelta
 from math import fabs
-from typing import Optional
+from typing import Iterable, Optional
 
-from sqlalchemy import desc, func
+import numpy as np
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 
 from app.models import Product, ReturnOrder, ReturnOrderItem, Sale
-from app.services import returns_service, sales_service
-from app.services.stock_ledger_service import get_available
+from app.services import analytics_engine, product_cube_service, returns_service, sales_rollup_service, sales_service, timeseries_service
+from app.services.stock_ledger_service import get_stock_positions
 
 
-def _parse_channel_from_sale(sale: Sale) -> tuple[str, list[str]]:
+def _parse_channel_from_sale(sale: Optional[Sale]) -> tuple[str, list[str]]:
     # Channel is not modeled yet, so analytics expose the limitation explicitly.
     return "UNSPECIFIED", ["channel_not_modeled"]
 
@@ -24,30 +24,25 @@ def _safe_growth(current_value: float, previous_value: float) -> Optional[float]
     return (current_value - previous_value) / previous_value
 
 
-def _product_return_metrics(
+def _returned_units_by_product(
     db: Session,
+    product_ids: Iterable[int],
     *,
-    product_id: int,
     start_date: datetime,
     end_date: datetime,
-    units_sold: int,
-) -> dict:
-    returned_quantity = (
-        db.query(func.coalesce(func.sum(ReturnOrderItem.quantity), 0))
+) -> dict[int, int]:
+    rows = (
+        db.query(ReturnOrderItem.product_id, func.coalesce(func.sum(ReturnOrderItem.quantity), 0).label("quantity"))
         .join(ReturnOrder, ReturnOrder.id == ReturnOrderItem.return_order_id)
         .filter(
-            ReturnOrderItem.product_id == product_id,
+            ReturnOrderItem.product_id.in_(product_ids),
             ReturnOrder.return_date >= start_date,
             ReturnOrder.return_date <= end_date,
         )
-        .scalar()
-        or 0
+        .group_by(ReturnOrderItem.product_id)
+        .all()
     )
-    return_rate = None if units_sold <= 0 else float(returned_quantity) / float(units_sold)
-    return {
-        "returned_units": int(returned_quantity),
-        "return_rate": return_rate,
-    }
+    return {row.product_id: int(row.quantity) for row in rows}
 
 
 def _product_discount_metrics() -> dict:
@@ -59,9 +54,10 @@ def _product_discount_metrics() -> dict:
 
 def get_inventory_risk_snapshot(*, db: Session, owner_id: int) -> list[dict]:
     products = db.query(Product).filter(Product.owner_id == owner_id).all()
+    positions = get_stock_positions(db, [product.id for product in products])
     snapshot: list[dict] = []
     for product in products:
-        available = get_available(db, product.id)
+        available = positions[product.id]["available"]
         snapshot.append(
             {
                 "product_id": product.id,
@@ -75,32 +71,8 @@ def get_inventory_risk_snapshot(*, db: Session, owner_id: int) -> list[dict]:
 
 
 def get_sales_summary(*, db: Session, owner_id: int, days: int = 30, limit: int = 10) -> list[dict]:
-    start_date = datetime.utcnow() - timedelta(days=days)
-    rows = (
-        db.query(
-            Sale.product_id,
-            Product.name,
-            func.sum(Sale.quantity).label("total_quantity"),
-            func.sum(Sale.total_amount).label("total_revenue"),
-            func.count(Sale.id).label("total_sales"),
-        )
-        .join(Product)
-        .filter(Sale.sale_date >= start_date, Sale.owner_id == owner_id)
-        .group_by(Sale.product_id, Product.name)
-        .order_by(desc("total_revenue"))
-        .limit(limit)
-        .all()
-    )
-    return [
-        {
-            "product_id": row.product_id,
-            "product_name": row.name,
-            "total_quantity": int(row.total_quantity or 0),
-            "total_revenue": float(row.total_revenue or 0),
-            "total_sales": int(row.total_sales or 0),
-        }
-        for row in rows
-    ]
+    start_date = datetime.utcnow().date() - timedelta(days=days)
+    return sales_rollup_service.get_top_sellers(db, owner_id=owner_id, start_date=start_date, limit=limit)
 
 
 def calculate_sales_velocity(
@@ -112,27 +84,22 @@ def calculate_sales_velocity(
 ) -> dict:
     if days <= 0:
         raise ValueError("days must be greater than zero")
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=days)
-    previous_start = start_date - timedelta(days=days)
-
-    product = db.query(Product).filter(Product.id == product_id, Product.owner_id == owner_id).first()
-    if product is None:
+    frame = analytics_engine.get_tenant_frame(db, owner_id)
+    index = frame.index_of(product_id)
+    if index is None:
         raise ValueError("product not found")
 
-    current_sales = sales_service.list_sales(db, owner_id=owner_id, product_id=product_id, start_date=start_date, end_date=end_date)
-    previous_sales = sales_service.list_sales(db, owner_id=owner_id, product_id=product_id, start_date=previous_start, end_date=start_date)
-
-    current_units = sum(sale.quantity for sale in current_sales)
-    previous_units = sum(sale.quantity for sale in previous_sales)
+    velocity = analytics_engine.sales_velocity(frame, days)
+    current_units = int(velocity["current_units"][index])
+    previous_units = int(velocity["previous_units"][index])
     current_velocity = current_units / days
     previous_velocity = previous_units / days
     velocity_change = _safe_growth(current_velocity, previous_velocity)
 
     return {
-        "product_id": product.id,
-        "sku": product.sku,
-        "product_name": product.name,
+        "product_id": product_id,
+        "sku": frame.skus[index],
+        "product_name": frame.names[index],
         "lookback_days": days,
         "units_sold_current_period": current_units,
         "units_sold_previous_period": previous_units,
@@ -156,16 +123,16 @@ def calculate_product_margin(
     if product is None:
         raise ValueError("product not found")
 
-    sales = sales_service.list_sales(db, owner_id=owner_id, product_id=product_id, start_date=start, end_date=end)
-    units_sold = sum(sale.quantity for sale in sales)
-    revenue = float(sum(sale.total_amount for sale in sales))
-    cost_of_goods = float(sum((product.cost or 0.0) * sale.quantity for sale in sales))
+    totals = product_cube_service.get_product_window_totals(db, owner_id=owner_id, start=start, end=end, product_ids=[product_id]).get(product_id)
+    units_sold = totals["units_sold"] if totals else 0
+    revenue = totals["revenue"] if totals else 0.0
+    cost_of_goods = totals["cost_of_goods"] if totals else 0.0
     gross_margin_value = revenue - cost_of_goods
     gross_margin_rate = None if revenue == 0 else gross_margin_value / revenue
-    return_adjusted = returns_service.calculate_return_adjusted_margin(db, product_id, start, end)
+    return_adjusted = returns_service.return_adjusted_margin_from_totals(product_id, totals, product_cost_missing=product.cost is None)
 
     result = {
-        "product_id": product.id,
+        "product_id": product_id,
         "sku": product.sku,
         "product_name": product.name,
         "start_date": start.isoformat(),
@@ -191,67 +158,69 @@ def get_best_selling_products(
     days: int = 30,
     limit: int = 10,
 ) -> list[dict]:
+    """Rank the tenant's products by sales with grouped queries over the current and previous window."""
+    if days <= 0:
+        raise ValueError("days must be greater than zero")
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
+    previous_start = start_date - timedelta(days=days)
+    in_current = Sale.sale_date >= start_date
     rows = (
-        db.query(Product)
-        .filter(Product.owner_id == owner_id)
+        db.query(
+            Product.id,
+            Product.sku,
+            Product.name,
+            func.sum(case((in_current, Sale.quantity), else_=0)).label("units_sold"),
+            func.sum(case((in_current, Sale.total_amount), else_=0.0)).label("revenue"),
+            func.sum(case((in_current, (Sale.unit_price - func.coalesce(Product.cost, 0.0)) * Sale.quantity), else_=0.0)).label("gross_margin"),
+            func.sum(case((in_current, 0), else_=Sale.quantity)).label("previous_units"),
+            func.sum(case((in_current, 1), else_=0)).label("current_sales"),
+        )
+        .join(Sale, Sale.product_id == Product.id)
+        .filter(
+            Product.owner_id == owner_id,
+            Sale.owner_id == owner_id,
+            Sale.sale_date >= previous_start,
+            Sale.sale_date <= end_date,
+        )
+        .group_by(Product.id, Product.sku, Product.name)
         .order_by(Product.name.asc())
         .all()
     )
+    rows = [row for row in rows if row.current_sales]
+    product_ids = [row.id for row in rows]
+    positions = get_stock_positions(db, product_ids)
+    returned_units = _returned_units_by_product(db, product_ids, start_date=start_date, end_date=end_date)
+    discount_metrics = _product_discount_metrics()
+    # Channel is not modeled, so every sale of a product falls into one channel bucket.
+    channel, channel_missing = _parse_channel_from_sale(None)
+    missing_data = sorted({*channel_missing, *discount_metrics["missing_data"]})
+
     ranked: list[dict] = []
-    for product in rows:
-        sales = sales_service.list_sales(db, owner_id=owner_id, product_id=product.id, start_date=start_date, end_date=end_date)
-        if not sales:
-            continue
-        units_sold = sum(sale.quantity for sale in sales)
-        revenue = float(sum(sale.total_amount for sale in sales))
-        gross_margin = float(sum((sale.unit_price - (product.cost or 0.0)) * sale.quantity for sale in sales))
-        availability = get_available(db, product.id)
-        returns_data = _product_return_metrics(
-            db,
-            product_id=product.id,
-            start_date=start_date,
-            end_date=end_date,
-            units_sold=units_sold,
-        )
-        velocity_data = calculate_sales_velocity(db=db, owner_id=owner_id, product_id=product.id, days=days)
-
-        channels: dict[str, dict[str, float]] = defaultdict(lambda: {"units_sold": 0, "revenue": 0.0})
-        missing_data: set[str] = set()
-        for sale in sales:
-            channel, channel_missing = _parse_channel_from_sale(sale)
-            missing_data.update(channel_missing)
-            channels[channel]["units_sold"] += sale.quantity
-            channels[channel]["revenue"] += sale.total_amount
-
-        discount_metrics = _product_discount_metrics()
-        missing_data.update(discount_metrics["missing_data"])
+    for row in rows:
+        units_sold = int(row.units_sold)
+        revenue = float(row.revenue or 0.0)
+        gross_margin = float(row.gross_margin or 0.0)
+        returned = returned_units.get(row.id, 0)
+        sales_velocity = units_sold / days
         score = units_sold * 1.0 + gross_margin * 0.1 + revenue * 0.01
         ranked.append(
             {
-                "product_id": product.id,
-                "sku": product.sku,
-                "product_name": product.name,
+                "product_id": row.id,
+                "sku": row.sku,
+                "product_name": row.name,
                 "units_sold": units_sold,
                 "revenue": revenue,
                 "gross_margin": gross_margin,
-                "return_rate": returns_data["return_rate"],
-                "returned_units": returns_data["returned_units"],
-                "stock_availability": availability,
+                "return_rate": None if units_sold <= 0 else float(returned) / float(units_sold),
+                "returned_units": returned,
+                "stock_availability": positions[row.id]["available"],
                 "discount_impact": discount_metrics["discount_impact"],
-                "sales_velocity": velocity_data["sales_velocity"],
-                "sales_velocity_change": velocity_data["sales_velocity_change"],
-                "channel_performance": [
-                    {
-                        "channel": channel,
-                        "units_sold": int(values["units_sold"]),
-                        "revenue": float(values["revenue"]),
-                    }
-                    for channel, values in channels.items()
-                ],
+                "sales_velocity": sales_velocity,
+                "sales_velocity_change": _safe_growth(sales_velocity, int(row.previous_units or 0) / days),
+                "channel_performance": [{"channel": channel, "units_sold": units_sold, "revenue": revenue}],
                 "ranking_score": score,
-                "missing_data": sorted(missing_data),
+                "missing_data": missing_data,
             }
         )
     ranked.sort(key=lambda item: (item["ranking_score"], item["units_sold"], item["revenue"]), reverse=True)
@@ -294,6 +263,68 @@ def detect_sales_anomaly(
     }
 
 
+def detect_catalog_sales_anomalies(
+    *,
+    db: Session,
+    owner_id: int,
+    window_days: int = 28,
+    recent_days: int = 7,
+    threshold: float = 3.0,
+    method: str = "robust",
+    limit: Optional[int] = None,
+) -> dict:
+    """Score every SKU's recent daily demand against its own baseline in one matrix pass.
+
+    The baseline is the `window_days` days before the last `recent_days` days. "rolling" scores
+    with the baseline mean and standard deviation, "robust" with the median and MAD so a single
+    promotion day does not widen the band. Only SKUs scoring at or beyond `threshold` are returned.
+    """
+    if window_days < 2 or recent_days <= 0:
+        raise ValueError("window_days must be at least 2 and recent_days greater than zero")
+    if threshold <= 0:
+        raise ValueError("threshold must be greater than zero")
+    if method not in {"rolling", "robust"}:
+        raise ValueError("method must be 'rolling' or 'robust'")
+
+    # Today is still filling up, so the series ends on the last complete day.
+    end_date = datetime.utcnow().date() - timedelta(days=1)
+    start_date = end_date - timedelta(days=window_days + recent_days - 1)
+    frame = analytics_engine.get_tenant_frame(db, owner_id)
+    daily = analytics_engine.daily_units(frame, start_date, end_date)
+    scores, centers, spreads = analytics_engine.zscores(daily, window_days, recent=recent_days, robust=method == "robust")
+    recent_means = daily[:, -recent_days:].mean(axis=1)
+
+    anomalies = []
+    for index in np.flatnonzero(np.abs(scores) >= threshold):
+        score = float(scores[index])
+        anomalies.append(
+            {
+                "product_id": int(frame.product_ids[index]),
+                "sku": frame.skus[index],
+                "product_name": frame.names[index],
+                "anomaly_type": "SPIKE" if score > 0 else "DROP",
+                # A flat baseline has no spread, so any move away from it has no finite score.
+                "z_score": round(score, 4) if np.isfinite(score) else None,
+                "recent_daily_units": round(float(recent_means[index]), 4),
+                "baseline_daily_units": round(float(centers[index]), 4),
+                "baseline_spread": round(float(spreads[index]), 4),
+            }
+        )
+    anomalies.sort(key=lambda item: (item["z_score"] is not None, -abs(item["z_score"] or 0), item["product_id"]))
+
+    return {
+        "method": method,
+        "window_days": window_days,
+        "recent_days": recent_days,
+        "threshold": threshold,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "products_evaluated": frame.product_count,
+        "anomaly_count": len(anomalies),
+        "anomalies": anomalies[:limit] if limit is not None else anomalies,
+    }
+
+
 def compare_sales_by_channel(
     *,
     db: Session,
@@ -303,31 +334,20 @@ def compare_sales_by_channel(
 ) -> dict:
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
-    sales = sales_service.list_sales(db, owner_id=owner_id, start_date=start_date, end_date=end_date)
-
-    performance: dict[str, dict[str, float | int | list[str]]] = defaultdict(
-        lambda: {
-            "units_sold": 0,
-            "revenue": 0.0,
-            "gross_margin": 0.0,
-            "orders": 0,
-            "missing_data": [],
+    frame = analytics_engine.get_tenant_frame(db, owner_id)
+    totals = analytics_engine.sales_window_totals(frame, start_date, end_date)
+
+    # Channel is not modeled, so the whole window lands in a single channel.
+    channel_name, missing = _parse_channel_from_sale(None)
+    performance: dict[str, dict] = {}
+    if totals["orders"].sum() and (channel is None or channel_name == channel):
+        performance[channel_name] = {
+            "units_sold": totals["units"].sum(),
+            "revenue": totals["revenue"].sum(),
+            "gross_margin": totals["gross_margin"].sum(),
+            "orders": totals["orders"].sum(),
+            "missing_data": sorted({*missing, "discount_not_modeled"}),
         }
-    )
-
-    for sale in sales:
-        product = db.query(Product).filter(Product.id == sale.product_id, Product.owner_id == owner_id).first()
-        channel_name, missing = _parse_channel_from_sale(sale)
-        if channel is not None and channel_name != channel:
-            continue
-        performance[channel_name]["units_sold"] += sale.quantity
-        performance[channel_name]["revenue"] += sale.total_amount
-        performance[channel_name]["gross_margin"] += (sale.unit_price - ((product.cost if product else 0.0) or 0.0)) * sale.quantity
-        performance[channel_name]["orders"] += 1
-        merged_missing = set(performance[channel_name]["missing_data"])
-        merged_missing.update(missing)
-        merged_missing.add("discount_not_modeled")
-        performance[channel_name]["missing_data"] = sorted(merged_missing)
 
     return {
         "start_date": start_date.isoformat(),
@@ -353,34 +373,39 @@ def get_weekly_sales(
     owner_id: int,
     sku: Optional[str] = None,
     weeks: int = 8,
+    offset: int = 0,
 ) -> dict:
     if weeks <= 0:
         raise ValueError("weeks must be greater than zero")
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=weeks * 7)
     product = sales_service.get_product_by_sku(db, sku, owner_id=owner_id) if sku else None
-    sales = sales_service.list_sales(db, owner_id=owner_id, product_id=product.id if product else None, start_date=start_date, end_date=end_date)
-
-    buckets: dict[str, dict[str, float | int]] = defaultdict(lambda: {"units_sold": 0, "revenue": 0.0, "gross_margin": 0.0})
-    for sale in sales:
-        bucket = f"{sale.sale_date.isocalendar().year}-W{sale.sale_date.isocalendar().week:02d}"
-        product_row = product if product is not None else db.query(Product).filter(Product.id == sale.product_id, Product.owner_id == owner_id).first()
-        cost = (product_row.cost if product_row else 0.0) or 0.0
-        buckets[bucket]["units_sold"] += sale.quantity
-        buckets[bucket]["revenue"] += sale.total_amount
-        buckets[bucket]["gross_margin"] += (sale.unit_price - cost) * sale.quantity
+    query = db.query(Sale).join(Product, Product.id == Sale.product_id).filter(Sale.owner_id == owner_id)
+    if product is not None:
+        query = query.filter(Sale.product_id == product.id)
+    series = timeseries_service.weekly_totals(
+        db,
+        query,
+        Sale.sale_date,
+        {
+            "units_sold": Sale.quantity,
+            "revenue": Sale.total_amount,
+            "gross_margin": (Sale.unit_price - func.coalesce(Product.cost, 0.0)) * Sale.quantity,
+        },
+        weeks=weeks,
+        offset=offset,
+    )
 
     return {
         "sku": product.sku if product else None,
         "product_id": product.id if product else None,
+        **series,
         "weeks": [
             {
-                "week": week,
-                "units_sold": int(values["units_sold"]),
-                "revenue": float(values["revenue"]),
-                "gross_margin": float(values["gross_margin"]),
+                **week,
+                "units_sold": int(week["units_sold"]),
+                "revenue": float(week["revenue"]),
+                "gross_margin": float(week["gross_margin"]),
             }
-            for week, values in sorted(buckets.items())
+            for week in series["weeks"]
         ],
         "missing_data": ["channel_not_modeled", "discount_not_modeled"],
     }
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models import Product, PurchaseOrder, PurchaseOrderItem, Shipment, StockTransfer, Warehouse
+from app.services.lead_time_service import get_lead_time_stats
+from app.services.stock_ledger_service import get_stock_positions
+
+ATP_HORIZON_DAYS = 120
+OPEN_PURCHASE_ORDER_STATUSES = {"ORDERED", "PARTIALLY_RECEIVED"}
+IN_TRANSIT_TRANSFER_STATUSES = {"IN_TRANSIT"}
+ACTIVE_SHIPMENT_STATUSES = {"CREATED", "IN_TRANSIT", "DELAYED", "CUSTOMS_HOLD"}
+
+AtpKey = tuple[int, Optional[int]]
+
+
+def _as_date(value: Optional[datetime]) -> Optional[date]:
+    return value.date() if value is not None else None
+
+
+def _shipment_etas(db: Session, related_type: str, related_ids: Iterable[int], *, owner_id: Optional[int]) -> dict[int, date]:
+    related_ids = [str(related_id) for related_id in related_ids]
+    if not related_ids:
+        return {}
+    query = db.query(Shipment.related_id, Shipment.estimated_arrival).filter(
+        Shipment.related_type == related_type,
+        Shipment.related_id.in_(related_ids),
+        Shipment.status.in_(ACTIVE_SHIPMENT_STATUSES),
+        Shipment.estimated_arrival.isnot(None),
+    )
+    if owner_id is not None:
+        query = query.filter(Shipment.owner_id == owner_id)
+    etas: dict[int, date] = {}
+    for row in query.all():
+        # With several active shipments for one document, the latest ETA is the one that completes it.
+        eta = row.estimated_arrival.date()
+        etas[int(row.related_id)] = max(eta, etas.get(int(row.related_id), eta))
+    return etas
+
+
+def _inbound_supply(
+    db: Session,
+    product_ids: set[int],
+    *,
+    owner_id: Optional[int],
+) -> list[tuple[int, int, Optional[date], int]]:
+    """Open inbound quantities as (product_id, warehouse_id, expected_date, quantity)."""
+    supply: list[tuple[int, int, Optional[date], int]] = []
+
+    po_query = (
+        db.query(
+            PurchaseOrder.id.label("purchase_order_id"),
+            PurchaseOrder.owner_id,
+            PurchaseOrder.supplier_id,
+            PurchaseOrder.order_date,
+            PurchaseOrder.expected_arrival_date,
+            PurchaseOrderItem.product_id,
+            PurchaseOrderItem.warehouse_id,
+            (PurchaseOrderItem.quantity_ordered - PurchaseOrderItem.quantity_received).label("remaining"),
+        )
+        .join(PurchaseOrderItem, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
+        .filter(
+            PurchaseOrder.status.in_(OPEN_PURCHASE_ORDER_STATUSES),
+            PurchaseOrderItem.product_id.in_(product_ids),
+            PurchaseOrderItem.quantity_ordered > PurchaseOrderItem.quantity_received,
+        )
+    )
+    if owner_id is not None:
+        po_query = po_query.filter(PurchaseOrder.owner_id == owner_id)
+    po_rows = po_query.all()
+
+    # Lines without a warehouse are received into the owner's first warehouse.
+    owner_ids = {row.owner_id for row in po_rows if row.warehouse_id is None and row.owner_id is not None}
+    first_warehouses: dict[int, int] = {}
+    if owner_ids:
+        for warehouse in db.query(Warehouse.id, Warehouse.owner_id).filter(Warehouse.owner_id.in_(owner_ids)).order_by(Warehouse.id.asc()):
+            first_warehouses.setdefault(warehouse.owner_id, warehouse.id)
+
+    po_etas = _shipment_etas(db, "PURCHASE_ORDER", {row.purchase_order_id for row in po_rows}, owner_id=owner_id)
+    # Lines with neither an ETA nor an expected date arrive at the supplier's observed p90 lead time.
+    unscheduled = [row for row in po_rows if row.purchase_order_id not in po_etas and row.expected_arrival_date is None and row.supplier_id is not None]
+    lead_times: dict = {}
+    for tenant_id in {row.owner_id for row in unscheduled if row.owner_id is not None}:
+        lead_times.update(
+            get_lead_time_stats(
+                db,
+                [(row.supplier_id, row.product_id) for row in unscheduled if row.owner_id == tenant_id],
+                owner_id=tenant_id,
+            )
+        )
+    for row in po_rows:
+        warehouse_id = row.warehouse_id if row.warehouse_id is not None else first_warehouses.get(row.owner_id)
+        if warehouse_id is None:
+            continue
+        expected = po_etas.get(row.purchase_order_id) or _as_date(row.expected_arrival_date)
+        lead_time = lead_times.get((row.supplier_id, row.product_id))
+        if expected is None and lead_time is not None and row.order_date is not None:
+            expected = _as_date(row.order_date + timedelta(days=lead_time["p90_days"]))
+        supply.append((row.product_id, warehouse_id, expected, int(row.remaining)))
+
+    transfer_query = db.query(StockTransfer).filter(
+        StockTransfer.status.in_(IN_TRANSIT_TRANSFER_STATUSES),
+        StockTransfer.product_id.in_(product_ids),
+    )
+    if owner_id is not None:
+        transfer_query = transfer_query.join(Product, Product.id == StockTransfer.product_id).filter(Product.owner_id == owner_id)
+    transfers = transfer_query.all()
+    transfer_etas = _shipment_etas(db, "TRANSFER", {transfer.id for transfer in transfers}, owner_id=owner_id)
+    for transfer in transfers:
+        supply.append((transfer.product_id, transfer.to_warehouse_id, transfer_etas.get(transfer.id), transfer.quantity))
+
+    return supply
+
+
+def build_atp_timelines(
+    db: Session,
+    keys: Iterable[AtpKey],
+    *,
+    owner_id: Optional[int] = None,
+    as_of: Optional[date] = None,
+    horizon_days: int = ATP_HORIZON_DAYS,
+) -> tuple[list[AtpKey], np.ndarray, dict[AtpKey, int], date]:
+    """Projected available stock per (product, warehouse) for each day of the horizon.
+
+    Row i of the returned matrix is the projection for keys[i]; column d is day `as_of + d`.
+    A warehouse of None projects the product across all warehouses. Overdue receipts are
+    treated as due today. Purchase lines without a date use the supplier's observed p90 lead
+    time, and receipts still without any expected date are reported separately.
+    """
+    keys = list(dict.fromkeys(keys))
+    as_of = as_of or datetime.utcnow().date()
+    row_index = {key: index for index, key in enumerate(keys)}
+    starting = np.zeros(len(keys), dtype=np.int64)
+    receipts = np.zeros((len(keys), horizon_days + 1), dtype=np.int64)
+    undated: dict[AtpKey, int] = defaultdict(int)
+    if not keys:
+        return keys, receipts, undated, as_of
+
+    by_warehouse: dict[Optional[int], list[int]] = defaultdict(list)
+    for product_id, warehouse_id in keys:
+        by_warehouse[warehouse_id].append(product_id)
+    for warehouse_id, product_ids in by_warehouse.items():
+        positions = get_stock_positions(db, product_ids, warehouse_id)
+        for product_id in product_ids:
+            starting[row_index[(product_id, warehouse_id)]] = positions[product_id]["available"]
+
+    rows: list[int] = []
+    days: list[int] = []
+    quantities: list[int] = []
+    for product_id, warehouse_id, expected, quantity in _inbound_supply(db, {key[0] for key in keys}, owner_id=owner_id):
+        for key in ((product_id, warehouse_id), (product_id, None)):
+            if key not in row_index:
+                continue
+            if expected is None:
+                undated[key] += quantity
+                continue
+            offset = (expected - as_of).days
+            if offset > horizon_days:
+                continue
+            rows.append(row_index[key])
+            days.append(max(offset, 0))
+            quantities.append(quantity)
+    if rows:
+        np.add.at(receipts, (np.array(rows), np.array(days)), np.array(quantities, dtype=np.int64))
+
+    projected = starting[:, None] + np.cumsum(receipts, axis=1)
+    return keys, projected, undated, as_of
+
+
+def check_order_atp(
+    db: Session,
+    lines: list[dict],
+    *,
+    owner_id: Optional[int] = None,
+    as_of: Optional[date] = None,
+    horizon_days: int = ATP_HORIZON_DAYS,
+) -> dict:
+    """Earliest promise date for every line of an order, computed for all lines at once.
+
+    Lines for the same (product, warehouse) consume the projection cumulatively in order.
+    """
+    keys = [(line["product_id"], line.get("warehouse_id")) for line in lines]
+    timeline_keys, projected, undated, as_of = build_atp_timelines(
+        db, keys, owner_id=owner_id, as_of=as_of, horizon_days=horizon_days
+    )
+    if not lines:
+        return {"as_of": as_of, "promise_date": as_of, "can_fulfill_now": True, "lines": []}
+
+    row_index = {key: index for index, key in enumerate(timeline_keys)}
+    line_rows = np.array([row_index[key] for key in keys])
+    quantities = np.array([line["quantity"] for line in lines], dtype=np.int64)
+    # Cumulative demand: each line needs its own quantity plus every earlier line on the same key.
+    same_key_before = np.tril(line_rows[:, None] == line_rows[None, :])
+    needed = same_key_before @ quantities
+
+    # Projections only grow (reservations are already netted), so the first day covering demand holds.
+    covered = projected[line_rows] >= needed[:, None]
+    reachable = covered.any(axis=1)
+    first_day = covered.argmax(axis=1)
+
+    results = []
+    for index, line in enumerate(lines):
+        promise_date = as_of + timedelta(days=int(first_day[index])) if reachable[index] else None
+        results.append(
+            {
+                "product_id": line["product_id"],
+                "warehouse_id": line.get("warehouse_id"),
+                "quantity": int(quantities[index]),
+                "available_now": int(projected[line_rows[index], 0]),
+                "cumulative_demand": int(needed[index]),
+                "promise_date": promise_date,
+                "can_fulfill_now": bool(reachable[index] and first_day[index] == 0),
+                "undated_inbound": int(undated.get(keys[index], 0)),
+            }
+        )
+    promise_dates = [line["promise_date"] for line in results]
+    return {
+        "as_of": as_of,
+        "promise_date": None if None in promise_dates else max(promise_dates),
+        "can_fulfill_now": all(line["can_fulfill_now"] for line in results),
+        "lines": results,
+    }
+
+
+def get_available_to_promise(
+    db: Session,
+    product_id: int,
+    warehouse_id: Optional[int] = None,
+    *,
+    owner_id: Optional[int] = None,
+    horizon_days: int = ATP_HORIZON_DAYS,
+) -> dict:
+    key = (product_id, warehouse_id)
+    stock_position = get_stock_positions(db, [product_id], warehouse_id)[product_id]
+    _, projected, undated, as_of = build_atp_timelines(db, [key], owner_id=owner_id, horizon_days=horizon_days)
+    row = projected[0]
+    # Only days where the projection changes are returned.
+    change_days = np.r_[0, np.flatnonzero(np.diff(row)) + 1]
+    stock_position["available_to_promise"] = int(row[0])
+    stock_position["projected_available_to_promise"] = int(row[-1])
+    stock_position["undated_inbound"] = int(undated.get(key, 0))
+    stock_position["timeline"] = [
+        {"date": as_of + timedelta(days=int(day)), "available_to_promise": int(row[day])} for day in change_days
+    ]
+    return stock_position
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Iterator, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.models import InventoryTransaction, Product, ReturnOrder, ReturnOrderItem, Sale
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; exports fall back to gzip NDJSON without it.
+    pa = None
+    pq = None
+
+# Rows per server-side cursor partition; each partition becomes one Parquet row group or Arrow record batch.
+COLUMNAR_EXPORT_BATCH_SIZE = 50_000
+EXPORT_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "ndjson": ("application/gzip", "ndjson.gz"),
+}
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    columns: list[tuple[str, str]]
+    query: Callable[[int], Select]
+
+
+def _sales_query(owner_id: int) -> Select:
+    return (
+        select(
+            Sale.id,
+            Sale.product_id,
+            Product.sku,
+            Sale.sale_date,
+            Sale.quantity,
+            Sale.unit_price,
+            Sale.total_amount,
+            Sale.customer_id,
+            Sale.order_id,
+            Sale.created_at,
+        )
+        .join(Product, Product.id == Sale.product_id)
+        .where(Sale.owner_id == owner_id)
+        .order_by(Sale.id)
+    )
+
+
+def _inventory_transactions_query(owner_id: int) -> Select:
+    return (
+        select(
+            InventoryTransaction.id,
+            InventoryTransaction.product_id,
+            Product.sku,
+            InventoryTransaction.warehouse_id,
+            InventoryTransaction.transaction_type,
+            InventoryTransaction.direction,
+            InventoryTransaction.quantity,
+            InventoryTransaction.reference_type,
+            InventoryTransaction.reference_id,
+            InventoryTransaction.reason,
+            InventoryTransaction.created_by,
+            InventoryTransaction.created_at,
+        )
+        .join(Product, Product.id == InventoryTransaction.product_id)
+        .where(Product.owner_id == owner_id)
+        .order_by(InventoryTransaction.id)
+    )
+
+
+def _return_items_query(owner_id: int) -> Select:
+    return (
+        select(
+            ReturnOrderItem.id,
+            ReturnOrderItem.return_order_id,
+            ReturnOrder.return_number,
+            ReturnOrder.status,
+            ReturnOrder.return_date,
+            ReturnOrderItem.product_id,
+            Product.sku,
+            ReturnOrderItem.warehouse_id,
+            ReturnOrderItem.supplier_id,
+            ReturnOrderItem.quantity,
+            ReturnOrderItem.return_reason,
+            ReturnOrderItem.condition,
+            ReturnOrderItem.refund_amount,
+            ReturnOrderItem.replacement_cost,
+        )
+        .join(ReturnOrder, ReturnOrder.id == ReturnOrderItem.return_order_id)
+        .join(Product, Product.id == ReturnOrderItem.product_id)
+        .where(ReturnOrder.owner_id == owner_id)
+        .order_by(ReturnOrderItem.id)
+    )
+
+
+EXPORT_DATASETS = {
+    "sales": ExportDataset(
+        columns=[
+            ("id", "int"),
+            ("product_id", "int"),
+            ("sku", "string"),
+            ("sale_date", "timestamp"),
+            ("quantity", "int"),
+            ("unit_price", "float"),
+            ("total_amount", "float"),
+            ("customer_id", "string"),
+            ("order_id", "string"),
+            ("created_at", "timestamp"),
+        ],
+        query=_sales_query,
+    ),
+    "inventory-transactions": ExportDataset(
+        columns=[
+            ("id", "int"),
+            ("product_id", "int"),
+            ("sku", "string"),
+            ("warehouse_id", "int"),
+            ("transaction_type", "string"),
+            ("direction", "string"),
+            ("quantity", "int"),
+            ("reference_type", "string"),
+            ("reference_id", "string"),
+            ("reason", "string"),
+            ("created_by", "int"),
+            ("created_at", "timestamp"),
+        ],
+        query=_inventory_transactions_query,
+    ),
+    "return-items": ExportDataset(
+        columns=[
+            ("id", "int"),
+            ("return_order_id", "int"),
+            ("return_number", "string"),
+            ("status", "string"),
+            ("return_date", "timestamp"),
+            ("product_id", "int"),
+            ("sku", "string"),
+            ("warehouse_id", "int"),
+            ("supplier_id", "int"),
+            ("quantity", "int"),
+            ("return_reason", "string"),
+            ("condition", "string"),
+            ("refund_amount", "float"),
+            ("replacement_cost", "float"),
+        ],
+        query=_return_items_query,
+    ),
+}
+
+
+def resolve_export_format(requested: Optional[str]) -> str:
+    """Default to Parquet when pyarrow is installed and gzip NDJSON otherwise."""
+    if requested is None:
+        return "parquet" if pa is not None else "ndjson"
+    if requested not in EXPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported export format: {requested}")
+    if requested != "ndjson" and pa is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{requested} export requires pyarrow; use format=ndjson.")
+    return requested
+
+
+def _get_dataset(dataset: str) -> ExportDataset:
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown export dataset: {dataset}")
+    return EXPORT_DATASETS[dataset]
+
+
+def _partitions(db: Session, spec: ExportDataset, owner_id: int) -> Iterator[list[tuple]]:
+    result = db.execute(spec.query(owner_id).execution_options(yield_per=COLUMNAR_EXPORT_BATCH_SIZE))
+    for partition in result.partitions():
+        yield partition
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _stream_ndjson_gzip(partitions: Iterator[list[tuple]], names: list[str]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for partition in partitions:
+        lines = "".join(
+            json.dumps(dict(zip(names, row)), default=_json_default, separators=(",", ":")) + "\n" for row in partition
+        )
+        chunk = compressor.compress(lines.encode("utf-8"))
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+class _ChunkSink:
+    """Write-only file object drained after every batch so the export is never held whole in memory."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _arrow_schema(columns: list[tuple[str, str]]):
+    types = {"int": pa.int64(), "float": pa.float64(), "string": pa.string(), "timestamp": pa.timestamp("us", tz="UTC")}
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _stream_arrow(partitions: Iterator[list[tuple]], columns: list[tuple[str, str]], *, export_format: str) -> Iterator[bytes]:
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        write = writer.write_table
+        to_batch = pa.Table.from_arrays
+    else:
+        writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+        write = writer.write_batch
+        to_batch = pa.RecordBatch.from_arrays
+    try:
+        for partition in partitions:
+            values = list(zip(*partition))
+            arrays = [pa.array(list(column), type=field.type) for column, field in zip(values, schema)]
+            write(to_batch(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_dataset(db: Session, dataset: str, *, owner_id: int, export_format: str) -> Iterator[bytes]:
+    """Stream one of `EXPORT_DATASETS` for the tenant as Parquet, Arrow IPC or gzip NDJSON bytes."""
+    spec = _get_dataset(dataset)
+    partitions = _partitions(db, spec, owner_id)
+    if export_format == "ndjson":
+        return _stream_ndjson_gzip(partitions, [name for name, _ in spec.columns])
+    return _stream_arrow(partitions, spec.columns, export_format=export_format)
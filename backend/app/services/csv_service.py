@@ -1,15 +1,34 @@
 from __future__ import annotations
 
 import csv
+from datetime import date, datetime, timezone
 from io import StringIO
-from typing import Iterable
+from typing import Iterable, Iterator
 
 from fastapi import HTTPException, status
+from sqlalchemy import func, insert, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
-from app.models import Product, Sale, Supplier, User, Warehouse
-from app.services.purchasing_service import list_purchase_orders
-from app.services.stock_ledger_service import adjust_stock, get_available, get_default_warehouse, seed_product_stock_from_legacy_current_stock, sync_product_current_stock
+from app.models import Product, PurchaseOrder, PurchaseOrderItem, Sale, StockBalance, Supplier, User, Warehouse
+from app.services.analytics_engine import invalidate_tenant_frame
+from app.services.product_cube_service import rebuild_product_week_cube
+from app.services.sales_rollup_service import rebuild_sales_daily_rollup
+from app.services.stock_ledger_service import (
+    create_inventory_transactions_bulk,
+    get_default_warehouse,
+    get_ledger_archive_horizon,
+    get_stock_positions,
+    rebuild_stock_checkpoints,
+    refresh_low_stock_flags,
+)
+
+# Rows fetched per server-side cursor batch and written per streamed chunk.
+CSV_EXPORT_BATCH_SIZE = 1000
+# Rows per IN lookup and per multi-row INSERT ... ON CONFLICT statement.
+CSV_IMPORT_CHUNK_SIZE = 1000
+# Row errors quoted in the 400 response; the rest are counted.
+CSV_IMPORT_ERROR_PREVIEW = 50
 
 
 def _read_rows(csv_text: str) -> list[dict[str, str]]:
@@ -22,13 +41,19 @@ def _read_rows(csv_text: str) -> list[dict[str, str]]:
     return [{key: (value or "").strip() for key, value in row.items()} for row in reader]
 
 
-def _to_csv(fieldnames: list[str], rows: Iterable[dict[str, object]]) -> str:
+def _stream_csv(fieldnames: list[str], rows: Iterable[dict[str, object]]) -> Iterator[str]:
+    """Yield CSV text in chunks of `CSV_EXPORT_BATCH_SIZE` rows, header first."""
     buffer = StringIO()
     writer = csv.DictWriter(buffer, fieldnames=fieldnames)
     writer.writeheader()
-    for row in rows:
+    for count, row in enumerate(rows, start=1):
         writer.writerow({key: row.get(key, "") for key in fieldnames})
-    return buffer.getvalue()
+        if count % CSV_EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
 
 
 def _parse_int(value: str, *, field: str, row_number: int) -> int | None:
@@ -55,117 +80,262 @@ def _parse_float(value: str, *, field: str, row_number: int) -> float | None:
         ) from exc
 
 
+def _parse_datetime(value: str, *, field: str, row_number: int) -> datetime | None:
+    if value == "":
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Row {row_number}: {field} must be an ISO 8601 date or datetime.",
+        ) from exc
+
+
 def _parse_bool(value: str, *, default: bool = True) -> bool:
     if value == "":
         return default
     return value.strip().lower() in {"1", "true", "yes", "y", "on"}
 
 
-def export_products_csv(db: Session, *, user: User) -> str:
-    products = db.query(Product).filter(Product.owner_id == user.id).order_by(Product.name.asc()).all()
-    rows = []
-    for product in products:
-        sync_product_current_stock(db, product.id)
-        rows.append(
-            {
-                "id": product.id,
-                "name": product.name,
-                "sku": product.sku,
-                "description": product.description or "",
-                "category": product.category or "",
-                "price": product.price,
-                "cost": product.cost,
-                "current_stock": product.current_stock,
-                "min_stock_threshold": product.min_stock_threshold,
-                "supplier": product.supplier or "",
-            }
+def _chunks(items: list, size: int = CSV_IMPORT_CHUNK_SIZE) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _raise_row_errors(errors: list[tuple[int, str]]) -> None:
+    """Reject the whole file with every row error found during validation."""
+    if not errors:
+        return
+    messages = [message for _, message in sorted(errors)]
+    detail = f"{len(messages)} row(s) failed validation: " + " ".join(messages[:CSV_IMPORT_ERROR_PREVIEW])
+    if len(messages) > CSV_IMPORT_ERROR_PREVIEW:
+        detail += f" ...and {len(messages) - CSV_IMPORT_ERROR_PREVIEW} more."
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _settle_row_errors(parsed: dict[str, dict], errors: list[tuple[int, str]], *, strict: bool) -> dict[str, dict]:
+    """Reject the file on any row error in strict mode; otherwise drop the failed rows and keep the rest."""
+    if strict:
+        _raise_row_errors(errors)
+        return parsed
+    rejected = {row_number for row_number, _ in errors}
+    return {key: item for key, item in parsed.items() if item["row_number"] not in rejected}
+
+
+def _row_errors(errors: list[tuple[int, str]]) -> list[dict[str, object]]:
+    return [{"row_number": row_number, "message": message} for row_number, message in sorted(errors)]
+
+
+def _upsert(db: Session, model, values: list[dict], *, index_elements: list[str], update_columns: list[str], owner_id: int):
+    """Multi-row INSERT ... ON CONFLICT DO UPDATE that never touches another owner's conflicting row."""
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(model).values(values)
+    return statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={**{column: statement.excluded[column] for column in update_columns}, "updated_at": func.now()},
+        where=model.owner_id == owner_id,
+    )
+
+
+def export_products_csv(db: Session, *, user: User) -> Iterator[str]:
+    owner_id = user.id
+    # Available stock for every product comes from one grouped balance read joined into the export query.
+    stock = (
+        db.query(
+            StockBalance.product_id.label("product_id"),
+            func.sum(StockBalance.on_hand - StockBalance.reserved - StockBalance.damaged - StockBalance.quarantined).label("available"),
+        )
+        .join(Product, Product.id == StockBalance.product_id)
+        .filter(Product.owner_id == owner_id)
+        .group_by(StockBalance.product_id)
+        .subquery()
+    )
+    products = (
+        db.query(
+            Product.id,
+            Product.name,
+            Product.sku,
+            Product.description,
+            Product.category,
+            Product.price,
+            Product.cost,
+            func.coalesce(stock.c.available, 0).label("current_stock"),
+            Product.min_stock_threshold,
+            Product.supplier,
         )
-    return _to_csv(
+        .outerjoin(stock, stock.c.product_id == Product.id)
+        .filter(Product.owner_id == owner_id)
+        .order_by(Product.name.asc())
+        .yield_per(CSV_EXPORT_BATCH_SIZE)
+    )
+    rows = (
+        {
+            "id": product.id,
+            "name": product.name,
+            "sku": product.sku,
+            "description": product.description or "",
+            "category": product.category or "",
+            "price": product.price,
+            "cost": product.cost,
+            "current_stock": int(product.current_stock),
+            "min_stock_threshold": product.min_stock_threshold,
+            "supplier": product.supplier or "",
+        }
+        for product in products
+    )
+    return _stream_csv(
         ["id", "name", "sku", "description", "category", "price", "cost", "current_stock", "min_stock_threshold", "supplier"],
         rows,
     )
 
 
 def import_products_csv(db: Session, *, user: User, csv_text: str) -> dict[str, object]:
-    rows = _read_rows(csv_text)
-    created = 0
-    updated = 0
-    warnings: list[str] = []
+    return import_product_rows(db, owner_id=user.id, rows=enumerate(_read_rows(csv_text), start=2))
 
-    for index, row in enumerate(rows, start=2):
+
+def import_product_rows(
+    db: Session,
+    *,
+    owner_id: int,
+    rows: Iterable[tuple[int, dict[str, str]]],
+    strict: bool = True,
+    commit: bool = True,
+) -> dict[str, object]:
+    errors: list[tuple[int, str]] = []
+    parsed: dict[str, dict] = {}
+
+    for index, row in rows:
         sku = row.get("sku", "")
         name = row.get("name", "")
         if not sku or not name:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Row {index}: name and sku are required.")
-
-        price = _parse_float(row.get("price", ""), field="price", row_number=index)
-        cost = _parse_float(row.get("cost", ""), field="cost", row_number=index)
-        min_stock_threshold = _parse_int(row.get("min_stock_threshold", ""), field="min_stock_threshold", row_number=index)
-        requested_stock = _parse_int(row.get("current_stock", ""), field="current_stock", row_number=index)
-
-        existing = db.query(Product).filter(Product.owner_id == user.id, Product.sku == sku).first()
-        if existing is None:
-            if price is None or cost is None:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Row {index}: price and cost are required for new products.")
-            product = Product(
-                owner_id=user.id,
-                name=name,
-                sku=sku,
-                description=row.get("description") or None,
-                category=row.get("category") or None,
-                price=price,
-                cost=cost,
-                current_stock=0,
-                min_stock_threshold=min_stock_threshold if min_stock_threshold is not None else 10,
-                supplier=row.get("supplier") or None,
-            )
-            db.add(product)
-            db.commit()
-            db.refresh(product)
-            if requested_stock and requested_stock > 0:
-                seed_product_stock_from_legacy_current_stock(db, product=product, quantity=requested_stock, created_by=user.id)
-                db.refresh(product)
-            created += 1
+            errors.append((index, f"Row {index}: name and sku are required."))
+            continue
+        try:
+            price = _parse_float(row.get("price", ""), field="price", row_number=index)
+            cost = _parse_float(row.get("cost", ""), field="cost", row_number=index)
+            min_stock_threshold = _parse_int(row.get("min_stock_threshold", ""), field="min_stock_threshold", row_number=index)
+            requested_stock = _parse_int(row.get("current_stock", ""), field="current_stock", row_number=index)
+        except HTTPException as exc:
+            errors.append((index, str(exc.detail)))
             continue
+        # A SKU repeated in the file keeps its last row, as when rows were applied one by one.
+        parsed[sku] = {
+            "row_number": index,
+            "name": name,
+            "description": row.get("description") or None,
+            "category": row.get("category") or None,
+            "supplier": row.get("supplier") or None,
+            "price": price,
+            "cost": cost,
+            "min_stock_threshold": min_stock_threshold,
+            "requested_stock": requested_stock,
+        }
 
-        existing.name = name
-        existing.description = row.get("description") or None
-        existing.category = row.get("category") or None
-        existing.supplier = row.get("supplier") or None
-        if price is not None:
-            existing.price = price
-        if cost is not None:
-            existing.cost = cost
-        if min_stock_threshold is not None:
-            existing.min_stock_threshold = min_stock_threshold
-        db.add(existing)
-        db.commit()
-        db.refresh(existing)
-
-        if requested_stock is not None:
-            sync_product_current_stock(db, existing.id, commit=True)
-            current_available = get_available(db, existing.id, None)
-            delta = requested_stock - current_available
+    existing = {}
+    for chunk in _chunks(list(parsed)):
+        for product in db.query(Product.id, Product.sku, Product.owner_id, Product.price, Product.cost, Product.min_stock_threshold).filter(Product.sku.in_(chunk)):
+            existing[product.sku] = product
+    for sku, item in parsed.items():
+        current = existing.get(sku)
+        if current is not None and current.owner_id != owner_id:
+            errors.append((item["row_number"], f"Row {item['row_number']}: sku {sku} is already used by another account."))
+        elif current is None and (item["price"] is None or item["cost"] is None):
+            errors.append((item["row_number"], f"Row {item['row_number']}: price and cost are required for new products."))
+    parsed = _settle_row_errors(parsed, errors, strict=strict)
+
+    values = []
+    warnings: list[str] = []
+    for sku, item in parsed.items():
+        current = existing.get(sku)
+        if current is not None and item["requested_stock"] is None:
+            warnings.append(f"Row {item['row_number']}: current_stock omitted for {sku}; ledger stock left unchanged.")
+        values.append(
+            {
+                "owner_id": owner_id,
+                "sku": sku,
+                "name": item["name"],
+                "description": item["description"],
+                "category": item["category"],
+                "supplier": item["supplier"],
+                "price": item["price"] if item["price"] is not None else current.price,
+                "cost": item["cost"] if item["cost"] is not None else current.cost,
+                "min_stock_threshold": item["min_stock_threshold"]
+                if item["min_stock_threshold"] is not None
+                else current.min_stock_threshold
+                if current is not None
+                else 10,
+                "current_stock": 0,
+                "is_low_stock": True,
+            }
+        )
+    warehouse = get_default_warehouse(db, owner_id=owner_id) if any(item["requested_stock"] is not None for item in parsed.values()) else None
+
+    try:
+        product_ids: dict[str, int] = {}
+        for chunk in _chunks(values):
+            statement = _upsert(
+                db,
+                Product,
+                chunk,
+                index_elements=["sku"],
+                update_columns=["name", "description", "category", "supplier", "price", "cost", "min_stock_threshold"],
+                owner_id=owner_id,
+            ).returning(Product.id, Product.sku)
+            product_ids.update({row.sku: row.id for row in db.execute(statement)})
+
+        stock_syncs = [sku for sku, item in parsed.items() if sku in existing and item["requested_stock"] is not None]
+        positions = get_stock_positions(db, [product_ids[sku] for sku in stock_syncs if sku in product_ids])
+        movements = []
+        for sku, item in parsed.items():
+            product_id = product_ids.get(sku)
+            requested_stock = item["requested_stock"]
+            if product_id is None or requested_stock is None:
+                continue
+            if sku not in existing:
+                if requested_stock > 0:
+                    movements.append(
+                        {
+                            "product_id": product_id,
+                            "warehouse_id": warehouse.id,
+                            "transaction_type": "ADJUSTMENT_POSITIVE",
+                            "quantity": requested_stock,
+                            "direction": "IN",
+                            "reference_type": "LEGACY_PRODUCT_CREATE",
+                            "reference_id": product_id,
+                            "reason": "Seeded legacy current_stock into ledger",
+                        }
+                    )
+                continue
+            delta = requested_stock - positions[product_id]["available"]
             if delta != 0:
-                warehouse = get_default_warehouse(db, owner_id=user.id)
-                adjust_stock(
-                    db,
-                    product_id=existing.id,
-                    warehouse_id=warehouse.id,
-                    quantity=abs(delta),
-                    adjustment_type="POSITIVE" if delta > 0 else "NEGATIVE",
-                    reason="CSV import stock sync",
-                    notes="Applied through CSV import to preserve ledger truth.",
-                    created_by=user.id,
+                movements.append(
+                    {
+                        "product_id": product_id,
+                        "warehouse_id": warehouse.id,
+                        "transaction_type": "ADJUSTMENT_POSITIVE" if delta > 0 else "ADJUSTMENT_NEGATIVE",
+                        "quantity": abs(delta),
+                        "direction": "IN" if delta > 0 else "OUT",
+                        "reason": "CSV import stock sync",
+                        "notes": "Applied through CSV import to preserve ledger truth.",
+                    }
                 )
+        create_inventory_transactions_bulk(db, movements, created_by=owner_id, commit=False)
+        for chunk in _chunks(list(product_ids.values())):
+            refresh_low_stock_flags(db, chunk)
+        if commit:
+            db.commit()
         else:
-            warnings.append(f"Row {index}: current_stock omitted for {sku}; ledger stock left unchanged.")
-        updated += 1
+            db.flush()
+    except Exception:
+        db.rollback()
+        raise
 
-    return {"entity": "products", "created": created, "updated": updated, "warnings": warnings}
+    created = sum(1 for sku in parsed if sku not in existing)
+    return {"entity": "products", "created": created, "updated": len(parsed) - created, "warnings": warnings, "errors": _row_errors(errors)}
 
 
-def export_warehouses_csv(db: Session, *, user: User) -> str:
+def export_warehouses_csv(db: Session, *, user: User) -> Iterator[str]:
     warehouses = db.query(Warehouse).filter(Warehouse.owner_id == user.id).order_by(Warehouse.name.asc()).all()
     rows = [
         {
@@ -177,33 +347,74 @@ def export_warehouses_csv(db: Session, *, user: User) -> str:
         }
         for warehouse in warehouses
     ]
-    return _to_csv(["id", "name", "code", "address", "is_active"], rows)
+    return _stream_csv(["id", "name", "code", "address", "is_active"], rows)
 
 
 def import_warehouses_csv(db: Session, *, user: User, csv_text: str) -> dict[str, object]:
-    rows = _read_rows(csv_text)
-    created = 0
-    updated = 0
-    for index, row in enumerate(rows, start=2):
+    return import_warehouse_rows(db, owner_id=user.id, rows=enumerate(_read_rows(csv_text), start=2))
+
+
+def import_warehouse_rows(
+    db: Session,
+    *,
+    owner_id: int,
+    rows: Iterable[tuple[int, dict[str, str]]],
+    strict: bool = True,
+    commit: bool = True,
+) -> dict[str, object]:
+    errors: list[tuple[int, str]] = []
+    parsed: dict[str, dict] = {}
+    for index, row in rows:
         name = row.get("name", "")
         code = row.get("code", "")
         if not name or not code:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Row {index}: name and code are required.")
-        existing = db.query(Warehouse).filter(Warehouse.owner_id == user.id, Warehouse.code == code).first()
-        if existing is None:
-            existing = Warehouse(owner_id=user.id, name=name, code=code)
-            created += 1
+            errors.append((index, f"Row {index}: name and code are required."))
+            continue
+        parsed[code] = {
+            "row_number": index,
+            "owner_id": owner_id,
+            "name": name,
+            "code": code,
+            "address": row.get("address") or None,
+            "is_active": _parse_bool(row.get("is_active", ""), default=True),
+        }
+
+    # Codes and names are unique across accounts, so both are checked before writing.
+    existing = {}
+    names_in_use = {}
+    for chunk in _chunks(list(parsed)):
+        names = [parsed[code]["name"] for code in chunk]
+        for warehouse in db.query(Warehouse.code, Warehouse.name, Warehouse.owner_id).filter(
+            or_(Warehouse.code.in_(chunk), Warehouse.name.in_(names))
+        ):
+            if warehouse.code in parsed:
+                existing[warehouse.code] = warehouse
+            names_in_use[warehouse.name] = warehouse.code
+    for code, item in parsed.items():
+        current = existing.get(code)
+        if current is not None and current.owner_id != owner_id:
+            errors.append((item["row_number"], f"Row {item['row_number']}: code {code} is already used by another account."))
+        elif names_in_use.get(item["name"], code) != code:
+            errors.append((item["row_number"], f"Row {item['row_number']}: name {item['name']} is already used by another warehouse."))
+    parsed = _settle_row_errors(parsed, errors, strict=strict)
+
+    try:
+        for chunk in _chunks([{key: value for key, value in item.items() if key != "row_number"} for item in parsed.values()]):
+            db.execute(
+                _upsert(db, Warehouse, chunk, index_elements=["code"], update_columns=["name", "address", "is_active"], owner_id=owner_id)
+            )
+        if commit:
+            db.commit()
         else:
-            updated += 1
-        existing.name = name
-        existing.address = row.get("address") or None
-        existing.is_active = _parse_bool(row.get("is_active", ""), default=True)
-        db.add(existing)
-        db.commit()
-    return {"entity": "warehouses", "created": created, "updated": updated, "warnings": []}
+            db.flush()
+    except Exception:
+        db.rollback()
+        raise
+    created = sum(1 for code in parsed if code not in existing)
+    return {"entity": "warehouses", "created": created, "updated": len(parsed) - created, "warnings": [], "errors": _row_errors(errors)}
 
 
-def export_suppliers_csv(db: Session, *, user: User) -> str:
+def export_suppliers_csv(db: Session, *, user: User) -> Iterator[str]:
     suppliers = db.query(Supplier).filter(Supplier.owner_id == user.id).order_by(Supplier.name.asc()).all()
     rows = [
         {
@@ -216,99 +427,311 @@ def export_suppliers_csv(db: Session, *, user: User) -> str:
         }
         for supplier in suppliers
     ]
-    return _to_csv(["id", "name", "email", "phone", "address", "lead_time_days"], rows)
+    return _stream_csv(["id", "name", "email", "phone", "address", "lead_time_days"], rows)
 
 
 def import_suppliers_csv(db: Session, *, user: User, csv_text: str) -> dict[str, object]:
-    rows = _read_rows(csv_text)
-    created = 0
-    updated = 0
-    for index, row in enumerate(rows, start=2):
+    return import_supplier_rows(db, owner_id=user.id, rows=enumerate(_read_rows(csv_text), start=2))
+
+
+def import_supplier_rows(
+    db: Session,
+    *,
+    owner_id: int,
+    rows: Iterable[tuple[int, dict[str, str]]],
+    strict: bool = True,
+    commit: bool = True,
+) -> dict[str, object]:
+    errors: list[tuple[int, str]] = []
+    parsed: dict[str, dict] = {}
+    for index, row in rows:
         name = row.get("name", "")
         if not name:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Row {index}: name is required.")
-        lead_time_days = _parse_int(row.get("lead_time_days", ""), field="lead_time_days", row_number=index)
-        existing = db.query(Supplier).filter(Supplier.owner_id == user.id, Supplier.name == name).first()
-        if existing is None:
-            existing = Supplier(owner_id=user.id, name=name)
-            created += 1
+            errors.append((index, f"Row {index}: name is required."))
+            continue
+        try:
+            lead_time_days = _parse_int(row.get("lead_time_days", ""), field="lead_time_days", row_number=index)
+        except HTTPException as exc:
+            errors.append((index, str(exc.detail)))
+            continue
+        parsed[name] = {
+            "row_number": index,
+            "name": name,
+            "email": row.get("email") or None,
+            "phone": row.get("phone") or None,
+            "address": row.get("address") or None,
+            "lead_time_days": lead_time_days,
+        }
+    parsed = _settle_row_errors(parsed, errors, strict=strict)
+
+    # Supplier names carry no unique constraint to upsert against, so existing rows are matched
+    # with one IN lookup and written with a bulk UPDATE by primary key next to a bulk INSERT.
+    existing: dict[str, int] = {}
+    for chunk in _chunks(list(parsed)):
+        for supplier in db.query(Supplier.id, Supplier.name).filter(Supplier.owner_id == owner_id, Supplier.name.in_(chunk)).order_by(Supplier.id.desc()):
+            existing[supplier.name] = supplier.id
+    values = {name: {key: value for key, value in item.items() if key != "row_number"} for name, item in parsed.items()}
+    updates = [{"id": existing[name], **item} for name, item in values.items() if name in existing]
+    inserts = [{"owner_id": owner_id, **item} for name, item in values.items() if name not in existing]
+    try:
+        for chunk in _chunks(updates):
+            db.execute(update(Supplier), chunk)
+        for chunk in _chunks(inserts):
+            db.execute(insert(Supplier), chunk)
+        if commit:
+            db.commit()
         else:
-            updated += 1
-        existing.email = row.get("email") or None
-        existing.phone = row.get("phone") or None
-        existing.address = row.get("address") or None
-        existing.lead_time_days = lead_time_days
-        db.add(existing)
-        db.commit()
-    return {"entity": "suppliers", "created": created, "updated": updated, "warnings": []}
+            db.flush()
+    except Exception:
+        db.rollback()
+        raise
+    return {"entity": "suppliers", "created": len(inserts), "updated": len(updates), "warnings": [], "errors": _row_errors(errors)}
 
 
-def export_sales_csv(db: Session, *, user: User) -> str:
+def export_sales_csv(db: Session, *, user: User) -> Iterator[str]:
     sales = (
-        db.query(Sale, Product)
+        db.query(
+            Sale.id,
+            Sale.sale_date,
+            Product.sku,
+            Product.name,
+            Sale.quantity,
+            Sale.unit_price,
+            Sale.total_amount,
+            Sale.customer_id,
+            Sale.order_id,
+        )
         .join(Product, Product.id == Sale.product_id)
         .filter(Sale.owner_id == user.id)
         .order_by(Sale.sale_date.desc())
-        .all()
+        .yield_per(CSV_EXPORT_BATCH_SIZE)
     )
-    rows = [
+    rows = (
         {
             "sale_id": sale.id,
             "sale_date": sale.sale_date.isoformat() if sale.sale_date else "",
-            "sku": product.sku,
-            "product_name": product.name,
+            "sku": sale.sku,
+            "product_name": sale.name,
             "quantity": sale.quantity,
             "unit_price": sale.unit_price,
             "total_amount": sale.total_amount,
             "customer_id": sale.customer_id or "",
             "order_id": sale.order_id or "",
         }
-        for sale, product in sales
-    ]
-    return _to_csv(
+        for sale in sales
+    )
+    return _stream_csv(
         ["sale_id", "sale_date", "sku", "product_name", "quantity", "unit_price", "total_amount", "customer_id", "order_id"],
         rows,
     )
 
 
-def export_purchase_orders_csv(db: Session, *, user: User) -> str:
-    orders = list_purchase_orders(db, owner_id=user.id)
-    rows: list[dict[str, object]] = []
-    for order in orders:
-        if not order.items:
-            rows.append(
-                {
-                    "po_number": order.po_number,
-                    "status": order.status,
-                    "supplier_id": order.supplier_id or "",
-                    "order_date": order.order_date.isoformat() if order.order_date else "",
-                    "expected_arrival_date": order.expected_arrival_date.isoformat() if order.expected_arrival_date else "",
-                    "product_id": "",
-                    "warehouse_id": "",
-                    "quantity_ordered": "",
-                    "quantity_received": "",
-                    "unit_cost": "",
-                    "notes": order.notes or "",
-                }
-            )
+def import_sales_csv(db: Session, *, user: User, csv_text: str) -> dict[str, object]:
+    result = import_sale_rows(db, owner_id=user.id, rows=enumerate(_read_rows(csv_text), start=2))
+    if result["created"]:
+        refresh_sales_aggregates(db, owner_id=user.id, start_date=result["first_sale_date"])
+    return result
+
+
+def import_sale_rows(
+    db: Session,
+    *,
+    owner_id: int,
+    rows: Iterable[tuple[int, dict[str, str]]],
+    strict: bool = True,
+    commit: bool = True,
+) -> dict[str, object]:
+    """Insert historical sales with their SALE_SHIPPED movements in batches.
+
+    Movements are dated at their sale. Current stock already reflects these sales, so each
+    (product, warehouse) also gets an opening-balance receipt for the quantity sold, dated at
+    its first imported sale, and the import leaves stock balances unchanged.
+
+    Derived aggregates are left to `refresh_sales_aggregates`, which callers run once the
+    whole import is written.
+    """
+    rows = list(rows)
+    errors: list[tuple[int, str]] = []
+    skus = list({row.get("sku", "") for _, row in rows} - {""})
+    codes = list({row.get("warehouse_code", "") for _, row in rows} - {""})
+    product_ids: dict[str, int] = {}
+    for chunk in _chunks(skus):
+        product_ids.update(db.query(Product.sku, Product.id).filter(Product.owner_id == owner_id, Product.sku.in_(chunk)).all())
+    warehouse_ids: dict[str, int] = {}
+    for chunk in _chunks(codes):
+        warehouse_ids.update(db.query(Warehouse.code, Warehouse.id).filter(Warehouse.owner_id == owner_id, Warehouse.code.in_(chunk)).all())
+    horizon = get_ledger_archive_horizon(db)
+
+    sales = []
+    for index, row in rows:
+        sku = row.get("sku", "")
+        code = row.get("warehouse_code", "")
+        if not sku:
+            errors.append((index, f"Row {index}: sku is required."))
+            continue
+        if sku not in product_ids:
+            errors.append((index, f"Row {index}: unknown sku {sku}."))
             continue
-        for item in order.items:
-            rows.append(
+        if code and code not in warehouse_ids:
+            errors.append((index, f"Row {index}: unknown warehouse_code {code}."))
+            continue
+        try:
+            quantity = _parse_int(row.get("quantity", ""), field="quantity", row_number=index)
+            unit_price = _parse_float(row.get("unit_price", ""), field="unit_price", row_number=index)
+            total_amount = _parse_float(row.get("total_amount", ""), field="total_amount", row_number=index)
+            sale_date = _parse_datetime(row.get("sale_date", ""), field="sale_date", row_number=index)
+        except HTTPException as exc:
+            errors.append((index, str(exc.detail)))
+            continue
+        if quantity is None or quantity <= 0 or unit_price is None or sale_date is None:
+            errors.append((index, f"Row {index}: a positive quantity, unit_price and sale_date are required."))
+            continue
+        if horizon is not None and _utc_date(sale_date) < horizon:
+            errors.append((index, f"Row {index}: sale_date is before {horizon.isoformat()}, where ledger history is archived."))
+            continue
+        sales.append(
+            {
+                "product_id": product_ids[sku],
+                "quantity": quantity,
+                "unit_price": unit_price,
+                "total_amount": total_amount if total_amount is not None else quantity * unit_price,
+                "sale_date": sale_date,
+                "customer_id": row.get("customer_id") or None,
+                "order_id": row.get("order_id") or None,
+                "owner_id": owner_id,
+                "warehouse_id": warehouse_ids.get(code),
+            }
+        )
+    if strict:
+        _raise_row_errors(errors)
+
+    if any(sale["warehouse_id"] is None for sale in sales):
+        default_warehouse_id = get_default_warehouse(db, owner_id=owner_id).id
+        for sale in sales:
+            sale["warehouse_id"] = sale["warehouse_id"] or default_warehouse_id
+
+    openings: dict[tuple[int, int], dict[str, object]] = {}
+    for sale in sales:
+        key = (sale["product_id"], sale["warehouse_id"])
+        opening = openings.setdefault(
+            key,
+            {
+                "product_id": key[0],
+                "warehouse_id": key[1],
+                "transaction_type": "ADJUSTMENT_POSITIVE",
+                "quantity": 0,
+                "direction": "IN",
+                "reference_type": "SALES_HISTORY_IMPORT",
+                "reason": "Opening balance for imported sales history",
+                "created_at": sale["sale_date"],
+            },
+        )
+        opening["quantity"] += sale["quantity"]
+        opening["created_at"] = min(opening["created_at"], sale["sale_date"], key=_utc_timestamp)
+
+    try:
+        movements = list(openings.values())
+        for chunk in _chunks(sales):
+            statement = insert(Sale).returning(Sale.id, sort_by_parameter_order=True)
+            sale_ids = db.execute(statement, [{key: value for key, value in sale.items() if key != "warehouse_id"} for sale in chunk]).scalars().all()
+            movements.extend(
                 {
-                    "po_number": order.po_number,
-                    "status": order.status,
-                    "supplier_id": order.supplier_id or "",
-                    "order_date": order.order_date.isoformat() if order.order_date else "",
-                    "expected_arrival_date": order.expected_arrival_date.isoformat() if order.expected_arrival_date else "",
-                    "product_id": item.product_id,
-                    "warehouse_id": item.warehouse_id or "",
-                    "quantity_ordered": item.quantity_ordered,
-                    "quantity_received": item.quantity_received,
-                    "unit_cost": item.unit_cost,
-                    "notes": order.notes or "",
+                    "product_id": sale["product_id"],
+                    "warehouse_id": sale["warehouse_id"],
+                    "transaction_type": "SALE_SHIPPED",
+                    "quantity": sale["quantity"],
+                    "direction": "OUT",
+                    "reference_type": "SALE",
+                    "reference_id": sale_id,
+                    "reason": "Sale imported from history",
+                    "created_at": sale["sale_date"],
                 }
+                for sale, sale_id in zip(chunk, sale_ids)
             )
-    return _to_csv(
+        create_inventory_transactions_bulk(db, movements, created_by=owner_id, commit=False)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+    except Exception:
+        db.rollback()
+        raise
+
+    first_sale_date = min((_utc_date(sale["sale_date"]) for sale in sales), default=None)
+    return {
+        "entity": "sales",
+        "created": len(sales),
+        "updated": 0,
+        "warnings": [],
+        "errors": _row_errors(errors),
+        "first_sale_date": first_sale_date,
+    }
+
+
+def _utc_timestamp(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc)
+    return value.replace(tzinfo=timezone.utc)
+
+
+def _utc_date(value: datetime) -> date:
+    return _utc_timestamp(value).date()
+
+
+def refresh_sales_aggregates(db: Session, *, owner_id: int, start_date: date | None = None, commit: bool = True) -> None:
+    """Rebuild the tenant's daily rollup, week cube and stock checkpoints from `start_date` after a bulk sales load."""
+    try:
+        rebuild_sales_daily_rollup(db, owner_id=owner_id, start_date=start_date, commit=False)
+        rebuild_product_week_cube(db, owner_id=owner_id, start_date=start_date, commit=False)
+        rebuild_stock_checkpoints(db, owner_id=owner_id, start_date=start_date, commit=False)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+    except Exception:
+        db.rollback()
+        raise
+    invalidate_tenant_frame(db, owner_id)
+
+
+def export_purchase_orders_csv(db: Session, *, user: User) -> Iterator[str]:
+    # One row per item, or a single row with empty item columns for an order without items.
+    lines = (
+        db.query(
+            PurchaseOrder.po_number,
+            PurchaseOrder.status,
+            PurchaseOrder.supplier_id,
+            PurchaseOrder.order_date,
+            PurchaseOrder.expected_arrival_date,
+            PurchaseOrder.notes,
+            PurchaseOrderItem.product_id,
+            PurchaseOrderItem.warehouse_id,
+            PurchaseOrderItem.quantity_ordered,
+            PurchaseOrderItem.quantity_received,
+            PurchaseOrderItem.unit_cost,
+        )
+        .outerjoin(PurchaseOrderItem, PurchaseOrderItem.purchase_order_id == PurchaseOrder.id)
+        .filter(PurchaseOrder.owner_id == user.id)
+        .order_by(PurchaseOrder.created_at.desc(), PurchaseOrder.id.desc(), PurchaseOrderItem.id.asc())
+        .yield_per(CSV_EXPORT_BATCH_SIZE)
+    )
+    rows = (
+        {
+            "po_number": line.po_number,
+            "status": line.status,
+            "supplier_id": line.supplier_id or "",
+            "order_date": line.order_date.isoformat() if line.order_date else "",
+            "expected_arrival_date": line.expected_arrival_date.isoformat() if line.expected_arrival_date else "",
+            "product_id": line.product_id if line.product_id is not None else "",
+            "warehouse_id": line.warehouse_id or "",
+            "quantity_ordered": line.quantity_ordered if line.quantity_ordered is not None else "",
+            "quantity_received": line.quantity_received if line.quantity_received is not None else "",
+            "unit_cost": line.unit_cost if line.unit_cost is not None else "",
+            "notes": line.notes or "",
+        }
+        for line in lines
+    )
+    return _stream_csv(
         [
             "po_number",
             "status",
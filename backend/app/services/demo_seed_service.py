@@ -5,17 +5,18 @@ from datetime import datetime, timedelta
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
-from app.models import AgentRecommendation, Customer, PortOrNode, Product, RiskAlert, Sale, Supplier, User, Warehouse
+from app.models import AgentRecommendation, Customer, InventoryTransaction, PortOrNode, Product, RiskAlert, Sale, Supplier, User, Warehouse
 from app.services.logistics_service import add_shipment_leg, create_route, create_shipment, update_shipment_status
 from app.services.purchasing_service import create_purchase_order, mark_purchase_order_ordered, receive_purchase_order_item
 from app.services.returns_service import approve_return_order, create_return_order, receive_return_item
+from app.services.product_cube_service import record_sales_in_cube
+from app.services.sales_rollup_service import record_sales_in_rollup
 from app.services.sales_service import confirm_sales_order, create_sales_order, fulfill_sales_order_item
 from app.services.stock_ledger_service import (
     adjust_stock,
     create_inventory_transaction,
-    receive_purchase,
+    create_inventory_transactions_bulk,
     reserve_stock,
-    sync_product_current_stock,
     transfer_stock,
 )
 
@@ -168,22 +169,29 @@ def _ensure_demo_inventory(db: Session, owner_id: int, products: dict[str, Produ
         ("SKU-DEMO-007", main.id, 37),
         ("SKU-DEMO-008", klang.id, 90),
     ]
-    for sku, warehouse_id, quantity in seed_ops:
-        ref = f"DEMO-RECEIVE-{sku}-{warehouse_id}"
-        tx_exists = db.execute(
-            text("SELECT 1 FROM inventory_transactions WHERE reference_id = :ref LIMIT 1"),
-            {"ref": ref},
-        ).first()
-        if tx_exists:
-            continue
-        receive_purchase(
-            db,
-            product_id=products[sku].id,
-            warehouse_id=warehouse_id,
-            quantity=quantity,
-            reference_id=ref,
-            created_by=owner_id,
-        )
+    refs = {f"DEMO-RECEIVE-{sku}-{warehouse_id}": (sku, warehouse_id, quantity) for sku, warehouse_id, quantity in seed_ops}
+    existing_refs = {
+        row.reference_id
+        for row in db.query(InventoryTransaction.reference_id).filter(InventoryTransaction.reference_id.in_(refs)).all()
+    }
+    create_inventory_transactions_bulk(
+        db,
+        [
+            {
+                "product_id": products[sku].id,
+                "warehouse_id": warehouse_id,
+                "transaction_type": "PURCHASE_RECEIVED",
+                "quantity": quantity,
+                "direction": "IN",
+                "reference_type": "PURCHASE",
+                "reference_id": ref,
+                "reason": "Purchase received",
+            }
+            for ref, (sku, warehouse_id, quantity) in refs.items()
+            if ref not in existing_refs
+        ],
+        created_by=owner_id,
+    )
     if not db.execute(text("SELECT 1 FROM stock_reservations WHERE reference_id = 'DEMO-SO-RESERVE-1' LIMIT 1")).first():
         reserve_stock(
             db,
@@ -241,8 +249,6 @@ def _ensure_demo_inventory(db: Session, owner_id: int, products: dict[str, Produ
             created_by=owner_id,
         )
         db.commit()
-    for product in products.values():
-        sync_product_current_stock(db, product.id)
 
 
 def _ensure_demo_sales(db: Session, owner_id: int, products: dict[str, Product], customers: dict[str, Customer], warehouses: dict[str, Warehouse]) -> None:
@@ -252,6 +258,7 @@ def _ensure_demo_sales(db: Session, owner_id: int, products: dict[str, Product],
             ("DEMO-SALE-2", "SKU-DEMO-002", 9, 31.0, customers["Demo Marketplace Store"].id, datetime.utcnow() - timedelta(days=4)),
             ("DEMO-SALE-3", "SKU-DEMO-006", 5, 85.0, customers["Demo Retail Buyer"].id, datetime.utcnow() - timedelta(days=6)),
         ]
+        demo_sales = []
         for order_id, sku, quantity, unit_price, customer_id, sale_date in sales_rows:
             sale = Sale(
                 product_id=products[sku].id,
@@ -264,6 +271,9 @@ def _ensure_demo_sales(db: Session, owner_id: int, products: dict[str, Product],
                 owner_id=owner_id,
             )
             db.add(sale)
+            demo_sales.append(sale)
+        record_sales_in_rollup(db, demo_sales)
+        record_sales_in_cube(db, demo_sales)
         db.commit()
     if not db.query(RiskAlert).filter(RiskAlert.owner_id == owner_id, RiskAlert.alert_type == "low_stock").first():
         db.add(
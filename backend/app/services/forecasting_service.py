@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models import DemandForecast, Product
+from app.services import analytics_engine, sales_rollup_service
+
+DEFAULT_HISTORY_DAYS = 90
+FALLBACK_LOOKBACK_DAYS = 30
+SES_ALPHA = 0.2
+CROSTON_ALPHA = 0.1
+SEASON_DAYS = 7
+# Syntetos-Boylan cut-off: an average demand interval above this is treated as intermittent.
+INTERMITTENT_ADI = 1.32
+
+METHOD_SES = "SES"
+METHOD_CROSTON = "CROSTON"
+METHOD_SEASONAL_NAIVE = "SEASONAL_NAIVE"
+METHOD_NO_DEMAND = "NO_DEMAND"
+METHOD_TRAILING_AVERAGE = "TRAILING_AVERAGE"
+
+
+def exponential_smoothing(series: np.ndarray, alpha: float = SES_ALPHA) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Simple exponential smoothing of every row; returns (level, one-step MAE, one-step residual std)."""
+    level = series[:, 0].astype(np.float64)
+    abs_error = np.zeros(series.shape[0])
+    squared_error = np.zeros(series.shape[0])
+    for day in range(1, series.shape[1]):
+        error = series[:, day] - level
+        abs_error += np.abs(error)
+        squared_error += error**2
+        level = level + alpha * error
+    steps = max(series.shape[1] - 1, 1)
+    return level, abs_error / steps, np.sqrt(squared_error / steps)
+
+
+def croston(series: np.ndarray, alpha: float = CROSTON_ALPHA) -> np.ndarray:
+    """Croston's method with the Syntetos-Boylan bias correction, per row."""
+    rows = series.shape[0]
+    size = np.zeros(rows)
+    # Seed the interval with the row's average demand interval rather than the gap before the first sale.
+    interval = series.shape[1] / np.maximum((series > 0).sum(axis=1), 1)
+    since_last = np.ones(rows)
+    seen = np.zeros(rows, dtype=bool)
+    for day in range(series.shape[1]):
+        demand = series[:, day]
+        hit = demand > 0
+        first = hit & ~seen
+        size[first] = demand[first]
+        update = hit & seen
+        size[update] += alpha * (demand[update] - size[update])
+        interval[update] += alpha * (since_last[update] - interval[update])
+        seen |= hit
+        since_last = np.where(hit, 1.0, since_last + 1.0)
+    return np.where(seen, (1 - alpha / 2) * size / interval, 0.0)
+
+
+def seasonal_naive(series: np.ndarray, season: int = SEASON_DAYS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Repeat the last season; returns (mean daily forecast, seasonal MAE, seasonal residual std)."""
+    if series.shape[1] <= season:
+        empty = np.full(series.shape[0], np.inf)
+        return series.mean(axis=1) if series.shape[1] else np.zeros(series.shape[0]), empty, empty
+    error = series[:, season:] - series[:, :-season]
+    return series[:, -season:].mean(axis=1), np.abs(error).mean(axis=1), error.std(axis=1)
+
+
+def fit_demand_forecasts(series: np.ndarray) -> dict[str, np.ndarray]:
+    """Fit every row of a (products, days) demand matrix and pick one model per row.
+
+    Intermittent rows use Croston. The rest use whichever of exponential smoothing and
+    seasonal naive had the lower in-sample one-step error.
+    """
+    rows, days = series.shape
+    if rows == 0 or days == 0:
+        return {
+            "method": np.full(rows, METHOD_NO_DEMAND, dtype=object),
+            "daily_demand": np.zeros(rows),
+            "demand_std": np.zeros(rows),
+        }
+
+    demand_days = (series > 0).sum(axis=1)
+    ses_level, ses_mae, ses_std = exponential_smoothing(series)
+    seasonal_level, seasonal_mae, seasonal_std = seasonal_naive(series)
+    croston_rate = croston(series)
+
+    intermittent = (demand_days > 0) & (days / np.maximum(demand_days, 1) > INTERMITTENT_ADI)
+    use_seasonal = ~intermittent & (seasonal_mae < ses_mae)
+    method = np.where(intermittent, METHOD_CROSTON, np.where(use_seasonal, METHOD_SEASONAL_NAIVE, METHOD_SES)).astype(object)
+    method[demand_days == 0] = METHOD_NO_DEMAND
+    daily_demand = np.where(intermittent, croston_rate, np.where(use_seasonal, seasonal_level, ses_level))
+    demand_std = np.where(intermittent, series.std(axis=1), np.where(use_seasonal, seasonal_std, ses_std))
+    return {
+        "method": method,
+        "daily_demand": np.clip(daily_demand, 0.0, None),
+        "demand_std": np.where(demand_days == 0, 0.0, demand_std),
+    }
+
+
+def refresh_demand_forecasts(
+    db: Session,
+    *,
+    owner_id: int,
+    history_days: int = DEFAULT_HISTORY_DAYS,
+    commit: bool = True,
+) -> int:
+    """Refit and store forecasts for every product of a tenant from its last `history_days` complete days."""
+    if history_days < 2:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="history_days must be at least 2")
+    end_date = datetime.utcnow().date() - timedelta(days=1)
+    frame = analytics_engine.get_tenant_frame(db, owner_id)
+    series = analytics_engine.daily_units(frame, end_date - timedelta(days=history_days - 1), end_date)
+    fitted = fit_demand_forecasts(series)
+    fitted_at = datetime.utcnow()
+    rows = [
+        {
+            "owner_id": owner_id,
+            "product_id": int(product_id),
+            "method": fitted["method"][index],
+            "daily_demand": float(fitted["daily_demand"][index]),
+            "demand_std": float(fitted["demand_std"][index]),
+            "history_days": history_days,
+            "fitted_at": fitted_at,
+        }
+        for index, product_id in enumerate(frame.product_ids)
+    ]
+
+    try:
+        db.query(DemandForecast).filter(DemandForecast.owner_id == owner_id).delete(synchronize_session=False)
+        if rows:
+            db.execute(insert(DemandForecast), rows)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def refresh_all_demand_forecasts(db: Session, *, history_days: int = DEFAULT_HISTORY_DAYS, commit: bool = True) -> int:
+    owner_ids = [row.owner_id for row in db.query(Product.owner_id).filter(Product.owner_id.is_not(None)).distinct()]
+    return sum(refresh_demand_forecasts(db, owner_id=owner_id, history_days=history_days, commit=commit) for owner_id in owner_ids)
+
+
+def get_demand_forecasts(
+    db: Session,
+    product_ids: Iterable[int],
+    *,
+    owner_id: int,
+    fallback_lookback_days: Optional[int] = FALLBACK_LOOKBACK_DAYS,
+) -> dict[int, dict]:
+    """Stored forecasts by product id.
+
+    Products without one fall back to a trailing average from the sales rollup, or are left
+    out when `fallback_lookback_days` is None.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    forecasts = {
+        row.product_id: {
+            "method": row.method,
+            "daily_demand": float(row.daily_demand),
+            "demand_std": float(row.demand_std),
+            "fitted_at": row.fitted_at,
+        }
+        for row in db.query(DemandForecast).filter(DemandForecast.owner_id == owner_id, DemandForecast.product_id.in_(product_ids))
+    }
+    missing = [product_id for product_id in product_ids if product_id not in forecasts]
+    if missing and fallback_lookback_days:
+        start_date = datetime.utcnow().date() - timedelta(days=fallback_lookback_days)
+        units = sales_rollup_service.get_units_sold_by_product(db, missing, owner_id=owner_id, start_date=start_date)
+        for product_id in missing:
+            forecasts[product_id] = {
+                "method": METHOD_TRAILING_AVERAGE,
+                "daily_demand": units.get(product_id, 0) / fallback_lookback_days,
+                "demand_std": None,
+                "fitted_at": None,
+            }
+    return forecasts
+
+
+def get_demand_forecast(
+    db: Session,
+    product_id: int,
+    *,
+    owner_id: int,
+    fallback_lookback_days: Optional[int] = FALLBACK_LOOKBACK_DAYS,
+) -> Optional[dict]:
+    return get_demand_forecasts(db, [product_id], owner_id=owner_id, fallback_lookback_days=fallback_lookback_days).get(product_id)
+
+
+def days_of_cover(available: float, daily_demand: Optional[float]) -> Optional[float]:
+    if not daily_demand or daily_demand <= 0:
+        return None
+    return available / daily_demand
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import BinaryIO, Iterator, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.models import ImportJob, ImportJobError
+from app.services.csv_service import (
+    import_product_rows,
+    import_sale_rows,
+    import_supplier_rows,
+    import_warehouse_rows,
+    refresh_sales_aggregates,
+)
+
+# Rows written and committed together; a resumed job restarts at the first uncommitted chunk.
+IMPORT_JOB_CHUNK_SIZE = 5000
+# A RUNNING job that has not committed a chunk for this long is treated as crashed.
+IMPORT_JOB_STALE_SECONDS = 10 * 60
+IMPORT_UPLOAD_COPY_BYTES = 1024 * 1024
+
+IMPORT_ROW_HANDLERS = {
+    "products": import_product_rows,
+    "warehouses": import_warehouse_rows,
+    "suppliers": import_supplier_rows,
+    "sales": import_sale_rows,
+}
+# Run once after the last chunk, or after a failure that left committed chunks behind, for entities
+# whose derived aggregates are rebuilt from the job's first sale date rather than maintained per row.
+IMPORT_FINALIZERS = {
+    "sales": refresh_sales_aggregates,
+}
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+def get_import_job_dir() -> str:
+    path = os.getenv("IMPORT_JOB_DIR") or os.path.join(tempfile.gettempdir(), "intelliflow-imports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _open_reader(handle) -> csv.DictReader:
+    reader = csv.DictReader(handle)
+    if not reader.fieldnames:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="CSV header row is required.")
+    return reader
+
+
+def _is_ndjson(path: str) -> bool:
+    return path.lower().endswith(NDJSON_SUFFIXES)
+
+
+def _ndjson_rows(handle) -> Iterator[tuple[int, dict[str, str]]]:
+    # Values are handed to the row handlers as strings, the same as CSV cells; rows are numbered by line.
+    for index, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise ValueError(f"Line {index}: invalid JSON.") from exc
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {index}: expected a JSON object.")
+        yield index, {key: "" if value is None else str(value).strip() for key, value in record.items()}
+
+
+def _read_chunks(path: str, *, skip: int) -> Iterator[list[tuple[int, dict[str, str]]]]:
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        if _is_ndjson(path):
+            rows = _ndjson_rows(handle)
+        else:
+            rows = (
+                (index, {key: (value or "").strip() for key, value in row.items()})
+                for index, row in enumerate(_open_reader(handle), start=2)
+            )
+        # Rows before the resume point were committed by an earlier run.
+        next(islice(rows, skip, skip), None)
+        while chunk := list(islice(rows, IMPORT_JOB_CHUNK_SIZE)):
+            yield chunk
+
+
+def _count_rows(path: str) -> int:
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        if _is_ndjson(path):
+            return sum(1 for line in handle if line.strip())
+        return sum(1 for _ in _open_reader(handle))
+
+
+def create_import_job(
+    db: Session,
+    *,
+    owner_id: int,
+    entity: str,
+    upload: BinaryIO,
+    filename: Optional[str] = None,
+) -> ImportJob:
+    """Stage an uploaded CSV or NDJSON file on disk and queue it; rows are processed by `run_import_job`."""
+    if entity not in IMPORT_ROW_HANDLERS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported import entity: {entity}")
+
+    suffix = ".ndjson" if (filename or "").lower().endswith(NDJSON_SUFFIXES) else ".csv"
+    descriptor, path = tempfile.mkstemp(prefix=f"{entity}-", suffix=suffix, dir=get_import_job_dir())
+    try:
+        with os.fdopen(descriptor, "wb") as target:
+            shutil.copyfileobj(upload, target, IMPORT_UPLOAD_COPY_BYTES)
+        if suffix == ".csv":
+            with open(path, newline="", encoding="utf-8-sig") as handle:
+                _open_reader(handle)
+    except Exception:
+        _remove_file(path)
+        raise
+
+    job = ImportJob(owner_id=owner_id, entity=entity, status="PENDING", file_path=path, original_filename=filename)
+    try:
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+    except Exception:
+        db.rollback()
+        _remove_file(path)
+        raise
+
+
+def _claim_import_job(db: Session, job_id: int) -> bool:
+    # Conditional update so a job is only ever run by one worker at a time.
+    stale_before = datetime.utcnow() - timedelta(seconds=IMPORT_JOB_STALE_SECONDS)
+    result = db.execute(
+        update(ImportJob)
+        .where(
+            ImportJob.id == job_id,
+            or_(
+                ImportJob.status == "PENDING",
+                and_(ImportJob.status == "RUNNING", ImportJob.updated_at < stale_before),
+            ),
+        )
+        .values(status="RUNNING", updated_at=func.now())
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _finalize_import_job(db: Session, job: ImportJob, *, commit: bool) -> None:
+    finalize = IMPORT_FINALIZERS.get(job.entity)
+    if finalize is not None and job.first_sale_date is not None:
+        finalize(db, owner_id=job.owner_id, start_date=job.first_sale_date, commit=commit)
+
+
+def run_import_job(db: Session, job_id: int) -> Optional[ImportJob]:
+    """Process a queued or crashed job from its resume point, committing each chunk with its progress.
+
+    Returns None when another worker holds the job.
+    """
+    if not _claim_import_job(db, job_id):
+        return None
+    job = db.get(ImportJob, job_id)
+    handler = IMPORT_ROW_HANDLERS[job.entity]
+    try:
+        if not os.path.exists(job.file_path):
+            raise FileNotFoundError("The staged upload is no longer available.")
+        if job.total_rows is None:
+            job.total_rows = _count_rows(job.file_path)
+            db.commit()
+        for chunk in _read_chunks(job.file_path, skip=job.processed_rows):
+            result = handler(db, owner_id=job.owner_id, rows=chunk, strict=False, commit=False)
+            if result["errors"]:
+                db.execute(insert(ImportJobError), [{"job_id": job.id, **error} for error in result["errors"]])
+            job.processed_rows += len(chunk)
+            job.created_count += result["created"]
+            job.updated_count += result["updated"]
+            job.error_count += len(result["errors"])
+            job.warning_count += len(result["warnings"])
+            first_sale_date = result.get("first_sale_date")
+            if first_sale_date is not None and (job.first_sale_date is None or first_sale_date < job.first_sale_date):
+                job.first_sale_date = first_sale_date
+            db.commit()
+        _finalize_import_job(db, job, commit=False)
+    except Exception as exc:
+        db.rollback()
+        job.status = "FAILED"
+        job.failure_reason = str(exc.detail if isinstance(exc, HTTPException) else exc)
+        db.commit()
+        # Chunks committed before the failure are already live, so their aggregates must not wait for a retry.
+        _finalize_import_job(db, job, commit=True)
+        return job
+
+    # The finalizer's writes commit together with the completed status.
+    job.status = "COMPLETED"
+    job.completed_at = datetime.utcnow()
+    db.commit()
+    _remove_file(job.file_path)
+    return job
+
+
+def retry_import_job(db: Session, job_id: int, *, owner_id: int) -> ImportJob:
+    """Queue a failed job again; it continues after the last committed chunk."""
+    job = get_import_job(db, job_id, owner_id=owner_id)
+    if job.status != "FAILED":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only failed import jobs can be retried.")
+    job.status = "PENDING"
+    job.failure_reason = None
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def list_resumable_import_job_ids(db: Session) -> list[int]:
+    stale_before = datetime.utcnow() - timedelta(seconds=IMPORT_JOB_STALE_SECONDS)
+    return [
+        row.id
+        for row in db.query(ImportJob.id)
+        .filter(
+            or_(
+                ImportJob.status == "PENDING",
+                and_(ImportJob.status == "RUNNING", ImportJob.updated_at < stale_before),
+            )
+        )
+        .order_by(ImportJob.id.asc())
+    ]
+
+
+def get_import_job(db: Session, job_id: int, *, owner_id: int) -> ImportJob:
+    job = db.query(ImportJob).filter(ImportJob.id == job_id, ImportJob.owner_id == owner_id).first()
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return job
+
+
+def list_import_jobs(db: Session, *, owner_id: int, limit: int = 50) -> list[ImportJob]:
+    return (
+        db.query(ImportJob)
+        .filter(ImportJob.owner_id == owner_id)
+        .order_by(ImportJob.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def list_import_job_errors(db: Session, job_id: int, *, owner_id: int, offset: int = 0, limit: int = 100) -> list[ImportJobError]:
+    get_import_job(db, job_id, owner_id=owner_id)
+    return (
+        db.query(ImportJobError)
+        .filter(ImportJobError.job_id == job_id)
+        .order_by(ImportJobError.row_number.asc(), ImportJobError.id.asc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
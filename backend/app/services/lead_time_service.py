@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import String, and_, cast, func, or_
+from sqlalchemy.orm import Session
+
+from app.models import InventoryTransaction, PurchaseOrder, PurchaseOrderItem, Supplier, SupplierLeadTime
+
+LEAD_TIME_PERCENTILE = 0.9
+# Receipts slower than this land in the last histogram bucket.
+LEAD_TIME_HISTOGRAM_MAX_DAYS = 365
+# Receipts are folded only once they are this old. Ledger rows are stamped at transaction start, so
+# any transaction shorter than the lag has committed by then and none is skipped by the watermark.
+LEAD_TIME_FOLD_LAG = timedelta(minutes=10)
+
+LeadTimeKey = tuple[int, Optional[int]]
+
+
+def _utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def histogram_percentile(histogram: dict, quantile: float) -> float:
+    """Smallest whole-day bucket holding at least `quantile` of the receipts."""
+    total = sum(histogram.values())
+    if total == 0:
+        return 0.0
+    cumulative = 0
+    for day in sorted(histogram, key=int):
+        cumulative += histogram[day]
+        if cumulative >= quantile * total:
+            return float(day)
+    return float(max(histogram, key=int))
+
+
+def _merge_receipts(row: SupplierLeadTime, durations: list[float], folded_through: datetime) -> None:
+    # Chan et al. pairwise update: the stored count, mean and variance absorb the new batch exactly.
+    count = row.receipt_count or 0
+    mean = row.mean_days or 0.0
+    squares = (row.variance_days or 0.0) * count
+    batch_count = len(durations)
+    batch_mean = sum(durations) / batch_count
+    batch_squares = sum((duration - batch_mean) ** 2 for duration in durations)
+    total = count + batch_count
+    delta = batch_mean - mean
+    row.mean_days = mean + delta * batch_count / total
+    row.variance_days = (squares + batch_squares + delta**2 * count * batch_count / total) / total
+    row.receipt_count = total
+
+    # Buckets are lead times rounded to the nearest day.
+    histogram = dict(row.histogram or {})
+    for duration in durations:
+        bucket = str(min(round(duration), LEAD_TIME_HISTOGRAM_MAX_DAYS))
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    row.histogram = histogram
+    row.p90_days = histogram_percentile(histogram, LEAD_TIME_PERCENTILE)
+    row.folded_through = folded_through
+
+
+def refresh_supplier_lead_times(
+    db: Session,
+    *,
+    owner_id: int,
+    lag: timedelta = LEAD_TIME_FOLD_LAG,
+    commit: bool = True,
+) -> int:
+    """Fold purchase receipts posted since the last refresh, and at least `lag` ago, into the tenant's lead-time rows.
+
+    A receipt is a PURCHASE_RECEIVED ledger row referencing a purchase order item; its lead
+    time is the time from the order date to the ledger row. Returns the receipts added.
+    """
+    folded_through = datetime.now(timezone.utc) - lag
+    watermark = (
+        db.query(func.max(SupplierLeadTime.folded_through))
+        .filter(SupplierLeadTime.owner_id == owner_id)
+        .scalar()
+    )
+    receipts = (
+        db.query(
+            InventoryTransaction.created_at,
+            PurchaseOrderItem.product_id,
+            PurchaseOrder.supplier_id,
+            PurchaseOrder.order_date,
+        )
+        .join(
+            PurchaseOrderItem,
+            and_(
+                InventoryTransaction.reference_id == cast(PurchaseOrderItem.id, String),
+                InventoryTransaction.product_id == PurchaseOrderItem.product_id,
+            ),
+        )
+        .join(PurchaseOrder, PurchaseOrder.id == PurchaseOrderItem.purchase_order_id)
+        .filter(
+            InventoryTransaction.transaction_type == "PURCHASE_RECEIVED",
+            InventoryTransaction.reference_type == "PURCHASE",
+            InventoryTransaction.created_at <= folded_through,
+            PurchaseOrder.owner_id == owner_id,
+            PurchaseOrder.supplier_id.isnot(None),
+        )
+    )
+    if watermark is not None:
+        receipts = receipts.filter(InventoryTransaction.created_at > watermark)
+    receipts = receipts.all()
+    if not receipts:
+        return 0
+
+    durations: dict[LeadTimeKey, list[float]] = defaultdict(list)
+    for receipt in receipts:
+        days = max((_utc_naive(receipt.created_at) - _utc_naive(receipt.order_date)).total_seconds() / 86400, 0.0)
+        for key in ((receipt.supplier_id, receipt.product_id), (receipt.supplier_id, None)):
+            durations[key].append(days)
+
+    supplier_ids = {supplier_id for supplier_id, _ in durations}
+    existing = {
+        (row.supplier_id, row.product_id): row
+        for row in db.query(SupplierLeadTime).filter(
+            SupplierLeadTime.owner_id == owner_id,
+            SupplierLeadTime.supplier_id.in_(supplier_ids),
+        )
+    }
+    try:
+        for key, values in durations.items():
+            row = existing.get(key)
+            if row is None:
+                row = SupplierLeadTime(owner_id=owner_id, supplier_id=key[0], product_id=key[1], receipt_count=0, histogram={})
+                db.add(row)
+            _merge_receipts(row, values, folded_through)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return len(receipts)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def refresh_all_supplier_lead_times(db: Session, *, lag: timedelta = LEAD_TIME_FOLD_LAG, commit: bool = True) -> int:
+    owner_ids = [row.owner_id for row in db.query(PurchaseOrder.owner_id).filter(PurchaseOrder.owner_id.isnot(None)).distinct()]
+    return sum(refresh_supplier_lead_times(db, owner_id=owner_id, lag=lag, commit=commit) for owner_id in owner_ids)
+
+
+def _serialize(row: SupplierLeadTime) -> dict:
+    return {
+        "supplier_id": row.supplier_id,
+        "product_id": row.product_id,
+        "receipt_count": row.receipt_count,
+        "mean_days": row.mean_days,
+        "std_days": math.sqrt(row.variance_days),
+        "variance_days": row.variance_days,
+        "p90_days": row.p90_days,
+        "updated_at": row.updated_at,
+    }
+
+
+def get_lead_time_stats(db: Session, keys: Iterable[LeadTimeKey], *, owner_id: int) -> dict[LeadTimeKey, dict]:
+    """Stats for each (supplier id, product id) key, falling back to the supplier-wide row.
+
+    Keys without any observed receipts for the supplier are left out.
+    """
+    keys = list(dict.fromkeys(keys))
+    supplier_ids = {supplier_id for supplier_id, _ in keys}
+    if not supplier_ids:
+        return {}
+    product_ids = {product_id for _, product_id in keys if product_id is not None}
+    rows = {
+        (row.supplier_id, row.product_id): row
+        for row in db.query(SupplierLeadTime).filter(
+            SupplierLeadTime.owner_id == owner_id,
+            SupplierLeadTime.supplier_id.in_(supplier_ids),
+            or_(SupplierLeadTime.product_id.is_(None), SupplierLeadTime.product_id.in_(product_ids)),
+        )
+    }
+    stats = {}
+    for supplier_id, product_id in keys:
+        row = rows.get((supplier_id, product_id)) or rows.get((supplier_id, None))
+        if row is not None:
+            stats[(supplier_id, product_id)] = _serialize(row)
+    return stats
+
+
+def list_supplier_lead_times(
+    db: Session,
+    *,
+    owner_id: int,
+    supplier_id: Optional[int] = None,
+    product_id: Optional[int] = None,
+) -> list[dict]:
+    query = (
+        db.query(SupplierLeadTime, Supplier.name)
+        .join(Supplier, Supplier.id == SupplierLeadTime.supplier_id)
+        .filter(SupplierLeadTime.owner_id == owner_id)
+    )
+    if supplier_id is not None:
+        query = query.filter(SupplierLeadTime.supplier_id == supplier_id)
+    if product_id is not None:
+        query = query.filter(or_(SupplierLeadTime.product_id == product_id, SupplierLeadTime.product_id.is_(None)))
+    results = []
+    for row, supplier_name in query.order_by(SupplierLeadTime.supplier_id, SupplierLeadTime.product_id):
+        results.append({**_serialize(row), "supplier_name": supplier_name})
+    return results
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session
+
+from app.models import InventoryTransaction, LedgerArchive, StockCheckpoint
+from app.services.stock_ledger_service import (
+    STOCK_CHECKPOINT_FIELDS,
+    get_ledger_archive_horizon,
+    _utc_day,
+    write_stock_checkpoints,
+)
+
+LEDGER_TABLE = "inventory_transactions"
+LEDGER_DEFAULT_PARTITION = "inventory_transactions_default"
+LEDGER_PARTITION_MONTHS_AHEAD = 3
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _month_timestamp(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _month_bound(day: date) -> str:
+    return f"'{day.isoformat()} 00:00:00+00'"
+
+
+def ledger_partition_name(month_start: date) -> str:
+    return f"{LEDGER_TABLE}_p{month_start:%Y%m}"
+
+
+def is_ledger_partitioned(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    row = db.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table_name)"),
+        {"table_name": LEDGER_TABLE},
+    ).first()
+    return row is not None
+
+
+def _attached_partitions(db: Session) -> set[str]:
+    rows = db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table_name)"
+        ),
+        {"table_name": LEDGER_TABLE},
+    )
+    return {row.relname for row in rows}
+
+
+def ensure_ledger_partitions(
+    db: Session,
+    *,
+    months_ahead: int = LEDGER_PARTITION_MONTHS_AHEAD,
+    commit: bool = True,
+) -> list[str]:
+    """Create monthly ledger partitions from the current month through `months_ahead` months out.
+
+    Does nothing unless inventory_transactions is a partitioned PostgreSQL table.
+    """
+    if not is_ledger_partitioned(db):
+        return []
+
+    attached = _attached_partitions(db)
+    created: list[str] = []
+    month = _month_start(datetime.utcnow().date())
+    try:
+        for _ in range(months_ahead + 1):
+            name = ledger_partition_name(month)
+            if name not in attached:
+                # Rows that already landed in the default partition move with the new month,
+                # otherwise attaching the range would violate the default partition's constraint.
+                db.execute(text(f"CREATE TABLE {name} (LIKE {LEDGER_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+                db.execute(
+                    text(
+                        f"WITH moved AS (DELETE FROM {LEDGER_DEFAULT_PARTITION} "
+                        "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                        f"INSERT INTO {name} SELECT * FROM moved"
+                    ),
+                    {"start": _month_timestamp(month), "end": _month_timestamp(_next_month(month))},
+                )
+                db.execute(
+                    text(
+                        f"ALTER TABLE {LEDGER_TABLE} ATTACH PARTITION {name} "
+                        f"FOR VALUES FROM ({_month_bound(month)}) TO ({_month_bound(_next_month(month))})"
+                    )
+                )
+                created.append(name)
+            month = _next_month(month)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return created
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _write_checkpoint_baseline(db: Session, baseline_date: date) -> int:
+    """Copy each pair's latest checkpoint onto `baseline_date` so the archive horizon has a full opening balance."""
+    latest = (
+        db.query(
+            StockCheckpoint.product_id,
+            StockCheckpoint.warehouse_id,
+            func.max(StockCheckpoint.checkpoint_date).label("checkpoint_date"),
+        )
+        .filter(StockCheckpoint.checkpoint_date <= baseline_date)
+        .group_by(StockCheckpoint.product_id, StockCheckpoint.warehouse_id)
+        .subquery()
+    )
+    rows = [
+        {
+            "product_id": checkpoint.product_id,
+            "warehouse_id": checkpoint.warehouse_id,
+            "checkpoint_date": baseline_date,
+            **{field: getattr(checkpoint, field) for field in STOCK_CHECKPOINT_FIELDS},
+        }
+        for checkpoint in db.query(StockCheckpoint).join(
+            latest,
+            (latest.c.product_id == StockCheckpoint.product_id)
+            & (latest.c.warehouse_id == StockCheckpoint.warehouse_id)
+            & (latest.c.checkpoint_date == StockCheckpoint.checkpoint_date),
+        )
+        if checkpoint.checkpoint_date < baseline_date
+    ]
+    if rows:
+        db.execute(insert(StockCheckpoint), rows)
+    return len(rows)
+
+
+def archive_ledger_history(db: Session, *, before: date, commit: bool = True) -> dict:
+    """Compact every ledger month before `before` into checkpoints, then detach or drop its rows.
+
+    On a partitioned PostgreSQL ledger each month's partition is detached and kept as a standalone
+    table for cold storage. Elsewhere the compacted rows are deleted. Stock balances never read
+    archived rows, and balance rebuilds start from the checkpoints dated the day before `before`.
+    """
+    if before.day != 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="before must be the first day of a month")
+    if before > _month_start(datetime.utcnow().date()):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only closed months can be archived")
+
+    horizon = get_ledger_archive_horizon(db)
+    result = {"before": before, "checkpoints_written": 0, "months": []}
+    if horizon is not None and before <= horizon:
+        return result
+    first_movement: Optional[datetime] = (
+        db.query(func.min(InventoryTransaction.created_at))
+        .filter(InventoryTransaction.created_at < _month_timestamp(before))
+        .scalar()
+    )
+    if first_movement is None:
+        return result
+
+    try:
+        baseline_date = before - timedelta(days=1)
+        result["checkpoints_written"] = write_stock_checkpoints(db, through_date=baseline_date, commit=False)
+        result["checkpoints_written"] += _write_checkpoint_baseline(db, baseline_date)
+
+        partitioned = is_ledger_partitioned(db)
+        attached = _attached_partitions(db) if partitioned else set()
+        first_month = _month_start(_utc_day(first_movement))
+        month = max(first_month, horizon) if horizon is not None else first_month
+        while month < before:
+            month_end = _next_month(month)
+            month_filter = (
+                InventoryTransaction.created_at >= _month_timestamp(month),
+                InventoryTransaction.created_at < _month_timestamp(month_end),
+            )
+            row_count = db.query(func.count(InventoryTransaction.id)).filter(*month_filter).scalar() or 0
+            name = ledger_partition_name(month)
+            partition_name = None
+            if name in attached:
+                db.execute(text(f"ALTER TABLE {LEDGER_TABLE} DETACH PARTITION {name}"))
+                partition_name = name
+            # Stray rows in the default partition, or the whole month on an unpartitioned ledger.
+            db.query(InventoryTransaction).filter(*month_filter).delete(synchronize_session=False)
+            db.add(
+                LedgerArchive(
+                    period_start=month,
+                    period_end=month_end,
+                    partition_name=partition_name,
+                    row_count=row_count,
+                )
+            )
+            result["months"].append(
+                {"period_start": month, "period_end": month_end, "partition_name": partition_name, "row_count": row_count}
+            )
+            month = month_end
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return result
+    except Exception:
+        db.rollback()
+        raise
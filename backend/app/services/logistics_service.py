@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import HTTPException, status
@@ -13,15 +13,14 @@ from app.models import (
     PurchaseOrder,
     PurchaseOrderItem,
     Route,
-    Sale,
     SalesOrder,
     SalesOrderItem,
     Shipment,
     ShipmentLeg,
     StockTransfer,
 )
-from app.services import purchasing_service, sales_service
-from app.services.stock_ledger_service import get_available
+from app.services import forecasting_service, purchasing_service, sales_service
+from app.services.stock_ledger_service import get_stock_positions
 
 
 def _generate_shipment_number(db: Session, *, owner_id: int) -> str:
@@ -37,39 +36,33 @@ def _normalize_dt(value: Optional[datetime]) -> Optional[datetime]:
     return value
 
 
-def _estimate_inventory_cover_days(db: Session, product_id: int) -> Optional[float]:
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30)
-    sales = (
-        db.query(Sale)
-        .filter(Sale.product_id == product_id, Sale.sale_date >= start_date, Sale.sale_date <= end_date)
-        .all()
-    )
-    units_sold = sum(sale.quantity for sale in sales)
-    average_daily_demand = units_sold / 30.0 if units_sold > 0 else 0.0
-    if average_daily_demand <= 0:
-        return None
-    available = get_available(db, product_id)
-    return available / average_daily_demand
-
-
-def _product_summary(db: Session, product_id: int, quantity: int) -> dict:
-    product = db.query(Product).filter(Product.id == product_id).first()
-    cover_days = _estimate_inventory_cover_days(db, product_id)
-    return {
-        "product_id": product_id,
-        "sku": product.sku if product else None,
-        "product_name": product.name if product else None,
-        "quantity": quantity,
-        "inventory_cover_remaining_days": cover_days,
-        "available_stock": get_available(db, product_id),
-    }
+def _product_summaries(db: Session, quantities: list[tuple[int, int]], *, owner_id: int) -> list[dict]:
+    product_ids = [product_id for product_id, _ in quantities]
+    products = {product.id: product for product in db.query(Product).filter(Product.id.in_(product_ids))}
+    positions = get_stock_positions(db, product_ids)
+    forecasts = forecasting_service.get_demand_forecasts(db, product_ids, owner_id=owner_id)
+    summaries = []
+    for product_id, quantity in quantities:
+        product = products.get(product_id)
+        available = positions[product_id]["available"]
+        forecast = forecasts.get(product_id)
+        summaries.append(
+            {
+                "product_id": product_id,
+                "sku": product.sku if product else None,
+                "product_name": product.name if product else None,
+                "quantity": quantity,
+                "inventory_cover_remaining_days": forecasting_service.days_of_cover(available, forecast["daily_demand"] if forecast else None),
+                "available_stock": available,
+            }
+        )
+    return summaries
 
 
 def _resolve_related_context(db: Session, shipment: Shipment, *, owner_id: int) -> dict:
     affected_purchase_orders: list[dict] = []
     affected_sales_orders: list[dict] = []
-    affected_products: list[dict] = []
+    product_quantities: list[tuple[int, int]] = []
     revenue_at_risk = None
 
     if shipment.related_type == "PURCHASE_ORDER" and shipment.related_id:
@@ -84,7 +77,7 @@ def _resolve_related_context(db: Session, shipment: Shipment, *, owner_id: int)
         )
         for item in purchase_order.items:
             remaining = max(item.quantity_ordered - item.quantity_received, 0)
-            affected_products.append(_product_summary(db, item.product_id, remaining))
+            product_quantities.append((item.product_id, remaining))
 
     elif shipment.related_type == "SALES_ORDER" and shipment.related_id:
         sales_order = sales_service.get_sales_order(db, int(shipment.related_id), owner_id=owner_id)
@@ -99,7 +92,7 @@ def _resolve_related_context(db: Session, shipment: Shipment, *, owner_id: int)
         revenue_at_risk = 0.0
         for item in sales_order.items:
             outstanding = max(item.quantity_ordered - item.quantity_fulfilled, 0)
-            affected_products.append(_product_summary(db, item.product_id, outstanding))
+            product_quantities.append((item.product_id, outstanding))
             revenue_at_risk += outstanding * item.unit_price
 
     elif shipment.related_type == "TRANSFER" and shipment.related_id:
@@ -110,12 +103,12 @@ def _resolve_related_context(db: Session, shipment: Shipment, *, owner_id: int)
             .first()
         )
         if transfer:
-            affected_products.append(_product_summary(db, transfer.product_id, transfer.quantity))
+            product_quantities.append((transfer.product_id, transfer.quantity))
 
     return {
         "affected_purchase_orders": affected_purchase_orders,
         "affected_sales_orders": affected_sales_orders,
-        "affected_products": affected_products,
+        "affected_products": _product_summaries(db, product_quantities, owner_id=owner_id) if product_quantities else [],
         "revenue_at_risk": revenue_at_risk,
     }
 
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, func, insert, literal, or_, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import Product, ProductWeekCube, ReturnOrder, ReturnOrderItem, Sale
+from app.services.timeseries_service import week_bucket
+
+# Cost of goods is not stored: it is units sold times the product's current cost, applied at read time
+# so a cost change re-prices every week alike.
+CUBE_MEASURES = ("units_sold", "revenue", "returned_units", "refund_amount", "replacement_cost")
+CubeKey = tuple[int, int, date]
+
+
+def _utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def week_start_of(value: datetime) -> date:
+    day = _utc_naive(value).date()
+    return day - timedelta(days=day.weekday())
+
+
+def _empty_totals() -> dict:
+    return {measure: 0 for measure in CUBE_MEASURES}
+
+
+def _apply_increments(db: Session, totals: dict[CubeKey, dict]) -> int:
+    if not totals:
+        return 0
+    # One insert-or-increment statement, so concurrent first writes to a cell never race on creating it.
+    # Sorted keys keep lock order stable between concurrent writers.
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(ProductWeekCube).values(
+        [
+            {"owner_id": owner_id, "product_id": product_id, "week_start": week_start, **bucket}
+            for (owner_id, product_id, week_start), bucket in sorted(totals.items())
+        ]
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[ProductWeekCube.owner_id, ProductWeekCube.product_id, ProductWeekCube.week_start],
+            set_={
+                **{measure: getattr(ProductWeekCube, measure) + statement.excluded[measure] for measure in CUBE_MEASURES},
+                "updated_at": func.now(),
+            },
+        )
+    )
+    return len(totals)
+
+
+def record_sales_in_cube(db: Session, sales: Iterable[Sale]) -> int:
+    """Add new sales to their product-week cells; call in the same transaction that inserts them."""
+    sales = list(sales)
+    if not sales:
+        return 0
+    totals: dict[CubeKey, dict] = defaultdict(_empty_totals)
+    for sale in sales:
+        bucket = totals[(sale.owner_id, sale.product_id, week_start_of(sale.sale_date))]
+        bucket["units_sold"] += int(sale.quantity)
+        bucket["revenue"] += float(sale.total_amount)
+    return _apply_increments(db, totals)
+
+
+def record_returns_in_cube(db: Session, return_order: ReturnOrder, items: Iterable[ReturnOrderItem]) -> int:
+    """Add a return order's items to the week of its return date."""
+    totals: dict[CubeKey, dict] = defaultdict(_empty_totals)
+    week_start = week_start_of(return_order.return_date)
+    for item in items:
+        bucket = totals[(return_order.owner_id, item.product_id, week_start)]
+        bucket["returned_units"] += int(item.quantity)
+        bucket["refund_amount"] += float(item.refund_amount or 0.0)
+        bucket["replacement_cost"] += float(item.replacement_cost or 0.0)
+    return _apply_increments(db, totals)
+
+
+def rebuild_product_week_cube(
+    db: Session,
+    *,
+    owner_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    commit: bool = True,
+) -> int:
+    """Recompute cube cells from `sales` and return items with one INSERT ... SELECT, optionally for one owner or from a week on."""
+    sale_week = week_bucket(db, Sale.sale_date)
+    return_week = week_bucket(db, ReturnOrder.return_date)
+    sales_part = select(
+        Sale.owner_id.label("owner_id"),
+        Sale.product_id.label("product_id"),
+        sale_week.label("week_start"),
+        Sale.quantity.label("units_sold"),
+        Sale.total_amount.label("revenue"),
+        literal(0).label("returned_units"),
+        literal(0.0).label("refund_amount"),
+        literal(0.0).label("replacement_cost"),
+    )
+    returns_part = (
+        select(
+            ReturnOrder.owner_id,
+            ReturnOrderItem.product_id,
+            return_week,
+            literal(0),
+            literal(0.0),
+            ReturnOrderItem.quantity,
+            func.coalesce(ReturnOrderItem.refund_amount, 0.0),
+            func.coalesce(ReturnOrderItem.replacement_cost, 0.0),
+        )
+        .join(ReturnOrder, ReturnOrder.id == ReturnOrderItem.return_order_id)
+        .where(ReturnOrder.owner_id.is_not(None))
+    )
+    delete_query = db.query(ProductWeekCube)
+    if owner_id is not None:
+        sales_part = sales_part.where(Sale.owner_id == owner_id)
+        returns_part = returns_part.where(ReturnOrder.owner_id == owner_id)
+        delete_query = delete_query.filter(ProductWeekCube.owner_id == owner_id)
+    if start_date is not None:
+        start_date -= timedelta(days=start_date.weekday())
+        start = datetime.combine(start_date, time.min)
+        sales_part = sales_part.where(Sale.sale_date >= start)
+        returns_part = returns_part.where(ReturnOrder.return_date >= start)
+        delete_query = delete_query.filter(ProductWeekCube.week_start >= start_date)
+
+    rows = union_all(sales_part, returns_part).subquery()
+    source = select(
+        rows.c.owner_id,
+        rows.c.product_id,
+        rows.c.week_start,
+        *[func.sum(rows.c[measure]) for measure in CUBE_MEASURES],
+    ).group_by(rows.c.owner_id, rows.c.product_id, rows.c.week_start)
+
+    try:
+        delete_query.delete(synchronize_session=False)
+        result = db.execute(insert(ProductWeekCube).from_select(["owner_id", "product_id", "week_start", *CUBE_MEASURES], source))
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return result.rowcount
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _raw_edge_totals(
+    db: Session,
+    *,
+    owner_id: int,
+    ranges: list[tuple[datetime, datetime]],
+    product_ids: Optional[list[int]],
+) -> dict[int, dict]:
+    totals: dict[int, dict] = defaultdict(_empty_totals)
+    if not ranges:
+        return totals
+
+    sale_filter = or_(*[and_(Sale.sale_date >= start, Sale.sale_date <= end) for start, end in ranges])
+    sales = (
+        db.query(
+            Sale.product_id,
+            func.sum(Sale.quantity).label("units_sold"),
+            func.sum(Sale.total_amount).label("revenue"),
+            Product.cost,
+        )
+        .join(Product, Product.id == Sale.product_id)
+        .filter(Sale.owner_id == owner_id, sale_filter)
+    )
+    return_filter = or_(*[and_(ReturnOrder.return_date >= start, ReturnOrder.return_date <= end) for start, end in ranges])
+    returns = (
+        db.query(
+            ReturnOrderItem.product_id,
+            func.sum(ReturnOrderItem.quantity).label("returned_units"),
+            func.sum(func.coalesce(ReturnOrderItem.refund_amount, 0.0)).label("refund_amount"),
+            func.sum(func.coalesce(ReturnOrderItem.replacement_cost, 0.0)).label("replacement_cost"),
+        )
+        .join(ReturnOrder, ReturnOrder.id == ReturnOrderItem.return_order_id)
+        .filter(ReturnOrder.owner_id == owner_id, return_filter)
+    )
+    if product_ids is not None:
+        sales = sales.filter(Sale.product_id.in_(product_ids))
+        returns = returns.filter(ReturnOrderItem.product_id.in_(product_ids))
+
+    for row in sales.group_by(Sale.product_id, Product.cost):
+        totals[row.product_id].update(units_sold=row.units_sold, revenue=row.revenue, unit_cost=row.cost)
+    for row in returns.group_by(ReturnOrderItem.product_id):
+        totals[row.product_id].update(returned_units=row.returned_units, refund_amount=row.refund_amount, replacement_cost=row.replacement_cost)
+    return totals
+
+
+def get_product_window_totals(
+    db: Session,
+    *,
+    owner_id: int,
+    start: datetime,
+    end: datetime,
+    product_ids: Optional[Iterable[int]] = None,
+) -> dict[int, dict]:
+    """Per-product sales and return totals for [start, end], keyed by product id.
+
+    Whole weeks inside the window come from the cube; only the partial weeks at either edge
+    are aggregated from `sales` and return items, so the cost does not grow with the window.
+    Cost of goods prices the units sold at each product's current cost.
+    """
+    start, end = _utc_naive(start), _utc_naive(end)
+    product_ids = list(product_ids) if product_ids is not None else None
+    first_week = week_start_of(start)
+    if start != datetime.combine(first_week, time.min):
+        first_week += timedelta(weeks=1)
+    # The week holding `end` is always partial because the window includes `end` itself.
+    last_week = week_start_of(end)
+
+    if first_week >= last_week:
+        cube_rows = []
+        ranges = [(start, end)]
+    else:
+        query = db.query(
+            ProductWeekCube.product_id,
+            Product.cost,
+            *[func.sum(getattr(ProductWeekCube, measure)).label(measure) for measure in CUBE_MEASURES],
+        ).join(Product, Product.id == ProductWeekCube.product_id).filter(
+            ProductWeekCube.owner_id == owner_id,
+            ProductWeekCube.week_start >= first_week,
+            ProductWeekCube.week_start < last_week,
+        )
+        if product_ids is not None:
+            query = query.filter(ProductWeekCube.product_id.in_(product_ids))
+        cube_rows = query.group_by(ProductWeekCube.product_id, Product.cost).all()
+        edge_end = datetime.combine(first_week, time.min) - timedelta(microseconds=1)
+        ranges = [(start, edge_end)] if start <= edge_end else []
+        ranges.append((datetime.combine(last_week, time.min), end))
+
+    totals = _raw_edge_totals(db, owner_id=owner_id, ranges=ranges, product_ids=product_ids)
+    for row in cube_rows:
+        bucket = totals[row.product_id]
+        bucket["unit_cost"] = row.cost
+        for measure in CUBE_MEASURES:
+            bucket[measure] += getattr(row, measure) or 0
+    return {
+        product_id: {
+            "units_sold": int(values["units_sold"] or 0),
+            "revenue": float(values["revenue"] or 0.0),
+            "cost_of_goods": int(values["units_sold"] or 0) * float(values.get("unit_cost") or 0.0),
+            "returned_units": int(values["returned_units"] or 0),
+            "refund_amount": float(values["refund_amount"] or 0.0),
+            "replacement_cost": float(values["replacement_cost"] or 0.0),
+        }
+        for product_id, values in totals.items()
+    }
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.models import Product, StockBalance, Warehouse
+from app.services import analytics_engine
+
+DEFAULT_TARGET_COVER_DAYS = 14
+DEFAULT_DEMAND_LOOKBACK_DAYS = 30
+
+
+def _load_tenant_matrices(
+    db: Session,
+    *,
+    owner_id: int,
+    lookback_days: int,
+) -> tuple[list, list, np.ndarray, np.ndarray, np.ndarray]:
+    products = (
+        db.query(Product.id, Product.sku, Product.name, Product.min_stock_threshold)
+        .filter(Product.owner_id == owner_id)
+        .order_by(Product.id.asc())
+        .all()
+    )
+    warehouses = (
+        db.query(Warehouse.id, Warehouse.name)
+        .filter(Warehouse.owner_id == owner_id, Warehouse.is_active.is_(True))
+        .order_by(Warehouse.id.asc())
+        .all()
+    )
+    product_index = {product.id: index for index, product in enumerate(products)}
+    warehouse_index = {warehouse.id: index for index, warehouse in enumerate(warehouses)}
+    available = np.zeros((len(products), len(warehouses)), dtype=np.int64)
+    demand = np.zeros((len(products), len(warehouses)), dtype=np.float64)
+    thresholds = np.array([product.min_stock_threshold or 0 for product in products], dtype=np.int64)
+    if not products or not warehouses:
+        return products, warehouses, available, demand, thresholds
+
+    balance_rows = (
+        db.query(
+            StockBalance.product_id,
+            StockBalance.warehouse_id,
+            (StockBalance.on_hand - StockBalance.reserved - StockBalance.damaged - StockBalance.quarantined).label("available"),
+        )
+        .join(Product, Product.id == StockBalance.product_id)
+        .filter(Product.owner_id == owner_id)
+        .all()
+    )
+    for row in balance_rows:
+        if row.warehouse_id in warehouse_index:
+            available[product_index[row.product_id], warehouse_index[row.warehouse_id]] = row.available
+
+    # Shipped sales in the ledger carry the warehouse they left from, unlike Sale rows.
+    end = datetime.utcnow()
+    frame = analytics_engine.get_tenant_frame(db, owner_id)
+    for (product_id, warehouse_id), quantity in analytics_engine.shipped_units_by_warehouse(
+        frame, end - timedelta(days=lookback_days), end
+    ).items():
+        if product_id in product_index and warehouse_id in warehouse_index:
+            demand[product_index[product_id], warehouse_index[warehouse_id]] = float(quantity) / lookback_days
+
+    return products, warehouses, available, demand, thresholds
+
+
+def build_rebalancing_plan(
+    db: Session,
+    *,
+    owner_id: int,
+    target_cover_days: int = DEFAULT_TARGET_COVER_DAYS,
+    lookback_days: int = DEFAULT_DEMAND_LOOKBACK_DAYS,
+    limit: Optional[int] = None,
+) -> dict:
+    """Solve transfer recommendations for every SKU and warehouse of a tenant in one pass.
+
+    Each warehouse's target is the larger of the product threshold and `target_cover_days`
+    of its own recent demand. Stock above target is excess that can move; stock below target
+    is a deficit. Without lane costs every unit moved is worth the same, so matching the most
+    urgent deficits to the largest excesses moves the maximum quantity.
+    """
+    if target_cover_days <= 0 or lookback_days <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="target_cover_days and lookback_days must be greater than zero")
+
+    products, warehouses, available, demand, thresholds = _load_tenant_matrices(db, owner_id=owner_id, lookback_days=lookback_days)
+    target = np.maximum(thresholds[:, None], np.ceil(demand * target_cover_days).astype(np.int64))
+    deficit = np.clip(target - available, 0, None)
+    excess = np.clip(available - target, 0, None)
+    # Days of cover before the transfer ranks deficits; warehouses without demand fall back to stock/threshold.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cover = np.where(demand > 0, available / demand, np.where(target > 0, available / target * target_cover_days, np.inf))
+
+    transfers: list[dict] = []
+    candidate_rows = np.flatnonzero((deficit.sum(axis=1) > 0) & (excess.sum(axis=1) > 0))
+    for row in candidate_rows:
+        row_excess = excess[row].copy()
+        for to_index in np.argsort(cover[row], kind="stable"):
+            need = int(deficit[row, to_index])
+            while need > 0 and row_excess.any():
+                from_index = int(row_excess.argmax())
+                quantity = int(min(need, row_excess[from_index]))
+                row_excess[from_index] -= quantity
+                need -= quantity
+                product = products[row]
+                transfers.append(
+                    {
+                        "product_id": product.id,
+                        "sku": product.sku,
+                        "product_name": product.name,
+                        "from_warehouse_id": warehouses[from_index].id,
+                        "from_warehouse_name": warehouses[from_index].name,
+                        "to_warehouse_id": warehouses[to_index].id,
+                        "to_warehouse_name": warehouses[to_index].name,
+                        "quantity": quantity,
+                        "target_available_before": int(available[row, to_index]),
+                        "target_stock": int(target[row, to_index]),
+                        "target_days_of_cover": None if np.isinf(cover[row, to_index]) else round(float(cover[row, to_index]), 2),
+                        "target_daily_demand": round(float(demand[row, to_index]), 4),
+                    }
+                )
+
+    # Most urgent destination first, then the larger move.
+    transfers.sort(key=lambda item: (item["target_days_of_cover"] if item["target_days_of_cover"] is not None else float("inf"), -item["quantity"]))
+    for rank, transfer in enumerate(transfers, start=1):
+        transfer["rank"] = rank
+    unmet = deficit.sum() - sum(transfer["quantity"] for transfer in transfers)
+    return {
+        "owner_id": owner_id,
+        "target_cover_days": target_cover_days,
+        "lookback_days": lookback_days,
+        "products_considered": len(products),
+        "warehouses_considered": len(warehouses),
+        "total_deficit": int(deficit.sum()),
+        "total_transfer_quantity": int(sum(transfer["quantity"] for transfer in transfers)),
+        "unmet_deficit": int(unmet),
+        "transfers": transfers[:limit] if limit is not None else transfers,
+    }
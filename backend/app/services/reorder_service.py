@@ -1,10 +1,29 @@
 from __future__ import annotations
 
+import threading
+import time as time_module
+import weakref
+from typing import Optional
+
+import numpy as np
 from fastapi import HTTPException, status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.models import Product, ReorderPoint, Supplier
-from app.services.stock_ledger_service import get_available
+from app.models import DemandForecast, InventoryTransaction, Product, ReorderPoint, Sale, Supplier, SupplierLeadTime
+from app.services.forecasting_service import days_of_cover, get_demand_forecasts
+from app.services.lead_time_service import get_lead_time_stats
+from app.services.stock_ledger_service import get_available_by_location
+
+# One-sided z for a 95% cycle service level.
+SERVICE_LEVEL_Z = 1.645
+DEFAULT_LEAD_TIME_DAYS = 7
+ORDER_COST = 50.0
+ANNUAL_HOLDING_COST_RATE = 0.25
+SUGGESTIONS_MAX_AGE_SECONDS = 15 * 60
+
+_suggestions: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_suggestions_lock = threading.Lock()
 
 
 def set_reorder_point(
@@ -27,6 +46,7 @@ def set_reorder_point(
     )
     if reorder_point is None:
         reorder_point = ReorderPoint(
+            owner_id=owner_id,
             product_id=product_id,
             warehouse_id=warehouse_id,
             minimum_quantity=minimum_quantity,
@@ -34,37 +54,178 @@ def set_reorder_point(
         )
         db.add(reorder_point)
     else:
+        reorder_point.owner_id = owner_id
         reorder_point.minimum_quantity = minimum_quantity
         reorder_point.reorder_quantity = reorder_quantity
         db.add(reorder_point)
 
     db.commit()
     db.refresh(reorder_point)
+    invalidate_reorder_suggestions(db, owner_id)
     return reorder_point
 
 
-def get_reorder_suggestions(db: Session, *, owner_id: int) -> list[dict]:
+def _cache_watermark(db: Session, owner_id: int) -> tuple:
+    """Single-row fingerprint of everything a tenant's suggestions depend on.
+
+    Every balance change writes a ledger row, so the highest ledger id stands in for stock.
+    """
+    return tuple(
+        db.execute(
+            select(
+                select(func.max(InventoryTransaction.id))
+                .join(Product, Product.id == InventoryTransaction.product_id)
+                .where(Product.owner_id == owner_id)
+                .scalar_subquery(),
+                select(func.max(Sale.id)).where(Sale.owner_id == owner_id).scalar_subquery(),
+                select(func.count(ReorderPoint.id)).where(ReorderPoint.owner_id == owner_id).scalar_subquery(),
+                select(func.max(ReorderPoint.updated_at)).where(ReorderPoint.owner_id == owner_id).scalar_subquery(),
+                select(func.max(DemandForecast.fitted_at)).where(DemandForecast.owner_id == owner_id).scalar_subquery(),
+                select(func.max(SupplierLeadTime.folded_through)).where(SupplierLeadTime.owner_id == owner_id).scalar_subquery(),
+                select(func.max(Supplier.updated_at)).where(Supplier.owner_id == owner_id).scalar_subquery(),
+                select(func.max(Product.updated_at)).where(Product.owner_id == owner_id).scalar_subquery(),
+            )
+        ).one()
+    )
+
+
+def invalidate_reorder_suggestions(db: Session, owner_id: Optional[int] = None) -> None:
+    with _suggestions_lock:
+        entries = _suggestions.get(db.get_bind())
+        if entries is None:
+            return
+        if owner_id is None:
+            entries.clear()
+        else:
+            entries.pop(owner_id, None)
+
+
+def replenishment_targets(
+    daily_demand: np.ndarray,
+    demand_std: np.ndarray,
+    lead_time_days: np.ndarray,
+    lead_time_std: np.ndarray,
+    unit_cost: np.ndarray,
+) -> dict[str, np.ndarray]:
+    """Safety stock, reorder level and EOQ for aligned arrays of reorder points.
+
+    Safety stock covers both demand and lead-time variability: z * sqrt(L * sd_d^2 + d^2 * sd_L^2).
+    """
+    safety_stock = SERVICE_LEVEL_Z * np.sqrt(lead_time_days * demand_std**2 + daily_demand**2 * lead_time_std**2)
+    reorder_level = daily_demand * lead_time_days + safety_stock
+    annual_demand = daily_demand * 365
+    holding_cost = unit_cost * ANNUAL_HOLDING_COST_RATE
+    orderable = (annual_demand > 0) & (holding_cost > 0)
+    economic_order_quantity = np.zeros(len(daily_demand))
+    economic_order_quantity[orderable] = np.sqrt(2 * annual_demand[orderable] * ORDER_COST / holding_cost[orderable])
+    return {
+        "safety_stock": safety_stock,
+        "reorder_level": reorder_level,
+        "economic_order_quantity": economic_order_quantity,
+    }
+
+
+def _build_reorder_suggestions(db: Session, owner_id: int) -> list[dict]:
+    reorder_points = (
+        db.query(
+            ReorderPoint.product_id,
+            ReorderPoint.warehouse_id,
+            ReorderPoint.minimum_quantity,
+            ReorderPoint.reorder_quantity,
+            Product.supplier,
+            Product.cost,
+        )
+        .join(Product, Product.id == ReorderPoint.product_id)
+        .filter(ReorderPoint.owner_id == owner_id, Product.owner_id == owner_id)
+        .order_by(ReorderPoint.id)
+        .all()
+    )
+    if not reorder_points:
+        return []
+
+    available = get_available_by_location(db, [(row.product_id, row.warehouse_id) for row in reorder_points])
+    forecasts = get_demand_forecasts(db, {row.product_id for row in reorder_points}, owner_id=owner_id)
+    supplier_names = {row.supplier for row in reorder_points if row.supplier}
+    suppliers = {}
+    if supplier_names:
+        # Keep the first match per name, as the per-row `.first()` lookup did.
+        for supplier in db.query(Supplier).filter(Supplier.owner_id == owner_id, Supplier.name.in_(supplier_names)).order_by(Supplier.id.desc()):
+            suppliers[supplier.name] = supplier
+
+    daily_demand = np.asarray([forecasts[row.product_id]["daily_demand"] for row in reorder_points], dtype=np.float64)
+    # Trailing-average fallbacks carry no spread; treat their demand as Poisson.
+    demand_std = np.asarray(
+        [forecasts[row.product_id]["demand_std"] for row in reorder_points],
+        dtype=np.float64,
+    )
+    demand_std = np.where(np.isnan(demand_std), np.sqrt(daily_demand), demand_std)
+    lead_times = [suppliers[row.supplier].lead_time_days if row.supplier in suppliers else None for row in reorder_points]
+    # Observed receipt history wins over the supplier's quoted lead time.
+    observed = get_lead_time_stats(
+        db,
+        [(suppliers[row.supplier].id, row.product_id) for row in reorder_points if row.supplier in suppliers],
+        owner_id=owner_id,
+    )
+    observed_rows = [observed.get((suppliers[row.supplier].id, row.product_id)) if row.supplier in suppliers else None for row in reorder_points]
+    lead_time_days = np.asarray(
+        [
+            stats["mean_days"] if stats else DEFAULT_LEAD_TIME_DAYS if lead_time is None else lead_time
+            for stats, lead_time in zip(observed_rows, lead_times)
+        ],
+        dtype=np.float64,
+    )
+    lead_time_std = np.asarray([stats["std_days"] if stats else 0.0 for stats in observed_rows], dtype=np.float64)
+    targets = replenishment_targets(
+        daily_demand,
+        demand_std,
+        lead_time_days,
+        lead_time_std,
+        np.asarray([row.cost or 0.0 for row in reorder_points], dtype=np.float64),
+    )
+    on_hand = np.asarray([available[(row.product_id, row.warehouse_id)] for row in reorder_points], dtype=np.float64)
+    minimums = np.asarray([row.minimum_quantity for row in reorder_points], dtype=np.float64)
+    due = on_hand <= np.maximum(minimums, np.ceil(targets["reorder_level"]))
+
     suggestions: list[dict] = []
-    reorder_points = db.query(ReorderPoint).all()
-    for reorder_point in reorder_points:
-        available = get_available(db, reorder_point.product_id, reorder_point.warehouse_id)
-        if available > reorder_point.minimum_quantity:
-            continue
-        product = db.query(Product).filter(Product.id == reorder_point.product_id, Product.owner_id == owner_id).first()
-        if product is None:
-            continue
-        supplier = None
-        if product.supplier:
-            supplier = db.query(Supplier).filter(Supplier.name == product.supplier, Supplier.owner_id == owner_id).first()
+    for index in np.flatnonzero(due):
+        row = reorder_points[index]
+        supplier = suppliers.get(row.supplier)
+        economic_order_quantity = int(np.ceil(targets["economic_order_quantity"][index]))
         suggestions.append(
             {
-                "product_id": reorder_point.product_id,
-                "warehouse_id": reorder_point.warehouse_id,
-                "available_quantity": available,
-                "minimum_quantity": reorder_point.minimum_quantity,
-                "suggested_reorder_quantity": reorder_point.reorder_quantity,
-                "supplier_name": supplier.name if supplier else product.supplier if product else None,
-                "supplier_lead_time_days": supplier.lead_time_days if supplier else None,
+                "product_id": row.product_id,
+                "warehouse_id": row.warehouse_id,
+                "available_quantity": int(on_hand[index]),
+                "minimum_quantity": row.minimum_quantity,
+                "suggested_reorder_quantity": max(row.reorder_quantity, economic_order_quantity),
+                "supplier_name": supplier.name if supplier else row.supplier,
+                "supplier_lead_time_days": lead_times[index],
+                "observed_lead_time_days": observed_rows[index]["mean_days"] if observed_rows[index] else None,
+                "observed_lead_time_p90_days": observed_rows[index]["p90_days"] if observed_rows[index] else None,
+                "forecast_daily_demand": float(daily_demand[index]),
+                "days_of_cover": days_of_cover(on_hand[index], daily_demand[index]),
+                "safety_stock": float(targets["safety_stock"][index]),
+                "reorder_level": float(targets["reorder_level"][index]),
+                "economic_order_quantity": economic_order_quantity or None,
             }
         )
     return suggestions
+
+
+def get_reorder_suggestions(db: Session, *, owner_id: int) -> list[dict]:
+    """Reorder points at or below max(minimum, lead-time demand + safety stock), cached per tenant.
+
+    The cached list is reused until the tenant's ledger, sales, reorder points, forecasts,
+    lead-time stats, suppliers or products change, which one fingerprint query detects.
+    """
+    engine = db.get_bind()
+    watermark = _cache_watermark(db, owner_id)
+    with _suggestions_lock:
+        cached = _suggestions.setdefault(engine, {}).get(owner_id)
+    if cached is not None and cached[0] == watermark and time_module.monotonic() - cached[1] <= SUGGESTIONS_MAX_AGE_SECONDS:
+        return [dict(suggestion) for suggestion in cached[2]]
+
+    suggestions = _build_reorder_suggestions(db, owner_id)
+    with _suggestions_lock:
+        _suggestions.setdefault(engine, {})[owner_id] = (watermark, time_module.monotonic(), suggestions)
+    return [dict(suggestion) for suggestion in suggestions]
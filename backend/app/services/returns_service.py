@@ -10,6 +10,8 @@ from sqlalchemy import func
 from sqlalchemy.orm import Session, joinedload
 
 from app.models import Product, ReturnOrder, ReturnOrderItem, Sale
+from app.services import timeseries_service
+from app.services.product_cube_service import get_product_window_totals, record_returns_in_cube
 from app.services.stock_ledger_service import create_inventory_transaction, record_damaged_stock, record_quarantined_stock
 
 
@@ -111,12 +113,15 @@ def create_return_order(
     db.add(return_order)
     db.flush()
 
+    return_items = []
     for item_data in items:
         product = db.query(Product).filter(Product.id == item_data["product_id"], Product.owner_id == owner_id).first()
         if product is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Product {item_data['product_id']} not found")
         return_item = ReturnOrderItem(return_order_id=return_order.id, **item_data)
         db.add(return_item)
+        return_items.append(return_item)
+    record_returns_in_cube(db, return_order, return_items)
 
     db.commit()
     return _load_return_order(db, return_order.id, owner_id=owner_id)
@@ -201,38 +206,19 @@ def mark_refunded(db: Session, *, owner_id: int, return_order_id: int, refund_am
     return _load_return_order(db, return_order.id, owner_id=owner_id)
 
 
-def calculate_return_adjusted_margin(db: Session, product_id: int, start_date: datetime, end_date: datetime) -> dict:
-    sales = (
-        db.query(Sale, Product)
-        .join(Product, Product.id == Sale.product_id)
-        .filter(Sale.product_id == product_id, Sale.sale_date >= start_date, Sale.sale_date <= end_date)
-        .all()
-    )
+def return_adjusted_margin_from_totals(product_id: int, totals: Optional[dict], *, product_cost_missing: bool) -> dict:
+    """Build the return-adjusted margin report for one product from its window totals."""
+    totals = totals or {}
+    units_sold = totals.get("units_sold", 0)
+    gross_profit = totals.get("revenue", 0.0) - totals.get("cost_of_goods", 0.0)
+    refunds = totals.get("refund_amount", 0.0)
+    replacements = totals.get("replacement_cost", 0.0)
     missing_data: list[str] = []
-    if not sales:
+    if not units_sold:
         missing_data.append("no_sales_in_range")
-    if any(product.cost is None for _, product in sales):
+    elif product_cost_missing:
         missing_data.append("missing_product_cost")
 
-    gross_profit = 0.0
-    for sale, product in sales:
-        unit_cost = product.cost if product.cost is not None else 0.0
-        gross_profit += sale.total_amount - (sale.quantity * unit_cost)
-
-    refunds, replacements = (
-        db.query(
-            func.coalesce(func.sum(ReturnOrderItem.refund_amount), 0.0),
-            func.coalesce(func.sum(ReturnOrderItem.replacement_cost), 0.0),
-        )
-        .join(ReturnOrder, ReturnOrder.id == ReturnOrderItem.return_order_id)
-        .filter(
-            ReturnOrderItem.product_id == product_id,
-            ReturnOrder.return_date >= start_date,
-            ReturnOrder.return_date <= end_date,
-        )
-        .one()
-    )
-
     reverse_logistics_cost = 0.0
     support_cost = 0.0
     marketplace_penalty = 0.0
@@ -247,8 +233,8 @@ def calculate_return_adjusted_margin(db: Session, product_id: int, start_date: d
     )
     return_adjusted_profit = float(
         gross_profit
-        - (refunds or 0)
-        - (replacements or 0)
+        - refunds
+        - replacements
         - reverse_logistics_cost
         - support_cost
         - marketplace_penalty
@@ -257,8 +243,8 @@ def calculate_return_adjusted_margin(db: Session, product_id: int, start_date: d
     return {
         "product_id": product_id,
         "gross_profit": float(gross_profit),
-        "refund_cost": float(refunds or 0),
-        "replacement_cost": float(replacements or 0),
+        "refund_cost": float(refunds),
+        "replacement_cost": float(replacements),
         "reverse_logistics_cost": reverse_logistics_cost,
         "support_cost": support_cost,
         "marketplace_penalty": marketplace_penalty,
@@ -271,6 +257,24 @@ def calculate_return_adjusted_margin(db: Session, product_id: int, start_date: d
     }
 
 
+def calculate_return_adjusted_margin(db: Session, product_id: int, start_date: datetime, end_date: datetime) -> dict:
+    product = db.query(Product).filter(Product.id == product_id).first()
+    totals = None
+    if product is not None and product.owner_id is not None:
+        totals = get_product_window_totals(
+            db,
+            owner_id=product.owner_id,
+            start=start_date,
+            end=end_date,
+            product_ids=[product_id],
+        ).get(product_id)
+    return return_adjusted_margin_from_totals(
+        product_id,
+        totals,
+        product_cost_missing=product is None or product.cost is None,
+    )
+
+
 def get_return_rate(
     db: Session,
     *,
@@ -519,82 +523,163 @@ def create_quality_investigation(
     }
 
 
+def _catalog_products(db: Session, product_ids, *, owner_id: int) -> dict:
+    return {
+        product.id: product
+        for product in db.query(Product.id, Product.sku, Product.name, Product.cost).filter(Product.owner_id == owner_id, Product.id.in_(list(product_ids)))
+    }
+
+
 def get_high_return_products(db: Session, start_date: datetime, end_date: datetime, *, owner_id: int) -> list[dict]:
-    rows = (
-        db.query(
-            ReturnOrderItem.product_id,
-            func.coalesce(func.sum(ReturnOrderItem.quantity), 0).label("returned_quantity"),
-            func.coalesce(func.sum(ReturnOrderItem.refund_amount), 0.0).label("refund_amount"),
-            func.coalesce(func.sum(ReturnOrderItem.replacement_cost), 0.0).label("replacement_cost"),
-        )
-        .join(ReturnOrder, ReturnOrder.id == ReturnOrderItem.return_order_id)
-        .filter(ReturnOrder.return_date >= start_date, ReturnOrder.return_date <= end_date, ReturnOrder.owner_id == owner_id)
-        .group_by(ReturnOrderItem.product_id)
-        .order_by(func.sum(ReturnOrderItem.quantity).desc())
-        .all()
-    )
+    totals = get_product_window_totals(db, owner_id=owner_id, start=start_date, end=end_date)
+    returned = {product_id: values for product_id, values in totals.items() if values["returned_units"] > 0}
+    products = _catalog_products(db, returned, owner_id=owner_id)
+    # Most returned first, then product id between ties.
+    ranked = sorted((product_id for product_id in returned if product_id in products), key=lambda product_id: (-returned[product_id]["returned_units"], product_id))
     results = []
-    for row in rows:
-        product = db.query(Product).filter(Product.id == row.product_id, Product.owner_id == owner_id).first()
-        rate_data = get_return_rate(db, product_id=row.product_id, start_date=start_date, end_date=end_date)
+    for product_id in ranked:
+        values = returned[product_id]
+        sold = values["units_sold"]
         results.append(
             {
-                "product_id": row.product_id,
-                "sku": product.sku if product else None,
-                "product_name": product.name if product else None,
-                "returned_quantity": int(row.returned_quantity or 0),
-                "refund_amount": float(row.refund_amount or 0),
-                "replacement_cost": float(row.replacement_cost or 0),
-                "return_rate": rate_data["return_rate"],
-                "missing_data": rate_data.get("missing_data", []),
+                "product_id": product_id,
+                "sku": products[product_id].sku,
+                "product_name": products[product_id].name,
+                "returned_quantity": values["returned_units"],
+                "refund_amount": values["refund_amount"],
+                "replacement_cost": values["replacement_cost"],
+                "return_rate": None if sold <= 0 else float(values["returned_units"]) / float(sold),
+                "missing_data": ["no_sales_in_range"] if sold == 0 else [],
             }
         )
     return results
 
 
+def get_catalog_return_margins(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    *,
+    owner_id: int,
+    only_with_returns: bool = True,
+    limit: Optional[int] = None,
+) -> list[dict]:
+    """Return-adjusted margin for every product of a tenant from grouped totals, worst profit first."""
+    totals = get_product_window_totals(db, owner_id=owner_id, start=start_date, end=end_date)
+    if only_with_returns:
+        totals = {product_id: values for product_id, values in totals.items() if values["returned_units"] > 0}
+    products = _catalog_products(db, totals, owner_id=owner_id)
+    results = []
+    for product_id, values in totals.items():
+        product = products.get(product_id)
+        if product is None:
+            continue
+        sold = values["units_sold"]
+        results.append(
+            {
+                "product_id": product_id,
+                "sku": product.sku,
+                "product_name": product.name,
+                "units_sold": sold,
+                "returned_quantity": values["returned_units"],
+                "return_rate": None if sold <= 0 else float(values["returned_units"]) / float(sold),
+                "refund_amount": values["refund_amount"],
+                "replacement_cost": values["replacement_cost"],
+                "total_leakage": values["refund_amount"] + values["replacement_cost"],
+                "margin": return_adjusted_margin_from_totals(product_id, values, product_cost_missing=product.cost is None),
+            }
+        )
+    results.sort(key=lambda row: (row["margin"]["return_adjusted_profit"], -row["total_leakage"], row["product_id"]))
+    return results[:limit] if limit is not None else results
+
+
+def detect_catalog_return_spikes(
+    db: Session,
+    *,
+    owner_id: int,
+    days: int = 7,
+    threshold_ratio: float = 0.5,
+) -> list[dict]:
+    """Products whose return rate rose by `threshold_ratio` or more against the prior window."""
+    if days <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="days must be greater than zero")
+    end_date = datetime.utcnow()
+    current_start = end_date - timedelta(days=days)
+    previous_start = current_start - timedelta(days=days)
+    current = get_product_window_totals(db, owner_id=owner_id, start=current_start, end=end_date)
+    previous = get_product_window_totals(db, owner_id=owner_id, start=previous_start, end=current_start - timedelta(microseconds=1))
+
+    def _period(values: Optional[dict]) -> dict:
+        sold = values["units_sold"] if values else 0
+        returned = values["returned_units"] if values else 0
+        return {"units_sold": sold, "units_returned": returned, "return_rate": None if sold <= 0 else float(returned) / float(sold)}
+
+    spikes = []
+    for product_id in set(current) & set(previous):
+        current_period, previous_period = _period(current[product_id]), _period(previous[product_id])
+        current_rate = current_period["return_rate"] or 0.0
+        previous_rate = previous_period["return_rate"] or 0.0
+        if previous_rate <= 0:
+            continue
+        relative_change = (current_rate - previous_rate) / previous_rate
+        if relative_change >= threshold_ratio:
+            spikes.append(
+                {
+                    "product_id": product_id,
+                    "current_period": current_period,
+                    "previous_period": previous_period,
+                    "threshold_ratio": threshold_ratio,
+                    "relative_change": relative_change,
+                    "is_spike": True,
+                }
+            )
+    products = _catalog_products(db, [spike["product_id"] for spike in spikes], owner_id=owner_id) if spikes else {}
+    for spike in spikes:
+        product = products.get(spike["product_id"])
+        spike["sku"] = product.sku if product else None
+        spike["product_name"] = product.name if product else None
+    spikes.sort(key=lambda spike: (-spike["relative_change"], spike["product_id"]))
+    return spikes
+
+
 def get_weekly_returns(
     db: Session,
     *,
     owner_id: int,
     product_id: Optional[int] = None,
     weeks: int = 8,
+    offset: int = 0,
 ) -> dict:
-    if weeks <= 0:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="weeks must be greater than zero")
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=weeks * 7)
-    query = db.query(ReturnOrderItem).join(ReturnOrder, ReturnOrder.id == ReturnOrderItem.return_order_id).filter(
-        ReturnOrder.return_date >= start_date,
-        ReturnOrder.return_date <= end_date,
-        ReturnOrder.owner_id == owner_id,
-    )
+    if weeks <= 0 or offset < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="weeks must be greater than zero and offset must not be negative")
+    query = db.query(ReturnOrderItem).join(ReturnOrder, ReturnOrder.id == ReturnOrderItem.return_order_id).filter(ReturnOrder.owner_id == owner_id)
     if product_id is not None:
         query = query.filter(ReturnOrderItem.product_id == product_id)
-    items = query.all()
-    buckets: dict[str, dict[str, float | int]] = defaultdict(
-        lambda: {
-            "returned_quantity": 0,
-            "refund_cost": 0.0,
-            "replacement_cost": 0.0,
-        }
+    series = timeseries_service.weekly_totals(
+        db,
+        query,
+        ReturnOrder.return_date,
+        {
+            "returned_quantity": ReturnOrderItem.quantity,
+            "refund_cost": func.coalesce(ReturnOrderItem.refund_amount, 0.0),
+            "replacement_cost": func.coalesce(ReturnOrderItem.replacement_cost, 0.0),
+        },
+        weeks=weeks,
+        offset=offset,
     )
-    for item in items:
-        bucket = f"{item.return_order.return_date.isocalendar().year}-W{item.return_order.return_date.isocalendar().week:02d}"
-        buckets[bucket]["returned_quantity"] += item.quantity
-        buckets[bucket]["refund_cost"] += item.refund_amount or 0.0
-        buckets[bucket]["replacement_cost"] += item.replacement_cost or 0.0
     product = db.query(Product).filter(Product.id == product_id, Product.owner_id == owner_id).first() if product_id is not None else None
     return {
         "product_id": product_id,
         "sku": product.sku if product else None,
+        **series,
         "weeks": [
             {
-                "week": week,
-                "returned_quantity": int(values["returned_quantity"]),
-                "refund_cost": float(values["refund_cost"]),
-                "replacement_cost": float(values["replacement_cost"]),
+                **week,
+                "returned_quantity": int(week["returned_quantity"]),
+                "refund_cost": float(week["refund_cost"]),
+                "replacement_cost": float(week["replacement_cost"]),
             }
-            for week, values in sorted(buckets.items())
+            for week in series["weeks"]
         ],
     }
 
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import desc, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import Product, Sale, SalesDailyRollup
+
+RollupKey = tuple[int, int, date]
+
+
+def _sale_day(sale: Sale) -> date:
+    # Matches date(sale_date) on a UTC database session, which the backfill groups by.
+    if sale.sale_date.tzinfo is not None:
+        return sale.sale_date.astimezone(timezone.utc).date()
+    return sale.sale_date.date()
+
+
+def record_sales_in_rollup(db: Session, sales: Iterable[Sale]) -> int:
+    """Add new sales to their daily rollup rows; call in the same transaction that inserts them."""
+    totals: dict[RollupKey, dict] = defaultdict(lambda: {"units": 0, "revenue": 0.0, "order_count": 0})
+    for sale in sales:
+        bucket = totals[(sale.owner_id, sale.product_id, _sale_day(sale))]
+        bucket["units"] += int(sale.quantity)
+        bucket["revenue"] += float(sale.total_amount)
+        bucket["order_count"] += 1
+
+    if not totals:
+        return 0
+    # One insert-or-increment statement, so concurrent first sales of a cell never race on creating it.
+    # Sorted keys keep lock order stable between concurrent writers.
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(SalesDailyRollup).values(
+        [
+            {"owner_id": owner_id, "product_id": product_id, "day": day, **bucket}
+            for (owner_id, product_id, day), bucket in sorted(totals.items())
+        ]
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[SalesDailyRollup.owner_id, SalesDailyRollup.product_id, SalesDailyRollup.day],
+            set_={
+                **{field: getattr(SalesDailyRollup, field) + statement.excluded[field] for field in ("units", "revenue", "order_count")},
+                "updated_at": func.now(),
+            },
+        )
+    )
+    db.flush()
+    return len(totals)
+
+
+def rebuild_sales_daily_rollup(
+    db: Session,
+    *,
+    owner_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    commit: bool = True,
+) -> int:
+    """Recompute rollup rows from `sales` with one INSERT ... SELECT, optionally for one owner or from a day on."""
+    sale_day = func.date(Sale.sale_date)
+    source = select(
+        Sale.owner_id,
+        Sale.product_id,
+        sale_day,
+        func.sum(Sale.quantity),
+        func.sum(Sale.total_amount),
+        func.count(Sale.id),
+    ).group_by(Sale.owner_id, Sale.product_id, sale_day)
+    delete_query = db.query(SalesDailyRollup)
+    if owner_id is not None:
+        source = source.where(Sale.owner_id == owner_id)
+        delete_query = delete_query.filter(SalesDailyRollup.owner_id == owner_id)
+    if start_date is not None:
+        source = source.where(sale_day >= start_date.isoformat())
+        delete_query = delete_query.filter(SalesDailyRollup.day >= start_date)
+
+    try:
+        delete_query.delete(synchronize_session=False)
+        result = db.execute(
+            insert(SalesDailyRollup).from_select(
+                ["owner_id", "product_id", "day", "units", "revenue", "order_count"],
+                source,
+            )
+        )
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return result.rowcount
+    except Exception:
+        db.rollback()
+        raise
+
+
+def get_sales_totals(db: Session, *, owner_id: int, start_date: date, end_date: Optional[date] = None) -> dict:
+    query = db.query(
+        func.coalesce(func.sum(SalesDailyRollup.units), 0),
+        func.coalesce(func.sum(SalesDailyRollup.revenue), 0.0),
+        func.coalesce(func.sum(SalesDailyRollup.order_count), 0),
+    ).filter(SalesDailyRollup.owner_id == owner_id, SalesDailyRollup.day >= start_date)
+    if end_date is not None:
+        query = query.filter(SalesDailyRollup.day <= end_date)
+    units, revenue, order_count = query.one()
+    return {"units": int(units), "revenue": float(revenue), "order_count": int(order_count)}
+
+
+def get_daily_sales_trend(db: Session, *, owner_id: int, start_date: date, end_date: date) -> list[dict]:
+    """One row per day from start_date to end_date inclusive, zero-filled."""
+    rows = (
+        db.query(
+            SalesDailyRollup.day,
+            func.sum(SalesDailyRollup.units).label("units"),
+            func.sum(SalesDailyRollup.revenue).label("revenue"),
+            func.sum(SalesDailyRollup.order_count).label("order_count"),
+        )
+        .filter(
+            SalesDailyRollup.owner_id == owner_id,
+            SalesDailyRollup.day >= start_date,
+            SalesDailyRollup.day <= end_date,
+        )
+        .group_by(SalesDailyRollup.day)
+        .all()
+    )
+    by_day = {row.day: row for row in rows}
+    trend = []
+    day = start_date
+    while day <= end_date:
+        row = by_day.get(day)
+        trend.append(
+            {
+                "date": day,
+                "units": int(row.units) if row else 0,
+                "revenue": float(row.revenue) if row else 0.0,
+                "order_count": int(row.order_count) if row else 0,
+            }
+        )
+        day += timedelta(days=1)
+    return trend
+
+
+def get_top_sellers(db: Session, *, owner_id: int, start_date: date, limit: int = 10) -> list[dict]:
+    rows = (
+        db.query(
+            SalesDailyRollup.product_id,
+            Product.name,
+            func.sum(SalesDailyRollup.units).label("total_quantity"),
+            func.sum(SalesDailyRollup.revenue).label("total_revenue"),
+            func.sum(SalesDailyRollup.order_count).label("total_sales"),
+        )
+        .join(Product, Product.id == SalesDailyRollup.product_id)
+        .filter(SalesDailyRollup.owner_id == owner_id, SalesDailyRollup.day >= start_date)
+        .group_by(SalesDailyRollup.product_id, Product.name)
+        .order_by(desc("total_revenue"))
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            "product_id": row.product_id,
+            "product_name": row.name,
+            "total_quantity": int(row.total_quantity or 0),
+            "total_revenue": float(row.total_revenue or 0),
+            "total_sales": int(row.total_sales or 0),
+        }
+        for row in rows
+    ]
+
+
+def get_units_sold_by_product(db: Session, product_ids: Iterable[int], *, owner_id: int, start_date: date) -> dict[int, int]:
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    rows = (
+        db.query(SalesDailyRollup.product_id, func.sum(SalesDailyRollup.units).label("units"))
+        .filter(
+            SalesDailyRollup.owner_id == owner_id,
+            SalesDailyRollup.product_id.in_(product_ids),
+            SalesDailyRollup.day >= start_date,
+        )
+        .group_by(SalesDailyRollup.product_id)
+        .all()
+    )
+    return {row.product_id: int(row.units or 0) for row in rows}
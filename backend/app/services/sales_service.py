@@ -7,7 +7,8 @@ from fastapi import HTTPException, status
 from sqlalchemy.orm import Session, joinedload
 
 from app.models import Product, Sale, SalesOrder, SalesOrderItem, StockReservation, Warehouse
-from app.services.stock_ledger_service import consume_reservation, create_inventory_transaction, reserve_stock, sync_product_current_stock
+from app.services.atp_service import check_order_atp
+from app.services.stock_ledger_service import consume_reservation, release_reservation, reserve_stock
 
 SALES_ORDER_STATUSES = {
     "DRAFT",
@@ -95,6 +96,34 @@ def create_sales_order(
     return _load_sales_order(db, sales_order.id, owner_id=owner_id)
 
 
+def _outstanding_order_lines(db: Session, sales_order: SalesOrder, *, owner_id: int) -> list[dict]:
+    default_warehouse_id = None
+    lines = []
+    for item in sales_order.items:
+        outstanding = item.quantity_ordered - item.quantity_reserved - item.quantity_fulfilled
+        if outstanding <= 0:
+            continue
+        warehouse_id = item.warehouse_id
+        if warehouse_id is None:
+            if default_warehouse_id is None:
+                default_warehouse = db.query(Warehouse).filter(Warehouse.owner_id == owner_id).order_by(Warehouse.id.asc()).first()
+                if default_warehouse is None:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No warehouse available for reservation")
+                default_warehouse_id = default_warehouse.id
+            warehouse_id = default_warehouse_id
+        lines.append({"item": item, "item_id": item.id, "product_id": item.product_id, "warehouse_id": warehouse_id, "quantity": outstanding})
+    return lines
+
+
+def get_sales_order_atp(db: Session, sales_order_id: int, *, owner_id: int) -> dict:
+    sales_order = _load_sales_order(db, sales_order_id, owner_id=owner_id)
+    lines = _outstanding_order_lines(db, sales_order, owner_id=owner_id)
+    result = check_order_atp(db, lines, owner_id=owner_id)
+    for line, quote in zip(lines, result["lines"]):
+        quote["item_id"] = line["item_id"]
+    return {"sales_order_id": sales_order.id, **result}
+
+
 def confirm_sales_order(db: Session, sales_order_id: int, *, owner_id: int) -> SalesOrder:
     sales_order = _load_sales_order(db, sales_order_id, owner_id=owner_id)
     _ensure_sales_order_not_cancelled(sales_order)
@@ -102,24 +131,30 @@ def confirm_sales_order(db: Session, sales_order_id: int, *, owner_id: int) -> S
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Sales order cannot be confirmed from current status")
 
     try:
-        for item in sales_order.items:
-            warehouse_id = item.warehouse_id
-            if warehouse_id is None:
-                default_warehouse = db.query(Warehouse).filter(Warehouse.owner_id == owner_id).order_by(Warehouse.id.asc()).first()
-                if default_warehouse is None:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No warehouse available for reservation")
-                warehouse_id = default_warehouse.id
-                item.warehouse_id = warehouse_id
-
-            outstanding = item.quantity_ordered - item.quantity_reserved - item.quantity_fulfilled
-            if outstanding <= 0:
-                continue
+        lines = _outstanding_order_lines(db, sales_order, owner_id=owner_id)
+        # Quote the whole order before reserving anything so a short line reports when it can ship.
+        atp = check_order_atp(db, lines, owner_id=owner_id)
+        for quote in atp["lines"]:
+            if not quote["can_fulfill_now"]:
+                promise = quote["promise_date"].isoformat() if quote["promise_date"] else "not covered by inbound supply"
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=(
+                        f"Insufficient available stock for product {quote['product_id']}. "
+                        f"Available: {quote['available_now']}, Requested: {quote['cumulative_demand']}. "
+                        f"Earliest promise date: {promise}"
+                    ),
+                )
 
+        # Reserve in a stable (product, warehouse) order so concurrent confirmations lock balance rows consistently.
+        for line in sorted(lines, key=lambda line: (line["product_id"], line["warehouse_id"])):
+            item = line["item"]
+            item.warehouse_id = line["warehouse_id"]
             reservation = reserve_stock(
                 db,
                 product_id=item.product_id,
-                warehouse_id=warehouse_id,
-                quantity=outstanding,
+                warehouse_id=line["warehouse_id"],
+                quantity=line["quantity"],
                 reference_type="SALES_ORDER_ITEM",
                 reference_id=str(item.id),
                 commit=False,
@@ -196,7 +231,6 @@ def fulfill_sales_order_item(
         db.add(item)
         _update_sales_order_status(sales_order)
         db.add(sales_order)
-        sync_product_current_stock(db, item.product_id)
         db.commit()
         return _load_sales_order(db, sales_order.id, owner_id=owner_id)
     except Exception:
@@ -213,20 +247,7 @@ def cancel_sales_order(db: Session, sales_order_id: int, *, owner_id: int) -> Sa
         for item in sales_order.items:
             reservations = _find_active_reservations_for_item(db, item)
             for reservation in reservations:
-                create_inventory_transaction(
-                    db,
-                    product_id=reservation.product_id,
-                    warehouse_id=reservation.warehouse_id,
-                    transaction_type="RESERVATION_RELEASED",
-                    quantity=reservation.quantity,
-                    direction="RELEASE",
-                    reference_type="SALES_ORDER_ITEM",
-                    reference_id=str(item.id),
-                    reason="Sales order cancelled",
-                    commit=False,
-                )
-                reservation.status = "RELEASED"
-                db.add(reservation)
+                release_reservation(db, reservation.id, reason="Sales order cancelled", commit=False)
             item.quantity_reserved = 0
             db.add(item)
         sales_order.status = "CANCELLED"
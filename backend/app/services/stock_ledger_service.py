@@ -1,20 +1,27 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Optional
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import case, func
+from sqlalchemy import bindparam, case, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
 
 from app.models import (
     InventoryTransaction,
+    LedgerArchive,
     Product,
     Sale,
+    StockBalance,
+    StockCheckpoint,
     StockReservation,
     StockTransfer,
     Warehouse,
 )
+from app.services import forecasting_service
 
 DEFAULT_WAREHOUSE_CODE = "MAIN"
 DEFAULT_WAREHOUSE_NAME = "Main Warehouse"
@@ -39,6 +46,9 @@ INVENTORY_DIRECTIONS = {"IN", "OUT", "RESERVE", "RELEASE", "NEUTRAL"}
 RESERVATION_ACTIVE_STATUSES = {"ACTIVE"}
 RESERVATION_OPEN_STATUSES = {"ACTIVE", "RELEASED", "CONSUMED", "CANCELLED"}
 TRANSFER_STATUSES = {"DRAFT", "IN_TRANSIT", "RECEIVED", "CANCELLED"}
+STOCK_BALANCE_FIELDS = ("on_hand", "reserved", "damaged", "quarantined")
+STOCK_POSITION_BATCH_SIZE = 5000
+STOCK_CHECKPOINT_FIELDS = ("on_hand", "damaged", "quarantined")
 
 
 def _get_product_by_sku(db: Session, sku: str, *, owner_id: Optional[int] = None) -> Product:
@@ -55,13 +65,6 @@ def get_product_by_sku(db: Session, sku: str, *, owner_id: Optional[int] = None)
     return _get_product_by_sku(db, sku, owner_id=owner_id)
 
 
-def _apply_inventory_filters(query, product_id: int, warehouse_id: Optional[int] = None):
-    query = query.filter(InventoryTransaction.product_id == product_id)
-    if warehouse_id is not None:
-        query = query.filter(InventoryTransaction.warehouse_id == warehouse_id)
-    return query
-
-
 def get_default_warehouse(db: Session, *, owner_id: Optional[int] = None) -> Warehouse:
     query = db.query(Warehouse).filter(Warehouse.code == DEFAULT_WAREHOUSE_CODE)
     if owner_id is not None:
@@ -91,84 +94,670 @@ def _validate_product_and_warehouse(
     return product, warehouse
 
 
-def get_on_hand(db: Session, product_id: int, warehouse_id: Optional[int] = None) -> int:
-    # Ledger is the source of truth: physical stock is derived only from IN and OUT movements.
-    result = _apply_inventory_filters(
-        db.query(
-            func.coalesce(
-                func.sum(
-                    case(
-                        (InventoryTransaction.direction == "IN", InventoryTransaction.quantity),
-                        (InventoryTransaction.direction == "OUT", -InventoryTransaction.quantity),
-                        else_=0,
-                    )
-                ),
-                0,
-            )
-        ),
-        product_id,
-        warehouse_id,
-    ).scalar()
-    return int(result or 0)
+def _read_stock_balance(db: Session, product_id: int, warehouse_id: Optional[int] = None) -> dict[str, int]:
+    # Balances are maintained by the ledger write path, so a read is a primary-key lookup
+    # (or a sum over the product's warehouse rows) instead of an aggregate over history.
+    query = db.query(
+        func.coalesce(func.sum(StockBalance.on_hand), 0),
+        func.coalesce(func.sum(StockBalance.reserved), 0),
+        func.coalesce(func.sum(StockBalance.damaged), 0),
+        func.coalesce(func.sum(StockBalance.quarantined), 0),
+    ).filter(StockBalance.product_id == product_id)
+    if warehouse_id is not None:
+        query = query.filter(StockBalance.warehouse_id == warehouse_id)
+    on_hand, reserved, damaged, quarantined = query.one()
+    return {
+        "on_hand": int(on_hand or 0),
+        "reserved": int(reserved or 0),
+        "damaged": int(damaged or 0),
+        "quarantined": int(quarantined or 0),
+    }
 
 
-def get_reserved(db: Session, product_id: int, warehouse_id: Optional[int] = None) -> int:
-    query = db.query(func.coalesce(func.sum(StockReservation.quantity), 0)).filter(
-        StockReservation.product_id == product_id,
-        StockReservation.status == "ACTIVE",
+def _available_delta(deltas: dict[str, int]) -> int:
+    return deltas.get("on_hand", 0) - deltas.get("reserved", 0) - deltas.get("damaged", 0) - deltas.get("quarantined", 0)
+
+
+def _apply_product_stock_deltas(db: Session, deltas: dict[int, int]) -> None:
+    """Add each product's change in available stock to `current_stock` and re-evaluate its low-stock flag.
+
+    The increment happens in SQL, so concurrent writers to different warehouses of one product
+    each add their own change to the committed value instead of overwriting it with a total
+    read from their own snapshot.
+    """
+    rows = [{"target_id": product_id, "delta": delta} for product_id, delta in sorted(deltas.items()) if delta]
+    if not rows:
+        return
+    products = Product.__table__
+    current_stock = func.coalesce(products.c.current_stock, 0) + bindparam("delta")
+    db.execute(
+        products.update()
+        .where(products.c.id == bindparam("target_id"))
+        .values(current_stock=current_stock, is_low_stock=current_stock <= func.coalesce(products.c.min_stock_threshold, 0)),
+        rows,
     )
-    if warehouse_id is not None:
-        query = query.filter(StockReservation.warehouse_id == warehouse_id)
-    return int(query.scalar() or 0)
+    for row in rows:
+        product = db.identity_map.get(identity_key(Product, row["target_id"]))
+        if product is not None:
+            db.expire(product, ["current_stock", "is_low_stock"])
 
 
-def _get_transaction_type_quantity(
+def _apply_stock_balance_delta(
     db: Session,
     product_id: int,
-    transaction_type: str,
-    warehouse_id: Optional[int] = None,
-) -> int:
-    result = _apply_inventory_filters(
-        db.query(func.coalesce(func.sum(InventoryTransaction.quantity), 0)).filter(
-            InventoryTransaction.transaction_type == transaction_type
-        ),
-        product_id,
-        warehouse_id,
-    ).scalar()
-    return int(result or 0)
+    warehouse_id: int,
+    *,
+    update_product: bool = True,
+    **deltas: int,
+) -> None:
+    changes = {field: int(deltas.get(field, 0)) for field in STOCK_BALANCE_FIELDS}
+    if not any(changes.values()):
+        return
+    # Insert-or-increment in one statement, so concurrent first writers for a pair never race
+    # on creating the row and never overwrite each other's deltas.
+    dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(StockBalance).values(product_id=product_id, warehouse_id=warehouse_id, **changes)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[StockBalance.product_id, StockBalance.warehouse_id],
+            set_={
+                **{field: getattr(StockBalance, field) + statement.excluded[field] for field, delta in changes.items() if delta},
+                "updated_at": func.now(),
+            },
+        )
+    )
+    if update_product:
+        _apply_product_stock_deltas(db, {product_id: _available_delta(changes)})
+
+
+def _claim_stock_balance(
+    db: Session,
+    product_id: int,
+    warehouse_id: int,
+    quantity: int,
+    *,
+    update_product: bool = True,
+    **deltas: int,
+) -> None:
+    # Check and claim in one conditional UPDATE: the balance row lock serializes writers for a
+    # single (product, warehouse) only, and a loser sees the winner's committed row and fails.
+    available_expr = _balance_available_expr()
+    updated = (
+        db.query(StockBalance)
+        .filter(
+            StockBalance.product_id == product_id,
+            StockBalance.warehouse_id == warehouse_id,
+            available_expr >= quantity,
+        )
+        .update(
+            {getattr(StockBalance, field): getattr(StockBalance, field) + delta for field, delta in deltas.items()},
+            synchronize_session=False,
+        )
+    )
+    if updated == 0:
+        available = get_available(db, product_id, warehouse_id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient available stock. Available: {available}, Requested: {quantity}",
+        )
+    if update_product:
+        _apply_product_stock_deltas(db, {product_id: _available_delta(deltas)})
+
+
+def _ledger_balance_delta(transaction_type: str, direction: str, quantity: int) -> dict[str, int]:
+    deltas: dict[str, int] = {}
+    if direction == "IN":
+        deltas["on_hand"] = quantity
+    elif direction == "OUT":
+        deltas["on_hand"] = -quantity
+    if transaction_type == "DAMAGED":
+        deltas["damaged"] = quantity
+    elif transaction_type == "QUARANTINED":
+        deltas["quarantined"] = quantity
+    return deltas
+
+
+def _ledger_balance_columns() -> tuple:
+    # Ledger is the source of truth: physical stock is derived only from IN and OUT movements.
+    return (
+        func.coalesce(
+            func.sum(
+                case(
+                    (InventoryTransaction.direction == "IN", InventoryTransaction.quantity),
+                    (InventoryTransaction.direction == "OUT", -InventoryTransaction.quantity),
+                    else_=0,
+                )
+            ),
+            0,
+        ).label("on_hand"),
+        func.coalesce(
+            func.sum(case((InventoryTransaction.transaction_type == "DAMAGED", InventoryTransaction.quantity), else_=0)),
+            0,
+        ).label("damaged"),
+        func.coalesce(
+            func.sum(case((InventoryTransaction.transaction_type == "QUARANTINED", InventoryTransaction.quantity), else_=0)),
+            0,
+        ).label("quarantined"),
+    )
+
+
+def get_on_hand(db: Session, product_id: int, warehouse_id: Optional[int] = None) -> int:
+    return _read_stock_balance(db, product_id, warehouse_id)["on_hand"]
+
+
+def get_reserved(db: Session, product_id: int, warehouse_id: Optional[int] = None) -> int:
+    return _read_stock_balance(db, product_id, warehouse_id)["reserved"]
 
 
 def get_damaged(db: Session, product_id: int, warehouse_id: Optional[int] = None) -> int:
-    return _get_transaction_type_quantity(db, product_id, "DAMAGED", warehouse_id)
+    return _read_stock_balance(db, product_id, warehouse_id)["damaged"]
 
 
 def get_quarantined(db: Session, product_id: int, warehouse_id: Optional[int] = None) -> int:
-    return _get_transaction_type_quantity(db, product_id, "QUARANTINED", warehouse_id)
+    return _read_stock_balance(db, product_id, warehouse_id)["quarantined"]
 
 
 def get_available(db: Session, product_id: int, warehouse_id: Optional[int] = None) -> int:
-    on_hand = get_on_hand(db, product_id, warehouse_id)
-    reserved = get_reserved(db, product_id, warehouse_id)
-    damaged = get_damaged(db, product_id, warehouse_id)
-    quarantined = get_quarantined(db, product_id, warehouse_id)
-    return on_hand - reserved - damaged - quarantined
+    balance = _read_stock_balance(db, product_id, warehouse_id)
+    return balance["on_hand"] - balance["reserved"] - balance["damaged"] - balance["quarantined"]
+
+
+def _build_stock_position(product_id: int, warehouse_id: Optional[int], balance: dict[str, int]) -> dict:
+    return {
+        "product_id": product_id,
+        "warehouse_id": warehouse_id,
+        "on_hand": balance["on_hand"],
+        "reserved": balance["reserved"],
+        "available": balance["on_hand"] - balance["reserved"] - balance["damaged"] - balance["quarantined"],
+        "damaged": balance["damaged"],
+        "quarantined": balance["quarantined"],
+    }
 
 
 def get_stock_position(db: Session, product_id: int, warehouse_id: Optional[int] = None) -> dict:
-    on_hand = get_on_hand(db, product_id, warehouse_id)
-    reserved = get_reserved(db, product_id, warehouse_id)
-    damaged = get_damaged(db, product_id, warehouse_id)
-    quarantined = get_quarantined(db, product_id, warehouse_id)
+    return _build_stock_position(product_id, warehouse_id, _read_stock_balance(db, product_id, warehouse_id))
+
+
+def get_stock_positions(
+    db: Session,
+    product_ids: Iterable[int],
+    warehouse_id: Optional[int] = None,
+) -> dict[int, dict]:
+    """Return stock positions keyed by product id using one grouped query per batch of products."""
+    unique_ids = list(dict.fromkeys(product_ids))
+    empty_balance = dict.fromkeys(STOCK_BALANCE_FIELDS, 0)
+    positions = {product_id: _build_stock_position(product_id, warehouse_id, empty_balance) for product_id in unique_ids}
+
+    for start in range(0, len(unique_ids), STOCK_POSITION_BATCH_SIZE):
+        batch = unique_ids[start : start + STOCK_POSITION_BATCH_SIZE]
+        query = db.query(
+            StockBalance.product_id,
+            func.coalesce(func.sum(StockBalance.on_hand), 0).label("on_hand"),
+            func.coalesce(func.sum(StockBalance.reserved), 0).label("reserved"),
+            func.coalesce(func.sum(StockBalance.damaged), 0).label("damaged"),
+            func.coalesce(func.sum(StockBalance.quarantined), 0).label("quarantined"),
+        ).filter(StockBalance.product_id.in_(batch))
+        if warehouse_id is not None:
+            query = query.filter(StockBalance.warehouse_id == warehouse_id)
+        for row in query.group_by(StockBalance.product_id).all():
+            positions[row.product_id] = _build_stock_position(
+                row.product_id,
+                warehouse_id,
+                {field: int(getattr(row, field) or 0) for field in STOCK_BALANCE_FIELDS},
+            )
+    return positions
+
+
+def get_available_by_location(db: Session, locations: Iterable[tuple[int, int]]) -> dict[tuple[int, int], int]:
+    """Return available stock keyed by (product id, warehouse id), reading balance rows in product batches."""
+    wanted = set(locations)
+    available = dict.fromkeys(wanted, 0)
+    product_ids = list(dict.fromkeys(product_id for product_id, _ in wanted))
+    for start in range(0, len(product_ids), STOCK_POSITION_BATCH_SIZE):
+        batch = product_ids[start : start + STOCK_POSITION_BATCH_SIZE]
+        rows = db.query(StockBalance.product_id, StockBalance.warehouse_id, _balance_available_expr().label("available")).filter(
+            StockBalance.product_id.in_(batch)
+        )
+        for row in rows:
+            if (row.product_id, row.warehouse_id) in wanted:
+                available[(row.product_id, row.warehouse_id)] = int(row.available or 0)
+    return available
+
+
+def get_ledger_archive_horizon(db: Session) -> Optional[date]:
+    """First day still held in the ledger, or None when no history has been archived."""
+    return db.query(func.max(LedgerArchive.period_end)).scalar()
+
+
+def rebuild_stock_balances(db: Session, *, owner_id: Optional[int] = None, commit: bool = True) -> int:
+    """Recompute stock_balances from the inventory ledger and active reservations."""
+    product_scope = select(Product.id)
+    if owner_id is not None:
+        product_scope = product_scope.where(Product.owner_id == owner_id)
+
+    ledger_query = (
+        db.query(
+            InventoryTransaction.product_id,
+            InventoryTransaction.warehouse_id,
+            *_ledger_balance_columns(),
+        )
+        .filter(InventoryTransaction.product_id.in_(product_scope))
+        .group_by(InventoryTransaction.product_id, InventoryTransaction.warehouse_id)
+    )
+    # Archived months are replaced by the checkpoints written for the day before the horizon.
+    horizon = get_ledger_archive_horizon(db)
+    baseline_rows = []
+    if horizon is not None:
+        ledger_query = ledger_query.filter(InventoryTransaction.created_at >= _day_start(horizon))
+        baseline_rows = (
+            db.query(StockCheckpoint)
+            .filter(
+                StockCheckpoint.checkpoint_date == horizon - timedelta(days=1),
+                StockCheckpoint.product_id.in_(product_scope),
+            )
+            .all()
+        )
+    ledger_rows = ledger_query.all()
+    reservation_rows = (
+        db.query(
+            StockReservation.product_id,
+            StockReservation.warehouse_id,
+            func.coalesce(func.sum(StockReservation.quantity), 0).label("reserved"),
+        )
+        .filter(StockReservation.status == "ACTIVE", StockReservation.product_id.in_(product_scope))
+        .group_by(StockReservation.product_id, StockReservation.warehouse_id)
+        .all()
+    )
+
+    balances: dict[tuple[int, int], dict[str, int]] = defaultdict(lambda: dict.fromkeys(STOCK_BALANCE_FIELDS, 0))
+    for row in baseline_rows:
+        balance = balances[(row.product_id, row.warehouse_id)]
+        for field in STOCK_CHECKPOINT_FIELDS:
+            balance[field] = getattr(row, field)
+    for row in ledger_rows:
+        balance = balances[(row.product_id, row.warehouse_id)]
+        for field in STOCK_CHECKPOINT_FIELDS:
+            balance[field] += int(getattr(row, field) or 0)
+    for row in reservation_rows:
+        balances[(row.product_id, row.warehouse_id)]["reserved"] = int(row.reserved or 0)
+
+    try:
+        db.query(StockBalance).filter(StockBalance.product_id.in_(product_scope)).delete(synchronize_session=False)
+        if balances:
+            db.execute(
+                insert(StockBalance),
+                [
+                    {"product_id": product_id, "warehouse_id": warehouse_id, **values}
+                    for (product_id, warehouse_id), values in balances.items()
+                ],
+            )
+        refresh_low_stock_flags(db, owner_id=owner_id)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return len(balances)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def find_product_stock_drift(db: Session, *, owner_id: Optional[int] = None) -> list[dict]:
+    available = (
+        select(
+            StockBalance.product_id,
+            func.sum(_balance_available_expr()).label("available"),
+        )
+        .group_by(StockBalance.product_id)
+        .subquery()
+    )
+    query = (
+        db.query(
+            Product.id,
+            Product.sku,
+            Product.current_stock,
+            func.coalesce(available.c.available, 0).label("available"),
+        )
+        .outerjoin(available, available.c.product_id == Product.id)
+        .filter(func.coalesce(Product.current_stock, 0) != func.coalesce(available.c.available, 0))
+    )
+    if owner_id is not None:
+        query = query.filter(Product.owner_id == owner_id)
+    return [
+        {"product_id": row.id, "sku": row.sku, "current_stock": row.current_stock, "available": int(row.available)}
+        for row in query.order_by(Product.id.asc()).all()
+    ]
+
+
+def reconcile_product_current_stock(db: Session, *, owner_id: Optional[int] = None, commit: bool = True) -> int:
+    drift = find_product_stock_drift(db, owner_id=owner_id)
+    try:
+        if drift:
+            db.execute(update(Product), [{"id": row["product_id"], "current_stock": row["available"]} for row in drift])
+        refresh_low_stock_flags(db, owner_id=owner_id)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return len(drift)
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _day_start(day: date) -> datetime:
+    # UTC-aware so PostgreSQL compares against UTC midnight whatever the session time zone.
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive datetimes are taken to be UTC, which is how the ledger is written.
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _utc_day(value: datetime) -> date:
+    return _as_utc(value).date()
+
+
+def _product_warehouse_ids(db: Session, product_id: int) -> list[int]:
+    rows = db.query(StockBalance.warehouse_id).filter(StockBalance.product_id == product_id).order_by(StockBalance.warehouse_id.asc()).all()
+    return [row.warehouse_id for row in rows]
+
+
+def get_stock_position_as_of(
+    db: Session,
+    product_id: int,
+    warehouse_id: Optional[int],
+    at: datetime,
+) -> dict:
+    """Reconstruct physical stock at a point in time from the nearest checkpoint plus the ledger tail."""
+    at = _as_utc(at)
+    horizon = get_ledger_archive_horizon(db)
+    if horizon is not None and at.date() < horizon:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ledger history before {horizon.isoformat()} is archived; use daily closing stock instead",
+        )
+    warehouse_ids = [warehouse_id] if warehouse_id is not None else _product_warehouse_ids(db, product_id)
+    # A checkpoint closes its day at midnight, so only checkpoints for days before `at` are usable.
+    cutoff = at.date() - timedelta(days=1)
+    totals = dict.fromkeys(STOCK_CHECKPOINT_FIELDS, 0)
+    checkpoint_dates: list[date] = []
+
+    for current_warehouse_id in warehouse_ids:
+        checkpoint = (
+            db.query(StockCheckpoint)
+            .filter(
+                StockCheckpoint.product_id == product_id,
+                StockCheckpoint.warehouse_id == current_warehouse_id,
+                StockCheckpoint.checkpoint_date <= cutoff,
+            )
+            .order_by(StockCheckpoint.checkpoint_date.desc())
+            .first()
+        )
+        tail_query = db.query(*_ledger_balance_columns()).filter(
+            InventoryTransaction.product_id == product_id,
+            InventoryTransaction.warehouse_id == current_warehouse_id,
+            InventoryTransaction.created_at <= at,
+        )
+        if checkpoint is not None:
+            checkpoint_dates.append(checkpoint.checkpoint_date)
+            tail_query = tail_query.filter(InventoryTransaction.created_at >= _day_start(checkpoint.checkpoint_date + timedelta(days=1)))
+            for field in STOCK_CHECKPOINT_FIELDS:
+                totals[field] += getattr(checkpoint, field)
+        tail = tail_query.one()
+        for field in STOCK_CHECKPOINT_FIELDS:
+            totals[field] += int(getattr(tail, field) or 0)
+
     return {
         "product_id": product_id,
         "warehouse_id": warehouse_id,
-        "on_hand": on_hand,
-        "reserved": reserved,
-        "available": on_hand - reserved - damaged - quarantined,
-        "damaged": damaged,
-        "quarantined": quarantined,
+        "as_of": at,
+        **totals,
+        "checkpoint_date": min(checkpoint_dates) if checkpoint_dates else None,
+    }
+
+
+def get_daily_closing_stock(
+    db: Session,
+    product_id: int,
+    warehouse_id: Optional[int],
+    start_date: date,
+    end_date: date,
+) -> list[dict]:
+    """Daily closing physical stock for charts, forward-filled from checkpoints with only the un-checkpointed tail replayed."""
+    if end_date < start_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date must not be before start_date")
+
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    series = {day: dict.fromkeys(STOCK_CHECKPOINT_FIELDS, 0) for day in days}
+    warehouse_ids = [warehouse_id] if warehouse_id is not None else _product_warehouse_ids(db, product_id)
+
+    for current_warehouse_id in warehouse_ids:
+        checkpoint_query = db.query(StockCheckpoint).filter(
+            StockCheckpoint.product_id == product_id,
+            StockCheckpoint.warehouse_id == current_warehouse_id,
+        )
+        opening = (
+            checkpoint_query.filter(StockCheckpoint.checkpoint_date < start_date)
+            .order_by(StockCheckpoint.checkpoint_date.desc())
+            .first()
+        )
+        checkpoints = {
+            checkpoint.checkpoint_date: checkpoint
+            for checkpoint in checkpoint_query.filter(
+                StockCheckpoint.checkpoint_date >= start_date,
+                StockCheckpoint.checkpoint_date <= end_date,
+            ).all()
+        }
+        last_checkpoint_date = max(checkpoints) if checkpoints else (opening.checkpoint_date if opening else None)
+
+        # Only movements after the latest usable checkpoint are replayed from the ledger.
+        tail_query = db.query(
+            InventoryTransaction.created_at,
+            InventoryTransaction.transaction_type,
+            InventoryTransaction.direction,
+            InventoryTransaction.quantity,
+        ).filter(
+            InventoryTransaction.product_id == product_id,
+            InventoryTransaction.warehouse_id == current_warehouse_id,
+            InventoryTransaction.created_at < _day_start(end_date + timedelta(days=1)),
+        )
+        if last_checkpoint_date is not None:
+            tail_query = tail_query.filter(InventoryTransaction.created_at >= _day_start(last_checkpoint_date + timedelta(days=1)))
+        tail_deltas: dict[date, dict[str, int]] = defaultdict(lambda: dict.fromkeys(STOCK_CHECKPOINT_FIELDS, 0))
+        running = {field: getattr(opening, field) if opening else 0 for field in STOCK_CHECKPOINT_FIELDS}
+        for row in tail_query.all():
+            delta = _ledger_balance_delta(row.transaction_type, row.direction, row.quantity)
+            # Tail rows dated before the window (no checkpoint yet) fold into the opening balance.
+            day = _utc_day(row.created_at)
+            bucket = running if day < start_date else tail_deltas[day]
+            for field in STOCK_CHECKPOINT_FIELDS:
+                bucket[field] += delta.get(field, 0)
+
+        for day in days:
+            checkpoint = checkpoints.get(day)
+            if checkpoint is not None:
+                running = {field: getattr(checkpoint, field) for field in STOCK_CHECKPOINT_FIELDS}
+            elif day in tail_deltas:
+                running = {field: running[field] + tail_deltas[day][field] for field in STOCK_CHECKPOINT_FIELDS}
+            for field in STOCK_CHECKPOINT_FIELDS:
+                series[day][field] += running[field]
+
+    return [{"date": day, "product_id": product_id, "warehouse_id": warehouse_id, **series[day]} for day in days]
+
+
+def write_stock_checkpoints(db: Session, *, through_date: Optional[date] = None, commit: bool = True) -> int:
+    """Write daily closing checkpoints up to `through_date` (default: yesterday), replaying only new ledger days."""
+    through_date = through_date or (datetime.utcnow().date() - timedelta(days=1))
+    last_written = db.query(func.max(StockCheckpoint.checkpoint_date)).scalar()
+    if last_written is not None:
+        start_date = last_written + timedelta(days=1)
+    else:
+        first_movement = db.query(func.min(InventoryTransaction.created_at)).scalar()
+        if first_movement is None:
+            return 0
+        start_date = _utc_day(first_movement)
+    if start_date > through_date:
+        return 0
+
+    # Latest closing balance per (product, warehouse); checkpoints are only written for pairs that moved.
+    latest = (
+        db.query(
+            StockCheckpoint.product_id,
+            StockCheckpoint.warehouse_id,
+            func.max(StockCheckpoint.checkpoint_date).label("checkpoint_date"),
+        )
+        .group_by(StockCheckpoint.product_id, StockCheckpoint.warehouse_id)
+        .subquery()
+    )
+    closing: dict[tuple[int, int], dict[str, int]] = {
+        (row.product_id, row.warehouse_id): {field: getattr(row, field) for field in STOCK_CHECKPOINT_FIELDS}
+        for row in db.query(StockCheckpoint).join(
+            latest,
+            (latest.c.product_id == StockCheckpoint.product_id)
+            & (latest.c.warehouse_id == StockCheckpoint.warehouse_id)
+            & (latest.c.checkpoint_date == StockCheckpoint.checkpoint_date),
+        )
+    }
+
+    written = 0
+    try:
+        day = start_date
+        while day <= through_date:
+            day_rows = (
+                db.query(
+                    InventoryTransaction.product_id,
+                    InventoryTransaction.warehouse_id,
+                    *_ledger_balance_columns(),
+                )
+                .filter(
+                    InventoryTransaction.created_at >= _day_start(day),
+                    InventoryTransaction.created_at < _day_start(day + timedelta(days=1)),
+                )
+                .group_by(InventoryTransaction.product_id, InventoryTransaction.warehouse_id)
+                .all()
+            )
+            checkpoint_rows = []
+            for row in day_rows:
+                key = (row.product_id, row.warehouse_id)
+                previous = closing.get(key, dict.fromkeys(STOCK_CHECKPOINT_FIELDS, 0))
+                closing[key] = {field: previous[field] + int(getattr(row, field) or 0) for field in STOCK_CHECKPOINT_FIELDS}
+                checkpoint_rows.append({"product_id": key[0], "warehouse_id": key[1], "checkpoint_date": day, **closing[key]})
+            if checkpoint_rows:
+                db.execute(insert(StockCheckpoint), checkpoint_rows)
+                written += len(checkpoint_rows)
+            day += timedelta(days=1)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return written
+    except Exception:
+        db.rollback()
+        raise
+
+
+def rebuild_stock_checkpoints(
+    db: Session,
+    *,
+    owner_id: int,
+    start_date: Optional[date] = None,
+    commit: bool = True,
+) -> int:
+    """Rewrite the tenant's checkpoints from `start_date` after ledger rows were posted backdated.
+
+    Only days already checkpointed are rewritten; later days are left to `write_stock_checkpoints`.
+    """
+    last_written = db.query(func.max(StockCheckpoint.checkpoint_date)).scalar()
+    if last_written is None:
+        return 0
+    product_scope = select(Product.id).where(Product.owner_id == owner_id)
+    if start_date is None:
+        first_movement = (
+            db.query(func.min(InventoryTransaction.created_at))
+            .filter(InventoryTransaction.product_id.in_(product_scope))
+            .scalar()
+        )
+        if first_movement is None:
+            return 0
+        start_date = _utc_day(first_movement)
+    horizon = get_ledger_archive_horizon(db)
+    if horizon is not None:
+        start_date = max(start_date, horizon)
+    if start_date > last_written:
+        return 0
+
+    latest = (
+        db.query(
+            StockCheckpoint.product_id,
+            StockCheckpoint.warehouse_id,
+            func.max(StockCheckpoint.checkpoint_date).label("checkpoint_date"),
+        )
+        .filter(StockCheckpoint.product_id.in_(product_scope), StockCheckpoint.checkpoint_date < start_date)
+        .group_by(StockCheckpoint.product_id, StockCheckpoint.warehouse_id)
+        .subquery()
+    )
+    closing: dict[tuple[int, int], dict[str, int]] = {
+        (row.product_id, row.warehouse_id): {field: getattr(row, field) for field in STOCK_CHECKPOINT_FIELDS}
+        for row in db.query(StockCheckpoint).join(
+            latest,
+            (latest.c.product_id == StockCheckpoint.product_id)
+            & (latest.c.warehouse_id == StockCheckpoint.warehouse_id)
+            & (latest.c.checkpoint_date == StockCheckpoint.checkpoint_date),
+        )
     }
 
+    ledger_rows = (
+        db.query(
+            InventoryTransaction.product_id,
+            InventoryTransaction.warehouse_id,
+            InventoryTransaction.created_at,
+            InventoryTransaction.transaction_type,
+            InventoryTransaction.direction,
+            InventoryTransaction.quantity,
+        )
+        .filter(
+            InventoryTransaction.product_id.in_(product_scope),
+            InventoryTransaction.created_at >= _day_start(start_date),
+            InventoryTransaction.created_at < _day_start(last_written + timedelta(days=1)),
+        )
+        .yield_per(STOCK_POSITION_BATCH_SIZE)
+    )
+    day_deltas: dict[date, dict[tuple[int, int], dict[str, int]]] = defaultdict(dict)
+    for row in ledger_rows:
+        deltas = day_deltas[_utc_day(row.created_at)].setdefault(
+            (row.product_id, row.warehouse_id), dict.fromkeys(STOCK_CHECKPOINT_FIELDS, 0)
+        )
+        for field, delta in _ledger_balance_delta(row.transaction_type, row.direction, row.quantity).items():
+            if field in deltas:
+                deltas[field] += delta
+
+    written = 0
+    try:
+        db.query(StockCheckpoint).filter(
+            StockCheckpoint.product_id.in_(product_scope),
+            StockCheckpoint.checkpoint_date >= start_date,
+        ).delete(synchronize_session=False)
+        for day in sorted(day_deltas):
+            checkpoint_rows = []
+            for key, deltas in day_deltas[day].items():
+                previous = closing.get(key, dict.fromkeys(STOCK_CHECKPOINT_FIELDS, 0))
+                closing[key] = {field: previous[field] + deltas[field] for field in STOCK_CHECKPOINT_FIELDS}
+                checkpoint_rows.append({"product_id": key[0], "warehouse_id": key[1], "checkpoint_date": day, **closing[key]})
+            db.execute(insert(StockCheckpoint), checkpoint_rows)
+            written += len(checkpoint_rows)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return written
+    except Exception:
+        db.rollback()
+        raise
+
 
 def get_stock_position_by_sku(db: Session, sku: str, warehouse_id: Optional[int] = None, *, owner_id: Optional[int] = None) -> dict:
     product = _get_product_by_sku(db, sku, owner_id=owner_id)
@@ -178,34 +767,43 @@ def get_stock_position_by_sku(db: Session, sku: str, warehouse_id: Optional[int]
     return stock_position
 
 
-def get_available_to_promise(db: Session, product_id: int, warehouse_id: Optional[int] = None) -> dict:
-    stock_position = get_stock_position(db, product_id, warehouse_id)
-    stock_position["available_to_promise"] = stock_position["available"]
-    return stock_position
-
-
 def get_low_stock_items(db: Session, warehouse_id: Optional[int] = None, *, owner_id: Optional[int] = None) -> list[dict]:
-    low_stock_items: list[dict] = []
+    # Reads the maintained low-stock flags, so only the k flagged products are loaded and positioned.
     query = db.query(Product)
+    if warehouse_id is None:
+        query = query.filter(Product.is_low_stock.is_(True))
+    else:
+        # A product with no balance row in the warehouse has nothing available there.
+        query = query.outerjoin(
+            StockBalance,
+            (StockBalance.product_id == Product.id) & (StockBalance.warehouse_id == warehouse_id),
+        ).filter((StockBalance.product_id.is_(None)) | (StockBalance.is_low_stock.is_(True)))
     if owner_id is not None:
         query = query.filter(Product.owner_id == owner_id)
-    for product in query.order_by(Product.name.asc()).all():
-        stock_position = get_stock_position(db, product.id, warehouse_id)
-        threshold = product.min_stock_threshold or 0
-        if stock_position["available"] <= threshold:
-            low_stock_items.append(
-                {
-                    **stock_position,
-                    "sku": product.sku,
-                    "product_name": product.name,
-                    "min_stock_threshold": threshold,
-                    "recommendation": {
-                        "action": "REPLENISH",
-                        "reason": "Available stock is at or below minimum threshold",
-                    },
-                }
-            )
-    return low_stock_items
+    products = query.order_by(Product.name.asc()).all()
+    positions = get_stock_positions(db, [product.id for product in products], warehouse_id)
+    return [
+        {
+            **positions[product.id],
+            "sku": product.sku,
+            "product_name": product.name,
+            "min_stock_threshold": product.min_stock_threshold or 0,
+            "recommendation": {
+                "action": "REPLENISH",
+                "reason": "Available stock is at or below minimum threshold",
+            },
+        }
+        for product in products
+    ]
+
+
+def count_low_stock_products(db: Session, *, owner_id: int) -> int:
+    return (
+        db.query(func.count(Product.id))
+        .filter(Product.owner_id == owner_id, Product.is_low_stock.is_(True))
+        .scalar()
+        or 0
+    )
 
 
 def get_stock_movements_by_sku(
@@ -267,9 +865,12 @@ def calculate_days_of_cover(
         .scalar()
         or 0
     )
-    average_daily_demand = float(recent_sales_quantity) / lookback_days if lookback_days else 0.0
+    forecast = None
+    if product.owner_id is not None:
+        forecast = forecasting_service.get_demand_forecast(db, product_id, owner_id=product.owner_id, fallback_lookback_days=None)
+    average_daily_demand = forecast["daily_demand"] if forecast else float(recent_sales_quantity) / lookback_days
     stock_position = get_stock_position(db, product_id, warehouse_id)
-    days_of_cover = None if average_daily_demand <= 0 else stock_position["available"] / average_daily_demand
+    days_of_cover = forecasting_service.days_of_cover(stock_position["available"], average_daily_demand)
     recommendation = {
         "action": "REVIEW_REPLENISHMENT" if days_of_cover is not None and days_of_cover < 14 else "MONITOR",
         "reason": "Days of cover is below two weeks" if days_of_cover is not None and days_of_cover < 14 else "Coverage is within acceptable range or demand is insufficient to calculate",
@@ -281,6 +882,7 @@ def calculate_days_of_cover(
         "lookback_days": lookback_days,
         "recent_sales_quantity": int(recent_sales_quantity),
         "average_daily_demand": average_daily_demand,
+        "forecast_method": forecast["method"] if forecast else forecasting_service.METHOD_TRAILING_AVERAGE,
         "days_of_cover": days_of_cover,
         "recommendation": recommendation,
     }
@@ -411,18 +1013,63 @@ def create_transfer_request(
     }
 
 
+def _balance_available_expr():
+    return StockBalance.on_hand - StockBalance.reserved - StockBalance.damaged - StockBalance.quarantined
+
+
+def refresh_low_stock_flags(
+    db: Session,
+    product_ids: Optional[Iterable[int]] = None,
+    *,
+    owner_id: Optional[int] = None,
+) -> None:
+    """Re-evaluate the maintained low-stock flags; only rows that cross the threshold are written."""
+    _refresh_balance_low_stock_flags(db, product_ids, owner_id=owner_id)
+    product_available = (
+        select(func.coalesce(func.sum(_balance_available_expr()), 0))
+        .where(StockBalance.product_id == Product.id)
+        .scalar_subquery()
+    )
+    product_low = product_available <= func.coalesce(Product.min_stock_threshold, 0)
+
+    product_query = db.query(Product).filter(Product.is_low_stock != product_low)
+    if product_ids is not None:
+        product_query = product_query.filter(Product.id.in_(list(product_ids)))
+    if owner_id is not None:
+        product_query = product_query.filter(Product.owner_id == owner_id)
+    product_query.update({Product.is_low_stock: product_low}, synchronize_session=False)
+
+
+def _refresh_balance_low_stock_flags(
+    db: Session,
+    product_ids: Optional[Iterable[int]] = None,
+    *,
+    owner_id: Optional[int] = None,
+) -> None:
+    balance_threshold = (
+        select(func.coalesce(Product.min_stock_threshold, 0)).where(Product.id == StockBalance.product_id).scalar_subquery()
+    )
+    balance_low = _balance_available_expr() <= balance_threshold
+    balance_query = db.query(StockBalance).filter(StockBalance.is_low_stock != balance_low)
+    if product_ids is not None:
+        balance_query = balance_query.filter(StockBalance.product_id.in_(list(product_ids)))
+    if owner_id is not None:
+        balance_query = balance_query.filter(StockBalance.product_id.in_(select(Product.id).where(Product.owner_id == owner_id)))
+    balance_query.update({StockBalance.is_low_stock: balance_low}, synchronize_session=False)
+
+
 def sync_product_current_stock(
     db: Session,
     product_id: int,
     *,
     commit: bool = False,
 ) -> Product:
+    """Re-evaluate a product's warehouse low-stock flags; the balance writes already moved `current_stock`."""
     product = db.query(Product).filter(Product.id == product_id).first()
     if product is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
-    product.current_stock = get_available(db, product_id)
-    db.add(product)
+    _refresh_balance_low_stock_flags(db, [product_id])
     if commit:
         db.commit()
         db.refresh(product)
@@ -454,14 +1101,8 @@ def create_inventory_transaction(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported inventory direction")
 
     product, warehouse = _validate_product_and_warehouse(db, product_id, warehouse_id)
-
-    if direction == "OUT" and not allow_negative:
-        available = get_available(db, product_id, warehouse_id)
-        if available < quantity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient available stock. Available: {available}, Requested: {quantity}",
-            )
+    balance_delta = _ledger_balance_delta(transaction_type, direction, quantity)
+    guarded = direction == "OUT" and not allow_negative
 
     transaction = InventoryTransaction(
         product_id=product.id,
@@ -478,8 +1119,12 @@ def create_inventory_transaction(
     )
 
     try:
+        if guarded:
+            _claim_stock_balance(db, product.id, warehouse.id, quantity, **balance_delta)
         db.add(transaction)
         db.flush()
+        if not guarded:
+            _apply_stock_balance_delta(db, product.id, warehouse.id, **balance_delta)
         sync_product_current_stock(db, product_id)
         if commit:
             db.commit()
@@ -490,6 +1135,94 @@ def create_inventory_transaction(
         raise
 
 
+def create_inventory_transactions_bulk(
+    db: Session,
+    movements: Iterable[dict],
+    *,
+    created_by: Optional[int] = None,
+    commit: bool = True,
+) -> int:
+    """Validate and post many ledger movements with one insert and one balance update per (product, warehouse).
+
+    Each movement takes the keyword arguments of `create_inventory_transaction`. The
+    availability check for OUT movements applies to the net effect of the batch per
+    (product, warehouse), so a receipt and a shipment in the same batch offset each other.
+    A movement may carry `created_at` to post it backdated; the others take the server default.
+    """
+    movements = list(movements)
+    if not movements:
+        return 0
+
+    for movement in movements:
+        if movement["quantity"] <= 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Quantity must be greater than zero")
+        if movement["transaction_type"] not in INVENTORY_TRANSACTION_TYPES:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported transaction type")
+        if movement["direction"] not in INVENTORY_DIRECTIONS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported inventory direction")
+
+    product_ids = {movement["product_id"] for movement in movements}
+    warehouse_ids = {movement["warehouse_id"] for movement in movements}
+    if db.query(func.count(Product.id)).filter(Product.id.in_(product_ids)).scalar() != len(product_ids):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    if db.query(func.count(Warehouse.id)).filter(Warehouse.id.in_(warehouse_ids)).scalar() != len(warehouse_ids):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Warehouse not found")
+
+    balance_deltas: dict[tuple[int, int], dict[str, int]] = defaultdict(lambda: dict.fromkeys(STOCK_BALANCE_FIELDS, 0))
+    guarded_pairs: set[tuple[int, int]] = set()
+    rows = []
+    for movement in movements:
+        key = (movement["product_id"], movement["warehouse_id"])
+        for field, delta in _ledger_balance_delta(movement["transaction_type"], movement["direction"], movement["quantity"]).items():
+            balance_deltas[key][field] += delta
+        if movement["direction"] == "OUT" and not movement.get("allow_negative", False):
+            guarded_pairs.add(key)
+        reference_id = movement.get("reference_id")
+        row = {
+            "product_id": movement["product_id"],
+            "warehouse_id": movement["warehouse_id"],
+            "transaction_type": movement["transaction_type"],
+            "quantity": movement["quantity"],
+            "direction": movement["direction"],
+            "reference_type": movement.get("reference_type"),
+            "reference_id": str(reference_id) if reference_id is not None else None,
+            "reason": movement.get("reason"),
+            "notes": movement.get("notes"),
+            "created_by": movement.get("created_by", created_by),
+            "approved_by": movement.get("approved_by"),
+        }
+        if movement.get("created_at") is not None:
+            row["created_at"] = _as_utc(movement["created_at"])
+        rows.append(row)
+
+    product_deltas: dict[int, int] = defaultdict(int)
+    try:
+        # Sorted keys keep row-lock order stable across concurrent batches.
+        for key in sorted(balance_deltas):
+            deltas = balance_deltas[key]
+            available_delta = _available_delta(deltas)
+            if key in guarded_pairs and available_delta < 0:
+                _claim_stock_balance(db, key[0], key[1], -available_delta, update_product=False, **deltas)
+            else:
+                _apply_stock_balance_delta(db, key[0], key[1], update_product=False, **deltas)
+            product_deltas[key[0]] += available_delta
+        # A multi-row insert takes its columns from the first row, so backdated rows go in their own statement.
+        for backdated in (False, True):
+            batch = [row for row in rows if ("created_at" in row) is backdated]
+            if batch:
+                db.execute(insert(InventoryTransaction), batch)
+        _apply_product_stock_deltas(db, product_deltas)
+        _refresh_balance_low_stock_flags(db, product_ids)
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+
+
 def reserve_stock(
     db: Session,
     *,
@@ -505,12 +1238,6 @@ def reserve_stock(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Quantity must be greater than zero")
 
     _validate_product_and_warehouse(db, product_id, warehouse_id)
-    available = get_available(db, product_id, warehouse_id)
-    if available < quantity:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Insufficient available stock. Available: {available}, Requested: {quantity}",
-        )
 
     reservation = StockReservation(
         product_id=product_id,
@@ -522,6 +1249,7 @@ def reserve_stock(
     )
 
     try:
+        _claim_stock_balance(db, product_id, warehouse_id, quantity, reserved=quantity)
         db.add(reservation)
         db.flush()
         create_inventory_transaction(
@@ -549,7 +1277,14 @@ def reserve_stock(
         raise
 
 
-def release_reservation(db: Session, reservation_id: int, *, created_by: Optional[int] = None) -> StockReservation:
+def release_reservation(
+    db: Session,
+    reservation_id: int,
+    *,
+    reason: str = "Reservation released",
+    created_by: Optional[int] = None,
+    commit: bool = True,
+) -> StockReservation:
     reservation = db.query(StockReservation).filter(StockReservation.id == reservation_id).first()
     if reservation is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reservation not found")
@@ -559,6 +1294,7 @@ def release_reservation(db: Session, reservation_id: int, *, created_by: Optiona
     try:
         reservation.status = "RELEASED"
         db.add(reservation)
+        _apply_stock_balance_delta(db, reservation.product_id, reservation.warehouse_id, reserved=-reservation.quantity)
         create_inventory_transaction(
             db,
             product_id=reservation.product_id,
@@ -568,13 +1304,16 @@ def release_reservation(db: Session, reservation_id: int, *, created_by: Optiona
             direction="RELEASE",
             reference_type=reservation.reference_type,
             reference_id=reservation.reference_id,
-            reason="Reservation released",
+            reason=reason,
             created_by=created_by,
             commit=False,
         )
         sync_product_current_stock(db, reservation.product_id)
-        db.commit()
-        db.refresh(reservation)
+        if commit:
+            db.commit()
+            db.refresh(reservation)
+        else:
+            db.flush()
         return reservation
     except Exception:
         db.rollback()
@@ -607,6 +1346,9 @@ def consume_reservation(
         reservation.quantity -= consume_quantity
         reservation.status = "CONSUMED" if reservation.quantity == 0 else "ACTIVE"
         db.add(reservation)
+        # Release the reserved units before posting the OUT movement so the shipment
+        # is checked against the stock it was reserved from.
+        _apply_stock_balance_delta(db, reservation.product_id, reservation.warehouse_id, reserved=-consume_quantity)
         create_inventory_transaction(
             db,
             product_id=reservation.product_id,
@@ -772,7 +1514,12 @@ def seed_product_stock_from_legacy_current_stock(
     created_by: Optional[int] = None,
 ) -> Optional[InventoryTransaction]:
     if quantity <= 0:
-        sync_product_current_stock(db, product.id, commit=True)
+        # A new product has no ledger yet, so its stock starts from the (empty) balances.
+        product.current_stock = get_available(db, product.id)
+        db.add(product)
+        refresh_low_stock_flags(db, [product.id])
+        db.commit()
+        db.refresh(product)
         return None
 
     warehouse = get_default_warehouse(db, owner_id=product.owner_id)
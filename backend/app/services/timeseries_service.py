@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+
+def week_bucket(db: Session, column):
+    """SQL expression for the Monday that starts the ISO week of `column`."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc("week", column)
+    # SQLite: roll forward to Sunday (a no-op on Sundays), then back six days.
+    return func.date(column, "weekday 0", "-6 days")
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def week_window(*, weeks: int, offset: int = 0, now: Optional[datetime] = None) -> tuple[datetime, datetime]:
+    """[start, end) covering `weeks` calendar weeks, `offset` weeks back from the current one."""
+    today = (now or datetime.utcnow()).date()
+    current_week = today - timedelta(days=today.weekday())
+    end = datetime.combine(current_week + timedelta(weeks=1 - offset), time.min)
+    return end - timedelta(weeks=weeks), end
+
+
+def weekly_totals(
+    db: Session,
+    query: Query,
+    timestamp,
+    measures: dict,
+    *,
+    weeks: int,
+    offset: int = 0,
+) -> dict:
+    """Group `query` into ISO weeks in the database and sum each of `measures` per week.
+
+    `query` carries the joins and tenant filters, `timestamp` is the column to bucket on and
+    `measures` maps output names to summed expressions. Weeks without rows are omitted.
+    """
+    if weeks <= 0 or offset < 0:
+        raise ValueError("weeks must be greater than zero and offset must not be negative")
+    start, end = week_window(weeks=weeks, offset=offset)
+    bucket = week_bucket(db, timestamp).label("week_start")
+    rows = (
+        query.with_entities(bucket, *[func.coalesce(func.sum(expression), 0).label(name) for name, expression in measures.items()])
+        .filter(timestamp >= start, timestamp < end)
+        .group_by(bucket)
+        .order_by(bucket)
+        .all()
+    )
+    has_more = query.with_entities(timestamp).filter(timestamp < start).limit(1).first() is not None
+
+    series = []
+    for row in rows:
+        week_start = _as_date(row.week_start)
+        iso = week_start.isocalendar()
+        series.append(
+            {
+                "week": f"{iso.year}-W{iso.week:02d}",
+                "week_start": week_start.isoformat(),
+                **{name: getattr(row, name) for name in measures},
+            }
+        )
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "offset": offset,
+        "next_offset": offset + weeks if has_more else None,
+        "weeks": series,
+    }
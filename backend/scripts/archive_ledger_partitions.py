@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date
+from pathlib import Path
+import sys
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.database import SessionLocal
+from app.services.ledger_partition_service import archive_ledger_history, ensure_ledger_partitions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create upcoming ledger partitions and archive closed months into stock checkpoints.")
+    parser.add_argument("--before", type=date.fromisoformat, default=None, help="Archive ledger months before this first-of-month date.")
+    parser.add_argument("--months-ahead", type=int, default=3, help="Monthly partitions to keep created ahead of today.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        created = ensure_ledger_partitions(db, months_ahead=args.months_ahead)
+        print(f"Created {len(created)} ledger partitions.")
+        if args.before is not None:
+            result = archive_ledger_history(db, before=args.before)
+            for month in result["months"]:
+                target = month["partition_name"] or "deleted"
+                print(f"{month['period_start']}: archived {month['row_count']} rows ({target})")
+            print(f"Archived {len(result['months'])} months; wrote {result['checkpoints_written']} checkpoints.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
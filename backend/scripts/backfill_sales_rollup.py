@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date
+from pathlib import Path
+import sys
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.database import SessionLocal
+from app.services.sales_rollup_service import rebuild_sales_daily_rollup
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the sales_daily_rollup table from the sales history.")
+    parser.add_argument("--owner-id", type=int, default=None, help="Only rebuild this owner's rollup rows.")
+    parser.add_argument("--since", type=date.fromisoformat, default=None, help="Only rebuild days on or after this date.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        written = rebuild_sales_daily_rollup(db, owner_id=args.owner_id, start_date=args.since)
+        print(f"Wrote {written} sales rollup rows.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
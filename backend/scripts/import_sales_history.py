@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.database import SessionLocal
+from app.services.import_job_service import create_import_job, run_import_job
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import historical sales from a CSV or NDJSON file as an import job.")
+    parser.add_argument("path", nargs="?", help="CSV or NDJSON (.ndjson/.jsonl) file with sku, quantity, unit_price and sale_date columns.")
+    parser.add_argument("--owner-id", type=int, help="Owner the sales belong to.")
+    parser.add_argument("--resume", type=int, default=None, metavar="JOB_ID", help="Continue a crashed or failed import job instead.")
+    args = parser.parse_args()
+    if args.resume is None and (args.path is None or args.owner_id is None):
+        parser.error("path and --owner-id are required unless --resume is given")
+
+    db = SessionLocal()
+    try:
+        if args.resume is None:
+            with open(args.path, "rb") as upload:
+                job_id = create_import_job(db, owner_id=args.owner_id, entity="sales", upload=upload, filename=Path(args.path).name).id
+        else:
+            job_id = args.resume
+        job = run_import_job(db, job_id)
+        if job is None:
+            print(f"Import job {job_id} is held by another worker.")
+            return
+        print(
+            f"Import job {job.id} {job.status}: {job.processed_rows}/{job.total_rows} rows, "
+            f"{job.created_count} sales created, {job.error_count} row errors."
+        )
+        if job.failure_reason:
+            print(f"Failure: {job.failure_reason}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
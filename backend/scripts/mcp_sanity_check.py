@@ -217,6 +217,7 @@ def main() -> None:
         step("inventory tool low stock items", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="inventory.get_low_stock_items", payload={"warehouse_id": warehouse_a_id}))
         step("inventory tool days of cover", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="inventory.calculate_days_of_cover", payload={"product_id": product_id, "warehouse_id": warehouse_a_id, "lookback_days": 30}))
         step("inventory tool recommend transfer", lambda: client.invoke(db=db, context=contexts["BOOST"], tool_name="inventory.recommend_stock_transfer", payload={"product_id": product_id, "target_warehouse_id": warehouse_b_id}))
+        step("inventory tool rebalancing plan", lambda: client.invoke(db=db, context=contexts["BOOST"], tool_name="inventory.get_rebalancing_plan", payload={"target_cover_days": 14}))
         step("inventory tool stock adjustment request", lambda: client.invoke(db=db, context=contexts["BOOST"], tool_name="inventory.create_stock_adjustment_request", payload={"product_id": product_id, "warehouse_id": warehouse_a_id, "quantity": 2, "adjustment_type": "NEGATIVE", "reason": "Cycle count variance"}))
         step("inventory tool transfer request", lambda: client.invoke(db=db, context=contexts["BOOST"], tool_name="inventory.create_transfer_request", payload={"product_id": product_id, "from_warehouse_id": warehouse_a_id, "to_warehouse_id": warehouse_b_id, "quantity": 5}))
 
@@ -227,6 +228,7 @@ def main() -> None:
         step("sales tool best sellers", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="sales.get_best_selling_products", payload={"days": 30, "limit": 5}))
         step("sales tool velocity", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="sales.calculate_sales_velocity", payload={"product_id": product_id, "days": 30}))
         step("sales tool anomaly", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="sales.detect_sales_anomaly", payload={"product_id": product_id, "days": 7}))
+        step("sales tool catalog anomalies", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="sales.detect_catalog_anomalies", payload={"method": "rolling"}))
         step("sales tool compare channel", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="sales.compare_sales_by_channel", payload={"days": 30}))
         step("sales tool margin", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="sales.calculate_product_margin", payload={"product_id": product_id}))
 
@@ -237,6 +239,8 @@ def main() -> None:
         step("returns tool classify reasons", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="returns.classify_return_reasons", payload={"product_id": product_id}))
         step("returns tool adjusted margin", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="returns.calculate_return_adjusted_margin", payload={"product_id": product_id}))
         step("returns tool spike", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="returns.detect_return_spike", payload={"product_id": product_id, "days": 7}))
+        step("returns tool catalog margins", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="returns.get_catalog_return_margins", payload={}))
+        step("returns tool catalog spikes", lambda: client.invoke(db=db, context=contexts["PRO"], tool_name="returns.detect_catalog_return_spikes", payload={"days": 7}))
         step("returns tool supplier linkage", lambda: client.invoke(db=db, context=contexts["BOOST"], tool_name="returns.link_returns_to_supplier", payload={"product_id": product_id}))
         step("returns tool warehouse linkage", lambda: client.invoke(db=db, context=contexts["BOOST"], tool_name="returns.link_returns_to_warehouse", payload={"product_id": product_id}))
         step("returns tool quality investigation", lambda: client.invoke(db=db, context=contexts["BOOST"], tool_name="returns.create_quality_investigation", payload={"product_id": product_id, "issue_summary": "Repeated defects"}))
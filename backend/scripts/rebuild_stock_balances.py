@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.database import SessionLocal
+from app.services.stock_ledger_service import rebuild_stock_balances
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute stock_balances from the inventory ledger.")
+    parser.add_argument("--owner-id", type=int, default=None, help="Only rebuild balances for this owner's products.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rebuilt = rebuild_stock_balances(db, owner_id=args.owner_id)
+    finally:
+        db.close()
+    print(f"Rebuilt {rebuilt} stock balance rows.")
+
+
+if __name__ == "__main__":
+    main()
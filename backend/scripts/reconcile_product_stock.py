@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.database import SessionLocal
+from app.services.stock_ledger_service import (
+    find_product_stock_drift,
+    rebuild_stock_balances,
+    reconcile_product_current_stock,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Find and fix drift between Product.current_stock and ledger stock balances.")
+    parser.add_argument("--owner-id", type=int, default=None, help="Only reconcile this owner's products.")
+    parser.add_argument("--rebuild-balances", action="store_true", help="Recompute stock_balances from the ledger first.")
+    parser.add_argument("--dry-run", action="store_true", help="Report drifted products without updating them.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.rebuild_balances:
+            rebuild_stock_balances(db, owner_id=args.owner_id, commit=not args.dry_run)
+        if args.dry_run:
+            drift = find_product_stock_drift(db, owner_id=args.owner_id)
+            for row in drift:
+                print(f"{row['sku']}: current_stock={row['current_stock']} ledger_available={row['available']}")
+            print(f"Found {len(drift)} drifted products.")
+            db.rollback()
+        else:
+            fixed = reconcile_product_current_stock(db, owner_id=args.owner_id)
+            print(f"Reconciled current_stock for {fixed} products.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.database import SessionLocal
+from app.services.forecasting_service import DEFAULT_HISTORY_DAYS, refresh_all_demand_forecasts, refresh_demand_forecasts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Refit the per-product demand forecasts stored in demand_forecasts.")
+    parser.add_argument("--owner-id", type=int, default=None, help="Only refit this owner's products.")
+    parser.add_argument("--history-days", type=int, default=DEFAULT_HISTORY_DAYS, help="Complete days of sales history to fit on.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.owner_id is None:
+            written = refresh_all_demand_forecasts(db, history_days=args.history_days)
+        else:
+            written = refresh_demand_forecasts(db, owner_id=args.owner_id, history_days=args.history_days)
+        print(f"Stored {written} demand forecasts.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
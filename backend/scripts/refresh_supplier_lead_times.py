@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from app.database import SessionLocal
+from app.services.lead_time_service import refresh_all_supplier_lead_times, refresh_supplier_lead_times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fold new purchase order receipts into the supplier_lead_times table.")
+    parser.add_argument("--owner-id", type=int, default=None, help="Only refresh this owner's suppliers.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.owner_id is None:
+            added = refresh_all_supplier_lead_times(db)
+        else:
+            added = refresh_supplier_lead_times(db, owner_id=args.owner_id)
+        print(f"Added {added} purchase receipts to supplier lead-time stats.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_analytics_engine.db")
+
+from app.database import Base
+from app.models import Product, ReturnOrder, ReturnOrderItem, Sale, User
+from app.services import analytics_engine
+from app.services.analytics_service import calculate_sales_velocity, compare_sales_by_channel, get_weekly_sales
+
+
+class AnalyticsEngineTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="engine@example.com", firebase_uid="engine-user", full_name="Engine User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.widget = Product(name="Widget", sku="WIDGET-ENGINE", price=10.0, cost=4.0, owner_id=self.user.id)
+        self.gadget = Product(name="Gadget", sku="GADGET-ENGINE", price=20.0, cost=15.0, owner_id=self.user.id)
+        self.db.add_all([self.widget, self.gadget])
+        self.db.commit()
+        self.now = datetime.utcnow()
+        self._sell(self.widget, 6, days_ago=2)
+        self._sell(self.widget, 4, days_ago=5)
+        self._sell(self.widget, 5, days_ago=10)
+        self._sell(self.gadget, 3, days_ago=1)
+        return_order = ReturnOrder(return_number="RET-ENGINE-1", owner_id=self.user.id, return_date=self.now - timedelta(days=1))
+        self.db.add(return_order)
+        self.db.flush()
+        self.db.add(ReturnOrderItem(return_order_id=return_order.id, product_id=self.widget.id, quantity=2, refund_amount=20.0))
+        self.db.commit()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def _sell(self, product: Product, quantity: int, *, days_ago: float, sale_id: Optional[int] = None) -> None:
+        self.db.add(
+            Sale(
+                id=sale_id,
+                product_id=product.id,
+                quantity=quantity,
+                unit_price=product.price,
+                total_amount=quantity * product.price,
+                sale_date=self.now - timedelta(days=days_ago),
+                owner_id=self.user.id,
+            )
+        )
+        self.db.commit()
+
+    def test_service_results_come_from_the_frame(self) -> None:
+        velocity = calculate_sales_velocity(db=self.db, owner_id=self.user.id, product_id=self.widget.id, days=7)
+        self.assertEqual((velocity["units_sold_current_period"], velocity["units_sold_previous_period"]), (10, 5))
+        self.assertAlmostEqual(velocity["sales_velocity_change"], 1.0)
+
+        channels = compare_sales_by_channel(db=self.db, owner_id=self.user.id, days=7)["channels"]
+        self.assertEqual((channels[0]["units_sold"], channels[0]["orders"], channels[0]["gross_margin"]), (13, 3, 75.0))
+
+        weekly = get_weekly_sales(db=self.db, owner_id=self.user.id, sku="WIDGET-ENGINE", weeks=4)["weeks"]
+        self.assertEqual(sum(week["units_sold"] for week in weekly), 15)
+        expected_week = (self.now - timedelta(days=10)).isocalendar()
+        self.assertIn(f"{expected_week.year}-W{expected_week.week:02d}", [week["week"] for week in weekly])
+
+    def test_frame_is_cached_and_refreshed_incrementally(self) -> None:
+        frame = analytics_engine.get_tenant_frame(self.db, self.user.id)
+        self.assertEqual(len(frame.sale_ts), 4)
+        self._sell(self.gadget, 7, days_ago=0.5)
+        newer = analytics_engine.get_tenant_frame(self.db, self.user.id)
+        self.assertEqual(len(frame.sale_ts), 4)
+        self.assertEqual(len(newer.sale_ts), 5)
+        self.assertEqual(newer.last_sale_id, frame.last_sale_id + 1)
+
+        daily = analytics_engine.daily_units(newer, (self.now - timedelta(days=2)).date(), self.now.date())
+        self.assertEqual(daily.shape, (2, 3))
+        self.assertEqual(daily[newer.index_of(self.widget.id)].tolist(), [6.0, 0.0, 0.0])
+        self.assertEqual(daily.sum(), 16.0)
+
+    def test_append_picks_up_rows_committed_behind_a_higher_id(self) -> None:
+        self._sell(self.gadget, 2, days_ago=0.5, sale_id=100)
+        frame = analytics_engine.get_tenant_frame(self.db, self.user.id)
+        self.assertEqual((len(frame.sale_ts), frame.last_sale_id), (5, 100))
+
+        # A transaction that drew id 50 before id 100 but committed after it.
+        self._sell(self.widget, 3, days_ago=0.5, sale_id=50)
+        newer = analytics_engine.get_tenant_frame(self.db, self.user.id)
+        self.assertEqual(int(newer.sale_qty.sum()), 15 + 3 + 2 + 3)
+        self.assertEqual(len(analytics_engine.get_tenant_frame(self.db, self.user.id).sale_ts), 6)
+
+    def test_catalog_wide_velocity_scales(self) -> None:
+        products = [{"name": f"Bulk {index}", "sku": f"BULK-{index:05d}", "price": 5.0, "cost": 2.0, "owner_id": self.user.id} for index in range(2000)]
+        self.db.execute(insert(Product), products)
+        product_ids = [row.id for row in self.db.query(Product.id).filter(Product.sku.like("BULK-%"))]
+        rng = np.random.default_rng(7)
+        picks = rng.integers(0, len(product_ids), size=50000)
+        offsets = rng.uniform(0, 60, size=50000)
+        self.db.execute(
+            insert(Sale),
+            [
+                {
+                    "product_id": product_ids[pick],
+                    "quantity": 1,
+                    "unit_price": 5.0,
+                    "total_amount": 5.0,
+                    "sale_date": self.now - timedelta(days=float(offset)),
+                    "owner_id": self.user.id,
+                }
+                for pick, offset in zip(picks, offsets)
+            ],
+        )
+        self.db.commit()
+
+        frame = analytics_engine.get_tenant_frame(self.db, self.user.id)
+        started = time.perf_counter()
+        velocity = analytics_engine.sales_velocity(frame, 14, end=self.now)
+        daily = analytics_engine.daily_units(frame, (self.now - timedelta(days=61)).date(), self.now.date())
+        analytics_engine.zscores(daily, 28, recent=7, robust=True)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(int(velocity["current_units"].sum() + velocity["previous_units"].sum()), int((offsets <= 28).sum()) + 18)
+        self.assertEqual(int(daily.sum()), 50000 + 18)
+        self.assertLess(elapsed, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_available_to_promise.db")
+
+from app.database import Base
+from app.models import Product, PurchaseOrder, PurchaseOrderItem, Shipment, StockTransfer, User, Warehouse
+from app.services.atp_service import check_order_atp, get_available_to_promise
+from app.services.sales_service import confirm_sales_order, create_sales_order, get_sales_order_atp
+from app.services.stock_ledger_service import receive_purchase, reserve_stock
+
+
+class AvailableToPromiseTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="atp@example.com", firebase_uid="atp-user", full_name="ATP User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.product = Product(name="Widget", sku="WIDGET-ATP", price=10.0, cost=4.0, owner_id=self.user.id)
+        self.warehouse_a = Warehouse(name="Warehouse A", code="WHA", owner_id=self.user.id)
+        self.warehouse_b = Warehouse(name="Warehouse B", code="WHB", owner_id=self.user.id)
+        self.db.add_all([self.product, self.warehouse_a, self.warehouse_b])
+        self.db.commit()
+
+        self.today = datetime.utcnow().date()
+        receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=8)
+        reserve_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=3)
+
+        purchase_order = PurchaseOrder(
+            po_number="PO-ATP-1",
+            status="ORDERED",
+            owner_id=self.user.id,
+            expected_arrival_date=datetime.utcnow() + timedelta(days=20),
+        )
+        self.db.add(purchase_order)
+        self.db.flush()
+        self.db.add(
+            PurchaseOrderItem(
+                purchase_order_id=purchase_order.id,
+                product_id=self.product.id,
+                warehouse_id=self.warehouse_a.id,
+                quantity_ordered=30,
+                quantity_received=10,
+            )
+        )
+        transfer = StockTransfer(
+            product_id=self.product.id,
+            from_warehouse_id=self.warehouse_b.id,
+            to_warehouse_id=self.warehouse_a.id,
+            quantity=6,
+            status="IN_TRANSIT",
+        )
+        self.db.add(transfer)
+        self.db.flush()
+        self.db.add(
+            Shipment(
+                shipment_number="SHP-ATP-1",
+                related_type="TRANSFER",
+                related_id=str(transfer.id),
+                status="IN_TRANSIT",
+                owner_id=self.user.id,
+                estimated_arrival=datetime.utcnow() + timedelta(days=4),
+            )
+        )
+        self.db.commit()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def test_timeline_includes_inbound_supply(self) -> None:
+        atp = get_available_to_promise(self.db, self.product.id, self.warehouse_a.id, owner_id=self.user.id)
+        self.assertEqual(atp["available_to_promise"], 5)
+        self.assertEqual(atp["projected_available_to_promise"], 31)
+        self.assertEqual(
+            [(row["date"], row["available_to_promise"]) for row in atp["timeline"]],
+            [
+                (self.today, 5),
+                (self.today + timedelta(days=4), 11),
+                (self.today + timedelta(days=20), 31),
+            ],
+        )
+        self.assertEqual(get_available_to_promise(self.db, self.product.id, self.warehouse_b.id)["projected_available_to_promise"], 0)
+
+    def test_order_lines_consume_projection_cumulatively(self) -> None:
+        lines = [
+            {"product_id": self.product.id, "warehouse_id": self.warehouse_a.id, "quantity": 4},
+            {"product_id": self.product.id, "warehouse_id": self.warehouse_a.id, "quantity": 5},
+            {"product_id": self.product.id, "warehouse_id": self.warehouse_a.id, "quantity": 40},
+            {"product_id": self.product.id, "warehouse_id": None, "quantity": 2},
+        ]
+        result = check_order_atp(self.db, lines, owner_id=self.user.id)
+        self.assertEqual(
+            [line["promise_date"] for line in result["lines"]],
+            [self.today, self.today + timedelta(days=4), None, self.today],
+        )
+        self.assertEqual([line["cumulative_demand"] for line in result["lines"]], [4, 9, 49, 2])
+        self.assertIsNone(result["promise_date"])
+        self.assertFalse(result["can_fulfill_now"])
+
+    def test_confirmation_quotes_promise_date_when_short(self) -> None:
+        order = create_sales_order(
+            self.db,
+            owner_id=self.user.id,
+            customer_id=None,
+            items=[{"product_id": self.product.id, "warehouse_id": self.warehouse_a.id, "quantity_ordered": 9}],
+        )
+        quote = get_sales_order_atp(self.db, order.id, owner_id=self.user.id)
+        self.assertEqual(quote["promise_date"], self.today + timedelta(days=4))
+        self.assertEqual(quote["lines"][0]["item_id"], order.items[0].id)
+
+        with self.assertRaises(HTTPException) as raised:
+            confirm_sales_order(self.db, order.id, owner_id=self.user.id)
+        self.assertIn((self.today + timedelta(days=4)).isoformat(), raised.exception.detail)
+
+
+if __name__ == "__main__":
+    unittest.main()
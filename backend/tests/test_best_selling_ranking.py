@@ -0,0 +1,79 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_best_selling_ranking.db")
+
+from app.database import Base
+from app.models import Product, ReturnOrder, ReturnOrderItem, Sale, User, Warehouse
+from app.services.analytics_service import get_best_selling_products
+from app.services.stock_ledger_service import receive_purchase
+
+
+class BestSellingRankingTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="ranking@example.com", firebase_uid="ranking-user", full_name="Ranking User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.warehouse = Warehouse(name="Main", code="MAIN", owner_id=self.user.id)
+        self.products = [
+            Product(name=f"Product {index:03d}", sku=f"RANK-{index:03d}", price=10.0 + index, cost=4.0, owner_id=self.user.id)
+            for index in range(60)
+        ]
+        self.db.add(self.warehouse)
+        self.db.add_all(self.products)
+        self.db.commit()
+
+        now = datetime.utcnow()
+        for index, product in enumerate(self.products[:50]):
+            receive_purchase(self.db, product_id=product.id, warehouse_id=self.warehouse.id, quantity=100 + index)
+            self.db.add_all(
+                [
+                    Sale(product_id=product.id, quantity=index + 1, unit_price=product.price, total_amount=(index + 1) * product.price, sale_date=now - timedelta(days=1), owner_id=self.user.id),
+                    Sale(product_id=product.id, quantity=2, unit_price=product.price, total_amount=2 * product.price, sale_date=now - timedelta(days=10), owner_id=self.user.id),
+                ]
+            )
+        # Sold only in the previous window, so it must not be ranked.
+        self.db.add(Sale(product_id=self.products[55].id, quantity=9, unit_price=10.0, total_amount=90.0, sale_date=now - timedelta(days=10), owner_id=self.user.id))
+        return_order = ReturnOrder(return_number="RET-RANK-1", owner_id=self.user.id, return_date=now - timedelta(days=1))
+        self.db.add(return_order)
+        self.db.flush()
+        self.db.add(ReturnOrderItem(return_order_id=return_order.id, product_id=self.products[49].id, quantity=5))
+        self.db.commit()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def test_ranking_uses_constant_number_of_queries(self) -> None:
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        ranked = get_best_selling_products(db=self.db, owner_id=self.user.id, days=7, limit=3)
+        self.assertLessEqual(len(statements), 5)
+
+        top = ranked[0]
+        self.assertEqual([item["sku"] for item in ranked], ["RANK-049", "RANK-048", "RANK-047"])
+        self.assertEqual(top["units_sold"], 50)
+        self.assertAlmostEqual(top["revenue"], 50 * 59.0)
+        self.assertAlmostEqual(top["gross_margin"], 50 * 55.0)
+        self.assertEqual((top["returned_units"], top["return_rate"]), (5, 0.1))
+        self.assertEqual(top["stock_availability"], 149)
+        self.assertAlmostEqual(top["sales_velocity"], 50 / 7)
+        self.assertAlmostEqual(top["sales_velocity_change"], 24.0)
+        self.assertEqual(top["channel_performance"], [{"channel": "UNSPECIFIED", "units_sold": 50, "revenue": 50 * 59.0}])
+
+        everything = get_best_selling_products(db=self.db, owner_id=self.user.id, days=7, limit=100)
+        self.assertEqual(len(everything), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
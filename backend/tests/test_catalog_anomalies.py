@@ -0,0 +1,92 @@
+import os
+import unittest
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_catalog_anomalies.db")
+
+from app.database import Base
+from app.models import Product, Sale, User
+from app.services.analytics_service import detect_catalog_sales_anomalies
+
+
+class CatalogAnomaliesTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="anomaly@example.com", firebase_uid="anomaly-user", full_name="Anomaly User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.products = [
+            Product(name=f"Product {index:03d}", sku=f"ANOM-{index:03d}", price=10.0, cost=4.0, owner_id=self.user.id)
+            for index in range(40)
+        ]
+        self.db.add_all(self.products)
+        self.db.flush()
+
+        today = datetime.utcnow().date()
+        sales = []
+        for days_ago in range(1, 36):
+            sale_date = datetime.combine(today - timedelta(days=days_ago), time(12))
+            wobble = days_ago % 3 - 1
+            for index, product in enumerate(self.products):
+                quantity = 3 + wobble
+                if index == 0 and days_ago <= 7:
+                    quantity = 20
+                elif index == 1:
+                    quantity = 0 if days_ago <= 7 else 10 + wobble
+                elif index == 2:
+                    quantity = 5 if days_ago <= 7 else 0
+                elif index == 3:
+                    # Intermittent seller: one unit every third day, which gives a MAD of 0.
+                    quantity = 1 if days_ago % 3 == 0 else 0
+                if quantity:
+                    sales.append(Sale(product_id=product.id, quantity=quantity, unit_price=10.0, total_amount=quantity * 10.0, sale_date=sale_date, owner_id=self.user.id))
+        self.db.add_all(sales)
+        self.db.commit()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def test_catalog_scan_returns_only_anomalous_skus(self) -> None:
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        result = detect_catalog_sales_anomalies(db=self.db, owner_id=self.user.id)
+        # The tenant frame loads in a fixed number of queries regardless of catalog size.
+        self.assertLessEqual(len(statements), 5)
+
+        self.assertEqual(result["products_evaluated"], 40)
+        by_sku = {item["sku"]: item for item in result["anomalies"]}
+        self.assertEqual(set(by_sku), {"ANOM-000", "ANOM-001", "ANOM-002"})
+        self.assertEqual(by_sku["ANOM-000"]["anomaly_type"], "SPIKE")
+        self.assertEqual(by_sku["ANOM-000"]["recent_daily_units"], 20.0)
+        self.assertEqual(by_sku["ANOM-000"]["baseline_daily_units"], 3.0)
+        self.assertEqual(by_sku["ANOM-001"]["anomaly_type"], "DROP")
+        self.assertIsNone(by_sku["ANOM-002"]["z_score"])
+        self.assertEqual(result["anomalies"][0]["sku"], "ANOM-002")
+
+        rolling = detect_catalog_sales_anomalies(db=self.db, owner_id=self.user.id, method="rolling", limit=1)
+        self.assertEqual(rolling["anomaly_count"], 3)
+        self.assertEqual(len(rolling["anomalies"]), 1)
+
+    def test_intermittent_sku_has_a_finite_robust_score(self) -> None:
+        result = detect_catalog_sales_anomalies(db=self.db, owner_id=self.user.id, threshold=0.1)
+        intermittent = next(item for item in result["anomalies"] if item["sku"] == "ANOM-003")
+        self.assertIsNotNone(intermittent["z_score"])
+        self.assertLess(abs(intermittent["z_score"]), 3.0)
+        self.assertGreater(intermittent["baseline_spread"], 0)
+
+    def test_rejects_unknown_method(self) -> None:
+        with self.assertRaises(ValueError):
+            detect_catalog_sales_anomalies(db=self.db, owner_id=self.user.id, method="ewma")
+
+
+if __name__ == "__main__":
+    unittest.main()
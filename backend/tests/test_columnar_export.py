@@ -0,0 +1,93 @@
+import gzip
+import io
+import json
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_columnar_export.db")
+
+from app.database import Base
+from app.models import Product, ReturnOrder, ReturnOrderItem, Sale, User
+from app.services import columnar_export_service
+from app.services.stock_ledger_service import get_default_warehouse, receive_purchase
+
+
+class ColumnarExportTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="columnar@example.com", firebase_uid="columnar-user", full_name="Columnar User")
+        self.other = User(email="columnar-other@example.com", firebase_uid="columnar-other", full_name="Other User")
+        self.db.add_all([self.user, self.other])
+        self.db.flush()
+        self.product = Product(name="Columnar", sku="COL-1", price=10.0, cost=4.0, owner_id=self.user.id)
+        foreign = Product(name="Foreign", sku="COL-FOREIGN", price=10.0, cost=4.0, owner_id=self.other.id)
+        self.db.add_all([self.product, foreign])
+        self.db.flush()
+        now = datetime.utcnow()
+        self.db.add_all(
+            [
+                Sale(product_id=self.product.id, quantity=index + 1, unit_price=10.0, total_amount=10.0 * (index + 1), sale_date=now - timedelta(days=index), owner_id=self.user.id)
+                for index in range(5)
+            ]
+        )
+        self.db.add(Sale(product_id=foreign.id, quantity=1, unit_price=1.0, total_amount=1.0, sale_date=now, owner_id=self.other.id))
+        order = ReturnOrder(return_number="RET-COL-1", owner_id=self.user.id, status="RECEIVED")
+        self.db.add(order)
+        self.db.flush()
+        self.db.add(ReturnOrderItem(return_order_id=order.id, product_id=self.product.id, quantity=2, refund_amount=20.0))
+        self.db.commit()
+        receive_purchase(self.db, product_id=self.product.id, warehouse_id=get_default_warehouse(self.db, owner_id=self.user.id).id, quantity=7)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def _ndjson(self, dataset: str) -> tuple[list[bytes], list[dict]]:
+        chunks = list(columnar_export_service.export_dataset(self.db, dataset, owner_id=self.user.id, export_format="ndjson"))
+        lines = gzip.decompress(b"".join(chunks)).decode("utf-8").splitlines()
+        return chunks, [json.loads(line) for line in lines]
+
+    def test_gzip_ndjson_streams_typed_rows_per_partition(self) -> None:
+        with mock.patch.object(columnar_export_service, "COLUMNAR_EXPORT_BATCH_SIZE", 2):
+            chunks, sales = self._ndjson("sales")
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual([sale["quantity"] for sale in sales], [1, 2, 3, 4, 5])
+        self.assertEqual((sales[0]["sku"], sales[0]["total_amount"]), ("COL-1", 10.0))
+        datetime.fromisoformat(sales[0]["sale_date"])
+
+        _, transactions = self._ndjson("inventory-transactions")
+        self.assertEqual([(row["transaction_type"], row["quantity"]) for row in transactions], [("PURCHASE_RECEIVED", 7)])
+        _, items = self._ndjson("return-items")
+        self.assertEqual([(row["return_number"], row["quantity"], row["refund_amount"]) for row in items], [("RET-COL-1", 2, 20.0)])
+
+    def test_format_resolution(self) -> None:
+        with mock.patch.object(columnar_export_service, "pa", None):
+            self.assertEqual(columnar_export_service.resolve_export_format(None), "ndjson")
+            with self.assertRaises(HTTPException):
+                columnar_export_service.resolve_export_format("parquet")
+        with self.assertRaises(HTTPException) as raised:
+            columnar_export_service.export_dataset(self.db, "customers", owner_id=self.user.id, export_format="ndjson")
+        self.assertEqual(raised.exception.status_code, 404)
+
+    @unittest.skipIf(columnar_export_service.pa is None, "pyarrow is not installed")
+    def test_parquet_round_trip(self) -> None:
+        with mock.patch.object(columnar_export_service, "COLUMNAR_EXPORT_BATCH_SIZE", 2):
+            chunks = list(columnar_export_service.export_dataset(self.db, "sales", owner_id=self.user.id, export_format="parquet"))
+        table = columnar_export_service.pq.read_table(io.BytesIO(b"".join(chunks)))
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.column("quantity").to_pylist(), [1, 2, 3, 4, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
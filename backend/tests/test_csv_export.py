@@ -0,0 +1,92 @@
+import csv
+import os
+import unittest
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_csv_export.db")
+
+from app.database import Base
+from app.models import Product, PurchaseOrder, PurchaseOrderItem, Sale, User, Warehouse
+from app.services import csv_service
+from app.services.stock_ledger_service import receive_purchase, reserve_stock
+
+
+def _parse(chunks) -> list[dict]:
+    return list(csv.DictReader(StringIO("".join(chunks))))
+
+
+class CsvExportTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="export@example.com", firebase_uid="export-user", full_name="Export User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.products = [
+            Product(name=f"Export {index}", sku=f"EXP-{index}", price=10.0, cost=4.0, current_stock=999, owner_id=self.user.id)
+            for index in range(5)
+        ]
+        self.warehouse = Warehouse(name="Export Warehouse", code="EXPW", owner_id=self.user.id)
+        self.db.add_all([*self.products, self.warehouse])
+        self.db.flush()
+        now = datetime.utcnow()
+        self.db.add_all(
+            [
+                Sale(product_id=self.products[index % 5].id, quantity=1, unit_price=10.0, total_amount=10.0, sale_date=now - timedelta(hours=index), owner_id=self.user.id)
+                for index in range(7)
+            ]
+        )
+        order = PurchaseOrder(po_number="PO-EXPORT-1", status="ORDERED", owner_id=self.user.id)
+        empty_order = PurchaseOrder(po_number="PO-EXPORT-2", status="DRAFT", owner_id=self.user.id)
+        self.db.add_all([order, empty_order])
+        self.db.flush()
+        self.db.add_all(
+            [
+                PurchaseOrderItem(purchase_order_id=order.id, product_id=product.id, quantity_ordered=5, quantity_received=0, unit_cost=4.0)
+                for product in self.products[:2]
+            ]
+        )
+        self.db.commit()
+        receive_purchase(self.db, product_id=self.products[0].id, warehouse_id=self.warehouse.id, quantity=12)
+        reserve_stock(self.db, product_id=self.products[0].id, warehouse_id=self.warehouse.id, quantity=5)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def test_product_export_streams_chunks_with_ledger_stock_from_one_query(self) -> None:
+        self.db.refresh(self.user)
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        with mock.patch.object(csv_service, "CSV_EXPORT_BATCH_SIZE", 2):
+            chunks = list(csv_service.export_products_csv(self.db, user=self.user))
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(len(chunks), 3)
+        rows = _parse(chunks)
+        self.assertEqual([row["sku"] for row in rows], [f"EXP-{index}" for index in range(5)])
+        self.assertEqual([row["current_stock"] for row in rows], ["7", "0", "0", "0", "0"])
+
+    def test_sales_and_purchase_order_exports_stream_every_row(self) -> None:
+        sales = _parse(csv_service.export_sales_csv(self.db, user=self.user))
+        self.assertEqual(len(sales), 7)
+        self.assertEqual(sales[0]["sku"], "EXP-0")
+
+        lines = _parse(csv_service.export_purchase_orders_csv(self.db, user=self.user))
+        self.assertEqual(sorted((line["po_number"], line["product_id"]) for line in lines), [
+            ("PO-EXPORT-1", str(self.products[0].id)),
+            ("PO-EXPORT-1", str(self.products[1].id)),
+            ("PO-EXPORT-2", ""),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
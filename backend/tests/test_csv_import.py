@@ -0,0 +1,102 @@
+import os
+import unittest
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_csv_import.db")
+
+from app.database import Base
+from app.models import InventoryTransaction, Product, Supplier, User, Warehouse
+from app.services import csv_service
+from app.services.stock_ledger_service import get_available, get_default_warehouse, receive_purchase
+
+
+class CsvImportTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="import@example.com", firebase_uid="import-user", full_name="Import User")
+        self.other = User(email="import-other@example.com", firebase_uid="import-other", full_name="Other User")
+        self.db.add_all([self.user, self.other])
+        self.db.flush()
+        self.existing = Product(name="Existing", sku="IMP-1", price=10.0, cost=4.0, min_stock_threshold=3, owner_id=self.user.id)
+        self.foreign = Product(name="Foreign", sku="IMP-FOREIGN", price=10.0, cost=4.0, owner_id=self.other.id)
+        self.db.add_all([self.existing, self.foreign])
+        self.db.commit()
+        self.warehouse = get_default_warehouse(self.db, owner_id=self.user.id)
+        receive_purchase(self.db, product_id=self.existing.id, warehouse_id=self.warehouse.id, quantity=20)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def test_every_row_error_is_reported_and_nothing_is_written(self) -> None:
+        csv_text = "\n".join(
+            [
+                "name,sku,price,cost,current_stock",
+                "Bad Price,IMP-2,abc,1,",
+                "New Without Cost,IMP-3,5,,",
+                "Taken,IMP-FOREIGN,5,1,",
+                ",IMP-4,5,1,",
+                "Fine,IMP-5,5,1,4",
+            ]
+        )
+        with self.assertRaises(HTTPException) as raised:
+            csv_service.import_products_csv(self.db, user=self.user, csv_text=csv_text)
+        detail = raised.exception.detail
+        self.assertTrue(detail.startswith("4 row(s) failed validation"))
+        for row_number in (2, 3, 4, 5):
+            self.assertIn(f"Row {row_number}:", detail)
+        self.assertIsNone(self.db.query(Product).filter(Product.sku == "IMP-5").first())
+
+    def test_products_are_upserted_with_one_batched_ledger_write(self) -> None:
+        self.db.refresh(self.user)
+        rows = ["name,sku,price,cost,min_stock_threshold,current_stock", "Existing Renamed,IMP-1,,,,12", "Kept,IMP-KEEP,2,1,,"]
+        rows += [f"New {index},IMP-NEW-{index},5,2,,{index}" for index in range(30)]
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        result = csv_service.import_products_csv(self.db, user=self.user, csv_text="\n".join(rows))
+        # Product lookups and writes do not grow with the number of rows; only the per-(product, warehouse)
+        # balance upkeep of the ledger batch does.
+        product_statements = [statement for statement in statements if "stock_balances" not in statement.split("\n")[0]]
+        self.assertLess(len(product_statements), 15)
+        self.assertEqual(sum(statement.startswith("INSERT INTO products") for statement in statements), 1)
+
+        self.assertEqual((result["created"], result["updated"], result["warnings"]), (31, 1, []))
+        self.db.expire_all()
+        existing = self.db.query(Product).filter(Product.sku == "IMP-1").one()
+        self.assertEqual((existing.name, existing.price, existing.min_stock_threshold), ("Existing Renamed", 10.0, 3))
+        self.assertEqual(get_available(self.db, existing.id, None), 12)
+        new = self.db.query(Product).filter(Product.sku == "IMP-NEW-29").one()
+        self.assertEqual((new.owner_id, new.min_stock_threshold, new.current_stock), (self.user.id, 10, 29))
+        seeded = self.db.query(InventoryTransaction).filter(InventoryTransaction.reference_type == "LEGACY_PRODUCT_CREATE").count()
+        self.assertEqual(seeded, 29)
+
+    def test_warehouse_and_supplier_imports_update_in_place(self) -> None:
+        self.db.add(Supplier(name="Acme", lead_time_days=3, owner_id=self.user.id))
+        self.db.add(Warehouse(name="Other Warehouse", code="OTHER", owner_id=self.other.id))
+        self.db.commit()
+
+        with self.assertRaises(HTTPException):
+            csv_service.import_warehouses_csv(self.db, user=self.user, csv_text="name,code\nMine,OTHER")
+        result = csv_service.import_warehouses_csv(
+            self.db, user=self.user, csv_text=f"name,code,is_active\nRenamed Main,{self.warehouse.code},no\nOverflow,OVR,"
+        )
+        self.assertEqual((result["created"], result["updated"]), (1, 1))
+        self.db.expire_all()
+        self.assertEqual((self.warehouse.name, self.warehouse.is_active), ("Renamed Main", False))
+
+        result = csv_service.import_suppliers_csv(self.db, user=self.user, csv_text="name,lead_time_days\nAcme,8\nGlobex,4")
+        self.assertEqual((result["created"], result["updated"]), (1, 1))
+        suppliers = {supplier.name: supplier.lead_time_days for supplier in self.db.query(Supplier).filter(Supplier.owner_id == self.user.id)}
+        self.assertEqual(suppliers, {"Acme": 8, "Globex": 4})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import time as timer
+import unittest
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_demand_forecasting.db")
+
+from app.database import Base
+from app.models import DemandForecast, Product, Sale, User
+from app.services.forecasting_service import (
+    METHOD_CROSTON,
+    METHOD_NO_DEMAND,
+    METHOD_SEASONAL_NAIVE,
+    METHOD_SES,
+    METHOD_TRAILING_AVERAGE,
+    fit_demand_forecasts,
+    get_demand_forecasts,
+    refresh_demand_forecasts,
+)
+from app.services.sales_rollup_service import record_sales_in_rollup
+from app.services.stock_ledger_service import calculate_days_of_cover, create_inventory_transaction, get_default_warehouse
+
+
+class DemandForecastFittingTestCase(unittest.TestCase):
+    def test_each_row_gets_a_suitable_model(self) -> None:
+        days = 84
+        weekday = np.arange(days) % 7
+        series = np.vstack(
+            [
+                np.full(days, 5.0),
+                np.where(weekday == 5, 30.0, 2.0),
+                np.where(np.arange(days) % 10 == 0, 6.0, 0.0),
+                np.zeros(days),
+            ]
+        )
+        fitted = fit_demand_forecasts(series)
+        self.assertEqual(list(fitted["method"]), [METHOD_SES, METHOD_SEASONAL_NAIVE, METHOD_CROSTON, METHOD_NO_DEMAND])
+        self.assertAlmostEqual(fitted["daily_demand"][0], 5.0)
+        self.assertAlmostEqual(fitted["daily_demand"][1], (30.0 + 6 * 2.0) / 7)
+        self.assertAlmostEqual(fitted["daily_demand"][2], 0.95 * 6.0 / 10, delta=0.05)
+        self.assertEqual((fitted["daily_demand"][3], fitted["demand_std"][3]), (0.0, 0.0))
+
+    def test_whole_catalog_fits_in_one_vectorized_pass(self) -> None:
+        series = np.random.default_rng(7).poisson(2.0, size=(10_000, 90)).astype(np.float64)
+        started = timer.perf_counter()
+        fitted = fit_demand_forecasts(series)
+        self.assertLess(timer.perf_counter() - started, 5.0)
+        self.assertEqual(fitted["daily_demand"].shape, (10_000,))
+
+
+class StoredDemandForecastTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="forecast@example.com", firebase_uid="forecast-user", full_name="Forecast User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.steady = Product(name="Steady", sku="FC-STEADY", price=10.0, cost=4.0, owner_id=self.user.id)
+        self.unsold = Product(name="Unsold", sku="FC-UNSOLD", price=10.0, cost=4.0, owner_id=self.user.id)
+        self.db.add_all([self.steady, self.unsold])
+        self.db.flush()
+        today = datetime.utcnow().date()
+        sales = [
+            Sale(product_id=self.steady.id, quantity=4, unit_price=10.0, total_amount=40.0, sale_date=datetime.combine(today - timedelta(days=days_ago), time(12)), owner_id=self.user.id)
+            for days_ago in range(1, 91)
+        ]
+        self.db.add_all(sales)
+        self.db.flush()
+        record_sales_in_rollup(self.db, sales)
+        self.db.commit()
+        warehouse = get_default_warehouse(self.db, owner_id=self.user.id)
+        create_inventory_transaction(
+            self.db,
+            product_id=self.steady.id,
+            warehouse_id=warehouse.id,
+            transaction_type="PURCHASE_RECEIVED",
+            quantity=100,
+            direction="IN",
+        )
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def test_refresh_stores_one_forecast_per_product_and_cover_reads_it(self) -> None:
+        owner_id = self.user.id
+        self.assertEqual(refresh_demand_forecasts(self.db, owner_id=owner_id), 2)
+        self.assertEqual(refresh_demand_forecasts(self.db, owner_id=owner_id), 2)
+        self.assertEqual(self.db.query(DemandForecast).count(), 2)
+
+        forecasts = get_demand_forecasts(self.db, [self.steady.id, self.unsold.id], owner_id=owner_id)
+        self.assertEqual(forecasts[self.steady.id]["method"], METHOD_SES)
+        self.assertAlmostEqual(forecasts[self.steady.id]["daily_demand"], 4.0)
+        self.assertEqual(forecasts[self.unsold.id]["method"], METHOD_NO_DEMAND)
+
+        cover = calculate_days_of_cover(self.db, self.steady.id)
+        self.assertEqual(cover["forecast_method"], METHOD_SES)
+        self.assertAlmostEqual(cover["days_of_cover"], 25.0)
+
+    def test_products_without_a_forecast_fall_back_to_the_trailing_average(self) -> None:
+        forecasts = get_demand_forecasts(self.db, [self.steady.id], owner_id=self.user.id)
+        self.assertEqual(forecasts[self.steady.id]["method"], METHOD_TRAILING_AVERAGE)
+        self.assertAlmostEqual(forecasts[self.steady.id]["daily_demand"], 4.0, delta=4.0 / 30)
+        self.assertEqual(get_demand_forecasts(self.db, [self.steady.id], owner_id=self.user.id, fallback_lookback_days=None), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import io
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_import_jobs.db")
+
+from app.database import Base
+from app.models import ImportJob, Supplier, User
+from app.services import import_job_service
+from app.services.csv_service import import_supplier_rows
+
+
+class ImportJobTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="imports@example.com", firebase_uid="imports-user", full_name="Import User")
+        self.db.add(self.user)
+        self.db.commit()
+        self.owner_id = self.user.id
+        self.directory = tempfile.TemporaryDirectory()
+        patches = [
+            mock.patch.dict(os.environ, {"IMPORT_JOB_DIR": self.directory.name}),
+            mock.patch.object(import_job_service, "IMPORT_JOB_CHUNK_SIZE", 2),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def _queue(self, lines: list[str]) -> ImportJob:
+        upload = io.BytesIO("\n".join(lines).encode("utf-8"))
+        return import_job_service.create_import_job(self.db, owner_id=self.owner_id, entity="suppliers", upload=upload, filename="suppliers.csv")
+
+    def test_chunks_commit_progress_and_row_errors(self) -> None:
+        job = self._queue(["name,lead_time_days", "Acme,3", "Globex,soon", "Initech,5", ",2", "Umbrella,7"])
+        job = import_job_service.run_import_job(self.db, job.id)
+
+        self.assertEqual((job.status, job.total_rows, job.processed_rows), ("COMPLETED", 5, 5))
+        self.assertEqual((job.created_count, job.error_count), (3, 2))
+        errors = import_job_service.list_import_job_errors(self.db, job.id, owner_id=self.owner_id)
+        self.assertEqual([error.row_number for error in errors], [3, 5])
+        self.assertEqual(errors[0].message, "Row 3: lead_time_days must be an integer.")
+        self.assertFalse(os.path.exists(job.file_path))
+        self.assertIsNone(import_job_service.run_import_job(self.db, job.id))
+
+    def test_crashed_job_resumes_after_the_last_committed_chunk(self) -> None:
+        job = self._queue(["name,lead_time_days"] + [f"Supplier {index},{index}" for index in range(5)])
+        calls = []
+
+        def crash_on_second_chunk(db, **kwargs):
+            calls.append(kwargs["rows"])
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return import_supplier_rows(db, **kwargs)
+
+        with mock.patch.dict(import_job_service.IMPORT_ROW_HANDLERS, {"suppliers": crash_on_second_chunk}):
+            with self.assertRaises(KeyboardInterrupt):
+                import_job_service.run_import_job(self.db, job.id)
+        self.db.rollback()
+        self.db.refresh(job)
+        self.assertEqual((job.status, job.processed_rows), ("RUNNING", 2))
+        # A live worker still holds the job until its heartbeat goes stale.
+        self.assertEqual(import_job_service.list_resumable_import_job_ids(self.db), [])
+
+        job.updated_at = datetime.utcnow() - timedelta(seconds=import_job_service.IMPORT_JOB_STALE_SECONDS + 60)
+        self.db.commit()
+        self.assertEqual(import_job_service.list_resumable_import_job_ids(self.db), [job.id])
+        job = import_job_service.run_import_job(self.db, job.id)
+        self.assertEqual((job.status, job.processed_rows, job.created_count), ("COMPLETED", 5, 5))
+        names = sorted(name for (name,) in self.db.query(Supplier.name))
+        self.assertEqual(names, [f"Supplier {index}" for index in range(5)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_product_week_cube.db")
+
+from app.database import Base
+from app.models import Product, ProductWeekCube, Sale, User
+from app.services.analytics_service import calculate_product_margin
+from app.services.product_cube_service import get_product_window_totals, rebuild_product_week_cube, record_sales_in_cube
+from app.services.returns_service import (
+    calculate_return_adjusted_margin,
+    create_return_order,
+    detect_catalog_return_spikes,
+    get_catalog_return_margins,
+    get_high_return_products,
+    get_profit_leakage_report,
+)
+
+
+class ProductWeekCubeTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="cube@example.com", firebase_uid="cube-user", full_name="Cube User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.widget = Product(name="Widget", sku="CUBE-WIDGET", price=10.0, cost=4.0, owner_id=self.user.id)
+        self.gadget = Product(name="Gadget", sku="CUBE-GADGET", price=20.0, cost=15.0, owner_id=self.user.id)
+        self.db.add_all([self.widget, self.gadget])
+        self.db.commit()
+        self.owner_id = self.user.id
+
+        self.now = datetime.utcnow()
+        sales = []
+        for days_ago in range(0, 60, 3):
+            for product, quantity in ((self.widget, 2), (self.gadget, 1)):
+                sales.append(
+                    Sale(
+                        product_id=product.id,
+                        quantity=quantity,
+                        unit_price=product.price,
+                        total_amount=quantity * product.price,
+                        sale_date=self.now - timedelta(days=days_ago, hours=1),
+                        owner_id=self.owner_id,
+                    )
+                )
+        self.db.add_all(sales)
+        self.db.flush()
+        record_sales_in_cube(self.db, sales)
+        self.db.commit()
+
+        for days_ago, quantity in ((2, 1), (20, 3), (45, 2)):
+            create_return_order(
+                self.db,
+                owner_id=self.owner_id,
+                sales_order_id=None,
+                customer_id=None,
+                items=[{"product_id": self.widget.id, "quantity": quantity, "refund_amount": 10.0 * quantity, "replacement_cost": 1.0}],
+                return_date=self.now - timedelta(days=days_ago),
+            )
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def _cells(self) -> list[tuple]:
+        return [
+            (row.product_id, row.week_start, row.units_sold, row.revenue, row.returned_units, row.refund_amount, row.replacement_cost)
+            for row in self.db.query(ProductWeekCube).order_by(ProductWeekCube.product_id, ProductWeekCube.week_start)
+        ]
+
+    def test_incremental_cells_match_a_rebuild(self) -> None:
+        incremental = self._cells()
+        self.assertEqual(rebuild_product_week_cube(self.db), len(incremental))
+        self.assertEqual(self._cells(), incremental)
+
+    def test_window_totals_combine_cube_weeks_with_partial_edges(self) -> None:
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        start = self.now - timedelta(days=40)
+        totals = get_product_window_totals(self.db, owner_id=self.owner_id, start=start, end=self.now)
+        self.assertEqual(len(statements), 3)
+
+        sale_days = [days_ago for days_ago in range(0, 60, 3) if self.now - timedelta(days=days_ago, hours=1) >= start]
+        self.assertEqual(totals[self.widget.id]["units_sold"], 2 * len(sale_days))
+        self.assertEqual(totals[self.gadget.id]["revenue"], 20.0 * len(sale_days))
+        self.assertEqual(totals[self.gadget.id]["cost_of_goods"], 15.0 * len(sale_days))
+        self.assertEqual(totals[self.widget.id]["returned_units"], 4)
+        self.assertEqual(totals[self.widget.id]["refund_amount"], 40.0)
+        self.assertEqual(totals[self.widget.id]["replacement_cost"], 2.0)
+
+    def test_cost_of_goods_uses_the_current_cost_across_cube_and_edges(self) -> None:
+        start = self.now - timedelta(days=40)
+        units = get_product_window_totals(self.db, owner_id=self.owner_id, start=start, end=self.now)[self.widget.id]["units_sold"]
+        self.widget.cost = 8.0
+        self.db.commit()
+
+        totals = get_product_window_totals(self.db, owner_id=self.owner_id, start=start, end=self.now)
+        self.assertEqual(totals[self.widget.id]["cost_of_goods"], 8.0 * units)
+        rebuild_product_week_cube(self.db)
+        self.assertEqual(get_product_window_totals(self.db, owner_id=self.owner_id, start=start, end=self.now), totals)
+
+    def test_margin_and_leakage_reports_read_the_cube(self) -> None:
+        start = self.now - timedelta(days=30)
+        units = 2 * len([days_ago for days_ago in range(0, 60, 3) if days_ago < 30])
+
+        margin = calculate_product_margin(db=self.db, owner_id=self.owner_id, product_id=self.widget.id)
+        self.assertEqual((margin["units_sold"], margin["revenue"], margin["gross_margin"]), (units, 10.0 * units, 6.0 * units))
+        self.assertEqual(margin["return_adjusted_margin"], 6.0 * units - 40.0 - 2.0)
+
+        adjusted = calculate_return_adjusted_margin(self.db, self.widget.id, start, self.now)
+        self.assertEqual(adjusted["return_adjusted_profit"], margin["return_adjusted_margin"])
+        self.assertNotIn("no_sales_in_range", adjusted["missing_data"])
+
+        high_returns = get_high_return_products(self.db, start, self.now, owner_id=self.owner_id)
+        self.assertEqual([(row["sku"], row["returned_quantity"], row["return_rate"]) for row in high_returns], [("CUBE-WIDGET", 4, 4 / units)])
+
+        leakage = get_profit_leakage_report(self.db, start, self.now, owner_id=self.owner_id)
+        self.assertEqual(leakage["total_profit_leakage"], 42.0)
+
+    def test_catalog_margins_and_spikes_use_grouped_totals(self) -> None:
+        start = self.now - timedelta(days=30)
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        margins = get_catalog_return_margins(self.db, start, self.now, owner_id=self.owner_id, only_with_returns=False)
+        self.assertEqual(len(statements), 4)
+        self.assertEqual([row["sku"] for row in margins], ["CUBE-GADGET", "CUBE-WIDGET"])
+        self.assertEqual(margins[1]["margin"]["return_adjusted_profit"], 6.0 * 20 - 42.0)
+        self.assertEqual(margins[1]["total_leakage"], 42.0)
+        self.assertEqual([row["sku"] for row in get_catalog_return_margins(self.db, start, self.now, owner_id=self.owner_id)], ["CUBE-WIDGET"])
+
+        self.assertEqual(detect_catalog_return_spikes(self.db, owner_id=self.owner_id), [])
+        for days_ago, quantity in ((10, 1), (1, 3)):
+            create_return_order(
+                self.db,
+                owner_id=self.owner_id,
+                sales_order_id=None,
+                customer_id=None,
+                items=[{"product_id": self.widget.id, "quantity": quantity}],
+                return_date=self.now - timedelta(days=days_ago),
+            )
+        spikes = detect_catalog_return_spikes(self.db, owner_id=self.owner_id)
+        self.assertEqual([(spike["sku"], spike["current_period"]["units_returned"], spike["previous_period"]["units_returned"]) for spike in spikes], [("CUBE-WIDGET", 4, 1)])
+
+    def test_return_on_the_window_boundary_counts_once(self) -> None:
+        now = self.now
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def utcnow(cls):
+                return now
+
+        for days_ago, quantity in ((10, 1), (7, 2), (1, 3)):
+            create_return_order(
+                self.db,
+                owner_id=self.owner_id,
+                sales_order_id=None,
+                customer_id=None,
+                items=[{"product_id": self.widget.id, "quantity": quantity}],
+                return_date=self.now - timedelta(days=days_ago),
+            )
+        with mock.patch("app.services.returns_service.datetime", FrozenDatetime):
+            spikes = detect_catalog_return_spikes(self.db, owner_id=self.owner_id)
+        # The return exactly seven days back starts the current window and is not counted in the previous one too.
+        self.assertEqual([(spike["current_period"]["units_returned"], spike["previous_period"]["units_returned"]) for spike in spikes], [(6, 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
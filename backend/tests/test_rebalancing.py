@@ -0,0 +1,91 @@
+import os
+import time
+import unittest
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_rebalancing.db")
+
+from app.database import Base
+from app.models import Product, StockBalance, User, Warehouse
+from app.services.rebalancing_service import build_rebalancing_plan
+from app.services.stock_ledger_service import create_inventory_transactions_bulk, receive_purchase
+
+
+class RebalancingTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="rebalance@example.com", firebase_uid="rebalance-user", full_name="Rebalance User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.warehouses = [Warehouse(name=f"Warehouse {code}", code=code, owner_id=self.user.id) for code in ("WHA", "WHB", "WHC")]
+        self.db.add_all(self.warehouses)
+        self.db.commit()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def test_plan_moves_excess_to_most_urgent_deficits(self) -> None:
+        product = Product(name="Widget", sku="WIDGET-RB", price=10.0, cost=4.0, min_stock_threshold=10, owner_id=self.user.id)
+        self.db.add(product)
+        self.db.commit()
+        warehouse_a, warehouse_b, warehouse_c = self.warehouses
+        receive_purchase(self.db, product_id=product.id, warehouse_id=warehouse_a.id, quantity=40)
+        receive_purchase(self.db, product_id=product.id, warehouse_id=warehouse_b.id, quantity=6)
+        receive_purchase(self.db, product_id=product.id, warehouse_id=warehouse_c.id, quantity=12)
+        # Warehouse C sells 3 units a day, so 14 days of cover needs 42 units there.
+        create_inventory_transactions_bulk(
+            self.db,
+            [
+                {"product_id": product.id, "warehouse_id": warehouse_c.id, "transaction_type": "SALE_SHIPPED", "quantity": 3, "direction": "OUT"}
+                for _ in range(30)
+            ]
+            + [{"product_id": product.id, "warehouse_id": warehouse_c.id, "transaction_type": "PURCHASE_RECEIVED", "quantity": 90, "direction": "IN"}],
+        )
+
+        plan = build_rebalancing_plan(self.db, owner_id=self.user.id)
+        moves = [(move["from_warehouse_id"], move["to_warehouse_id"], move["quantity"]) for move in plan["transfers"]]
+        self.assertEqual(moves, [(warehouse_a.id, warehouse_c.id, 30)])
+        self.assertEqual(plan["transfers"][0]["target_days_of_cover"], 4.0)
+        self.assertEqual(plan["total_deficit"], 34)
+        self.assertEqual(plan["unmet_deficit"], 4)
+        self.assertEqual([move["rank"] for move in plan["transfers"]], [1])
+
+    def test_plan_scales_to_thousands_of_skus(self) -> None:
+        product_count = 3000
+        self.db.execute(
+            insert(Product),
+            [
+                {"name": f"SKU {index}", "sku": f"SKU-{index:05d}", "price": 5.0, "cost": 2.0, "min_stock_threshold": 10, "owner_id": self.user.id}
+                for index in range(product_count)
+            ],
+        )
+        product_ids = [row.id for row in self.db.query(Product.id).order_by(Product.id.asc())]
+        self.db.execute(
+            insert(StockBalance),
+            [
+                {"product_id": product_id, "warehouse_id": warehouse.id, "on_hand": (product_id * (offset + 7)) % 30, "reserved": 0, "damaged": 0, "quarantined": 0}
+                for product_id in product_ids
+                for offset, warehouse in enumerate(self.warehouses)
+            ],
+        )
+        self.db.commit()
+
+        started = time.perf_counter()
+        plan = build_rebalancing_plan(self.db, owner_id=self.user.id)
+        elapsed = time.perf_counter() - started
+        self.assertEqual(plan["products_considered"], product_count)
+        self.assertGreater(len(plan["transfers"]), 0)
+        self.assertEqual(plan["total_transfer_quantity"] + plan["unmet_deficit"], plan["total_deficit"])
+        self.assertLess(elapsed, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
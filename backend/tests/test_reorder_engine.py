@@ -0,0 +1,103 @@
+import math
+import os
+import unittest
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_reorder_engine.db")
+
+from app.database import Base
+from app.models import DemandForecast, Product, Supplier, User, Warehouse
+from app.services.reorder_service import ANNUAL_HOLDING_COST_RATE, ORDER_COST, SERVICE_LEVEL_Z, get_reorder_suggestions, set_reorder_point
+from app.services.stock_ledger_service import create_inventory_transaction, get_default_warehouse
+
+
+class ReorderEngineTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.owner = User(email="reorder@example.com", firebase_uid="reorder-user", full_name="Reorder User")
+        self.other = User(email="reorder-other@example.com", firebase_uid="reorder-other", full_name="Other User")
+        self.db.add_all([self.owner, self.other])
+        self.db.flush()
+        self.owner_id, self.other_id = self.owner.id, self.other.id
+        self.db.add(Supplier(name="Acme", lead_time_days=9, owner_id=self.owner_id))
+        self.products = [
+            Product(name=f"Item {index}", sku=f"RO-{index}", price=10.0, cost=4.0, supplier="Acme", owner_id=self.owner_id)
+            for index in range(3)
+        ]
+        self.foreign = Product(name="Foreign", sku="RO-FOREIGN", price=10.0, cost=4.0, owner_id=self.other_id)
+        self.db.add_all([*self.products, self.foreign])
+        self.db.commit()
+
+        self.warehouse = get_default_warehouse(self.db, owner_id=self.owner_id)
+        foreign_warehouse = Warehouse(name="Other Warehouse", code="OTHER", owner_id=self.other_id)
+        self.db.add(foreign_warehouse)
+        self.db.commit()
+        for product, quantity in zip(self.products, (10, 40, 200)):
+            self._receive(product.id, self.warehouse.id, quantity)
+        self._receive(self.foreign.id, foreign_warehouse.id, 1)
+
+        fitted_at = datetime.utcnow()
+        self.db.add_all(
+            [
+                DemandForecast(owner_id=self.owner_id, product_id=product.id, method="SES", daily_demand=4.0, demand_std=2.0, history_days=90, fitted_at=fitted_at)
+                for product in self.products
+            ]
+        )
+        self.db.commit()
+        for product in self.products:
+            set_reorder_point(self.db, owner_id=self.owner_id, product_id=product.id, warehouse_id=self.warehouse.id, minimum_quantity=15, reorder_quantity=50)
+        set_reorder_point(self.db, owner_id=self.other_id, product_id=self.foreign.id, warehouse_id=foreign_warehouse.id, minimum_quantity=5, reorder_quantity=5)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def _receive(self, product_id: int, warehouse_id: int, quantity: int) -> None:
+        create_inventory_transaction(
+            self.db,
+            product_id=product_id,
+            warehouse_id=warehouse_id,
+            transaction_type="PURCHASE_RECEIVED",
+            quantity=quantity,
+            direction="IN",
+        )
+
+    def test_suggestions_use_safety_stock_and_eoq_for_the_tenant_only(self) -> None:
+        suggestions = get_reorder_suggestions(self.db, owner_id=self.owner_id)
+        safety_stock = SERVICE_LEVEL_Z * 2.0 * math.sqrt(9)
+        reorder_level = 4.0 * 9 + safety_stock
+        eoq = math.ceil(math.sqrt(2 * 4.0 * 365 * ORDER_COST / (4.0 * ANNUAL_HOLDING_COST_RATE)))
+
+        # 10 is under the minimum, 40 is above it but under lead-time demand plus safety stock.
+        self.assertEqual([row["product_id"] for row in suggestions], [self.products[0].id, self.products[1].id])
+        first = suggestions[0]
+        self.assertEqual((first["available_quantity"], first["supplier_name"], first["supplier_lead_time_days"]), (10, "Acme", 9))
+        self.assertAlmostEqual(first["safety_stock"], safety_stock)
+        self.assertAlmostEqual(first["reorder_level"], reorder_level)
+        self.assertEqual(first["economic_order_quantity"], eoq)
+        self.assertEqual(first["suggested_reorder_quantity"], max(50, eoq))
+        self.assertAlmostEqual(first["days_of_cover"], 2.5)
+
+    def test_cached_suggestions_are_dropped_after_a_ledger_change(self) -> None:
+        first = get_reorder_suggestions(self.db, owner_id=self.owner_id)
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        self.assertEqual(get_reorder_suggestions(self.db, owner_id=self.owner_id), first)
+        # A cache hit only runs the fingerprint query.
+        self.assertEqual(len(statements), 1)
+
+        self._receive(self.products[0].id, self.warehouse.id, 100)
+        refreshed = get_reorder_suggestions(self.db, owner_id=self.owner_id)
+        self.assertEqual([row["product_id"] for row in refreshed], [self.products[1].id])
+
+
+if __name__ == "__main__":
+    unittest.main()
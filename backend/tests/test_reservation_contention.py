@@ -0,0 +1,126 @@
+import logging
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_reservation_contention.db")
+
+from app.database import Base
+from app.models import Product, StockBalance, StockReservation, User, Warehouse
+from app.services.stock_ledger_service import receive_purchase, reserve_stock
+
+
+logger = logging.getLogger(__name__)
+
+HOT_STOCK = 50
+COLD_SKUS = 20
+COLD_STOCK = 10
+RESERVATIONS = 400
+WORKERS = 16
+
+
+class ReservationContentionBenchmark(unittest.TestCase):
+    def setUp(self) -> None:
+        # Point RESERVATION_BENCHMARK_DATABASE_URL at Postgres to exercise real row locks;
+        # the SQLite fallback serializes writers with BEGIN IMMEDIATE.
+        self.database_url = os.getenv("RESERVATION_BENCHMARK_DATABASE_URL")
+        self.tempdir = None
+        if not self.database_url:
+            self.tempdir = tempfile.TemporaryDirectory()
+            self.database_url = f"sqlite:///{os.path.join(self.tempdir.name, 'contention.db')}"
+        is_sqlite = self.database_url.startswith("sqlite")
+        self.engine = create_engine(
+            self.database_url,
+            connect_args={"check_same_thread": False, "timeout": 30} if is_sqlite else {},
+            pool_size=WORKERS,
+        )
+        if is_sqlite:
+            @event.listens_for(self.engine, "connect")
+            def _disable_pysqlite_begin(dbapi_connection, connection_record):
+                dbapi_connection.isolation_level = None
+
+            @event.listens_for(self.engine, "begin")
+            def _begin_immediate(connection):
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+        Base.metadata.drop_all(bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        db = self.SessionLocal()
+        user = User(email="contention@example.com", firebase_uid="contention-user", full_name="Contention User")
+        db.add(user)
+        db.flush()
+        self.warehouse = Warehouse(name="Warehouse A", code="WHA", owner_id=user.id)
+        self.hot = Product(name="Hot", sku="HOT-001", price=10.0, cost=4.0, owner_id=user.id)
+        self.cold = [
+            Product(name=f"Cold {index}", sku=f"COLD-{index:03d}", price=5.0, cost=2.0, owner_id=user.id)
+            for index in range(COLD_SKUS)
+        ]
+        db.add_all([self.warehouse, self.hot, *self.cold])
+        db.commit()
+        receive_purchase(db, product_id=self.hot.id, warehouse_id=self.warehouse.id, quantity=HOT_STOCK)
+        for product in self.cold:
+            receive_purchase(db, product_id=product.id, warehouse_id=self.warehouse.id, quantity=COLD_STOCK)
+        self.hot_id = self.hot.id
+        self.cold_ids = [product.id for product in self.cold]
+        self.warehouse_id = self.warehouse.id
+        db.close()
+
+    def tearDown(self) -> None:
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+        if self.tempdir is not None:
+            self.tempdir.cleanup()
+
+    def _reserve(self, product_id: int) -> bool:
+        db = self.SessionLocal()
+        try:
+            reserve_stock(db, product_id=product_id, warehouse_id=self.warehouse_id, quantity=1)
+            return True
+        except HTTPException:
+            return False
+        finally:
+            db.close()
+
+    def test_concurrent_reservations_never_oversell(self) -> None:
+        # Half the traffic fights over one SKU, the rest is spread across many SKUs.
+        targets = [self.hot_id if index % 2 == 0 else self.cold_ids[(index // 2) % COLD_SKUS] for index in range(RESERVATIONS)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            results = list(executor.map(self._reserve, targets))
+        elapsed = time.perf_counter() - started
+
+        hot_successes = sum(1 for product_id, ok in zip(targets, results) if ok and product_id == self.hot_id)
+        self.assertEqual(hot_successes, HOT_STOCK)
+        self.assertEqual(sum(results), HOT_STOCK + COLD_SKUS * COLD_STOCK)
+
+        db = self.SessionLocal()
+        try:
+            for balance in db.query(StockBalance).all():
+                available = balance.on_hand - balance.reserved - balance.damaged - balance.quarantined
+                self.assertGreaterEqual(available, 0)
+                active = (
+                    db.query(func.coalesce(func.sum(StockReservation.quantity), 0))
+                    .filter(
+                        StockReservation.product_id == balance.product_id,
+                        StockReservation.warehouse_id == balance.warehouse_id,
+                        StockReservation.status == "ACTIVE",
+                    )
+                    .scalar()
+                )
+                self.assertEqual(balance.reserved, active)
+        finally:
+            db.close()
+        logger.info("%d reservations across %d workers in %.2fs (%.0f/s)", RESERVATIONS, WORKERS, elapsed, RESERVATIONS / elapsed)
+
+
+if __name__ == "__main__":
+    unittest.main()
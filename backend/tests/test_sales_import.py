@@ -0,0 +1,148 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timezone
+from unittest import mock
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_sales_import.db")
+
+from app.database import Base
+from app.models import InventoryTransaction, Product, ProductWeekCube, Sale, StockCheckpoint, User
+from app.services import import_job_service
+from app.services.csv_service import import_sales_csv
+from app.services.sales_rollup_service import get_sales_totals
+from app.services.stock_ledger_service import (
+    get_available,
+    get_daily_closing_stock,
+    get_default_warehouse,
+    receive_purchase,
+    write_stock_checkpoints,
+)
+
+
+class SalesImportTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="sales-import@example.com", firebase_uid="sales-import", full_name="Sales Import")
+        self.db.add(self.user)
+        self.db.flush()
+        self.owner_id = self.user.id
+        self.products = [
+            Product(name=f"History {index}", sku=f"HIST-{index}", price=10.0, cost=4.0, owner_id=self.owner_id) for index in range(2)
+        ]
+        self.db.add_all(self.products)
+        self.db.commit()
+        self.warehouse = get_default_warehouse(self.db, owner_id=self.owner_id)
+        for product in self.products:
+            receive_purchase(self.db, product_id=product.id, warehouse_id=self.warehouse.id, quantity=100)
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def test_csv_import_posts_ledger_movements_and_rebuilds_aggregates(self) -> None:
+        csv_text = "\n".join(
+            [
+                "sku,quantity,unit_price,sale_date,order_id",
+                "HIST-0,3,10,2024-01-02T09:00:00,A-1",
+                "HIST-1,2,12.5,2024-01-02,A-2",
+                "HIST-0,5,9,2024-02-10T15:30:00+08:00,A-3",
+            ]
+        )
+        result = import_sales_csv(self.db, user=self.user, csv_text=csv_text)
+
+        self.assertEqual((result["created"], result["first_sale_date"]), (3, date(2024, 1, 2)))
+        self.assertEqual(self.db.query(Sale).count(), 3)
+        shipped = self.db.query(InventoryTransaction).filter(InventoryTransaction.transaction_type == "SALE_SHIPPED").all()
+        self.assertEqual(sorted(row.reference_id for row in shipped), sorted(str(sale_id) for (sale_id,) in self.db.query(Sale.id)))
+        # Current stock already reflects historical sales, so the import leaves it alone.
+        self.assertEqual(get_available(self.db, self.products[0].id, self.warehouse.id), 100)
+        self.assertEqual(
+            sorted(row.created_at for row in shipped),
+            [datetime(2024, 1, 2), datetime(2024, 1, 2, 9), datetime(2024, 2, 10, 7, 30)],
+        )
+
+        totals = get_sales_totals(self.db, owner_id=self.owner_id, start_date=date(2024, 1, 1))
+        self.assertEqual(totals, {"units": 10, "revenue": 30.0 + 25.0 + 45.0, "order_count": 3})
+        self.assertEqual(sum(cell.units_sold for cell in self.db.query(ProductWeekCube)), 10)
+
+        with self.assertRaises(HTTPException) as raised:
+            import_sales_csv(self.db, user=self.user, csv_text="sku,quantity,unit_price,sale_date\nNOPE,1,1,2024-01-01\nHIST-0,0,1,2024-01-01")
+        self.assertTrue(raised.exception.detail.startswith("2 row(s) failed validation"))
+        self.assertEqual(self.db.query(Sale).count(), 3)
+
+    def test_history_larger_than_current_stock_is_backdated_and_rebuilds_checkpoints(self) -> None:
+        product = Product(name="Scarce", sku="HIST-S", price=10.0, cost=4.0, owner_id=self.owner_id)
+        self.db.add(product)
+        self.db.commit()
+        receive_purchase(self.db, product_id=product.id, warehouse_id=self.warehouse.id, quantity=5)
+        today = datetime.now(timezone.utc).date()
+        write_stock_checkpoints(self.db, through_date=today)
+
+        csv_text = "sku,quantity,unit_price,sale_date\nHIST-S,3,10,2023-05-01T10:00:00\nHIST-S,4,10,2023-05-03T10:00:00"
+        result = import_sales_csv(self.db, user=self.user, csv_text=csv_text)
+
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(get_available(self.db, product.id, self.warehouse.id), 5)
+        closing = get_daily_closing_stock(self.db, product.id, self.warehouse.id, date(2023, 4, 30), date(2023, 5, 3))
+        self.assertEqual([day["on_hand"] for day in closing], [0, 4, 4, 0])
+        checkpoints = self.db.query(StockCheckpoint).filter(StockCheckpoint.product_id == product.id).order_by(StockCheckpoint.checkpoint_date)
+        self.assertEqual(
+            [(checkpoint.checkpoint_date, checkpoint.on_hand) for checkpoint in checkpoints],
+            [(date(2023, 5, 1), 4), (date(2023, 5, 3), 0), (today, 5)],
+        )
+
+    def test_ndjson_import_job_records_row_errors_and_refreshes_once(self) -> None:
+        records = [{"sku": "HIST-1", "quantity": 1, "unit_price": 10, "sale_date": f"2024-03-{day:02d}"} for day in range(1, 6)]
+        records.insert(2, {"sku": "HIST-9", "quantity": 1, "unit_price": 10, "sale_date": "2024-03-03"})
+        upload = io.BytesIO("\n".join(json.dumps(record) for record in records).encode("utf-8"))
+        with tempfile.TemporaryDirectory() as directory, mock.patch.dict(os.environ, {"IMPORT_JOB_DIR": directory}), mock.patch.object(
+            import_job_service, "IMPORT_JOB_CHUNK_SIZE", 2
+        ):
+            job = import_job_service.create_import_job(self.db, owner_id=self.owner_id, entity="sales", upload=upload, filename="history.ndjson")
+            with mock.patch.object(import_job_service, "IMPORT_FINALIZERS", {"sales": mock.Mock(wraps=import_job_service.refresh_sales_aggregates)}) as finalizers:
+                job = import_job_service.run_import_job(self.db, job.id)
+
+        self.assertEqual((job.status, job.total_rows, job.created_count, job.error_count), ("COMPLETED", 6, 5, 1))
+        self.assertEqual(job.first_sale_date, date(2024, 3, 1))
+        finalizers["sales"].assert_called_once_with(self.db, owner_id=self.owner_id, start_date=date(2024, 3, 1), commit=False)
+        errors = import_job_service.list_import_job_errors(self.db, job.id, owner_id=self.owner_id)
+        self.assertEqual([(error.row_number, error.message) for error in errors], [(3, "Row 3: unknown sku HIST-9.")])
+        totals = get_sales_totals(self.db, owner_id=self.owner_id, start_date=date(2024, 3, 1))
+        self.assertEqual(totals["units"], 5)
+
+    def test_failed_import_job_refreshes_aggregates_for_committed_chunks(self) -> None:
+        records = [{"sku": "HIST-0", "quantity": 2, "unit_price": 10, "sale_date": f"2024-04-{day:02d}"} for day in range(1, 5)]
+        upload = io.BytesIO("\n".join(json.dumps(record) for record in records).encode("utf-8"))
+        handled_chunks = []
+
+        def fail_second_chunk(db, **kwargs):
+            handled_chunks.append(kwargs["rows"])
+            if len(handled_chunks) == 2:
+                raise RuntimeError("disk full")
+            return import_job_service.import_sale_rows(db, **kwargs)
+
+        with tempfile.TemporaryDirectory() as directory, mock.patch.dict(os.environ, {"IMPORT_JOB_DIR": directory}), mock.patch.object(
+            import_job_service, "IMPORT_JOB_CHUNK_SIZE", 2
+        ), mock.patch.dict(import_job_service.IMPORT_ROW_HANDLERS, {"sales": fail_second_chunk}):
+            job = import_job_service.create_import_job(self.db, owner_id=self.owner_id, entity="sales", upload=upload, filename="history.ndjson")
+            job = import_job_service.run_import_job(self.db, job.id)
+
+        self.assertEqual((job.status, job.processed_rows, job.first_sale_date), ("FAILED", 2, date(2024, 4, 1)))
+        totals = get_sales_totals(self.db, owner_id=self.owner_id, start_date=date(2024, 4, 1))
+        self.assertEqual(totals["units"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
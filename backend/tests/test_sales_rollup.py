@@ -0,0 +1,114 @@
+import asyncio
+import os
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_sales_rollup.db")
+
+from app.database import Base
+from app.models import Product, Sale, SalesDailyRollup, User
+from app.routers.analytics import get_best_sellers, get_dashboard_stats
+from app.services.sales_rollup_service import rebuild_sales_daily_rollup, record_sales_in_rollup
+
+
+class SalesRollupTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="rollup@example.com", firebase_uid="rollup-user", full_name="Rollup User")
+        self.other = User(email="other@example.com", firebase_uid="other-user", full_name="Other User")
+        self.db.add_all([self.user, self.other])
+        self.db.flush()
+        self.widget = Product(name="Widget", sku="WIDGET-ROLLUP", price=10.0, cost=4.0, owner_id=self.user.id)
+        self.gadget = Product(name="Gadget", sku="GADGET-ROLLUP", price=25.0, cost=9.0, owner_id=self.user.id)
+        self.foreign = Product(name="Foreign", sku="FOREIGN-ROLLUP", price=99.0, cost=1.0, owner_id=self.other.id)
+        self.db.add_all([self.widget, self.gadget, self.foreign])
+        self.db.commit()
+
+        now = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+        rows = [
+            (self.widget, 3, 10.0, 0),
+            (self.widget, 2, 10.0, 0),
+            (self.gadget, 1, 25.0, 2),
+            (self.widget, 4, 10.0, 9),
+            (self.gadget, 5, 25.0, 45),
+            (self.foreign, 7, 99.0, 1),
+        ]
+        sales = [
+            Sale(
+                product_id=product.id,
+                quantity=quantity,
+                unit_price=unit_price,
+                total_amount=quantity * unit_price,
+                sale_date=now - timedelta(days=days_ago),
+                owner_id=product.owner_id,
+            )
+            for product, quantity, unit_price, days_ago in rows
+        ]
+        self.db.add_all(sales)
+        self.db.flush()
+        record_sales_in_rollup(self.db, sales[:3])
+        record_sales_in_rollup(self.db, sales[3:])
+        self.db.commit()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def _rollup(self) -> dict:
+        return {
+            (row.owner_id, row.product_id, row.day): (row.units, row.revenue, row.order_count)
+            for row in self.db.query(SalesDailyRollup).populate_existing().all()
+        }
+
+    def test_incremental_rollup_matches_backfill(self) -> None:
+        incremental = self._rollup()
+        self.assertEqual(len(incremental), 5)
+        self.assertEqual(incremental[(self.user.id, self.widget.id, datetime.utcnow().date())], (5, 50.0, 2))
+
+        self.assertEqual(rebuild_sales_daily_rollup(self.db), 5)
+        self.assertEqual(self._rollup(), incremental)
+        rebuild_sales_daily_rollup(self.db, owner_id=self.user.id, start_date=datetime.utcnow().date() - timedelta(days=3))
+        self.assertEqual(self._rollup(), incremental)
+
+    def test_first_sales_of_a_cell_from_separate_sessions_accumulate(self) -> None:
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        sale_date = datetime.utcnow() - timedelta(days=100)
+        for quantity in (2, 3):
+            session = self.SessionLocal()
+            try:
+                sale = Sale(product_id=self.gadget.id, quantity=quantity, unit_price=25.0, total_amount=quantity * 25.0, sale_date=sale_date, owner_id=self.user.id)
+                session.add(sale)
+                session.flush()
+                record_sales_in_rollup(session, [sale])
+                session.commit()
+            finally:
+                session.close()
+
+        # Each session creates or increments the cell with one upsert, never an UPDATE followed by an INSERT.
+        rollup_statements = [statement for statement in statements if "sales_daily_rollup" in statement]
+        self.assertEqual(len(rollup_statements), 2)
+        self.assertTrue(all("ON CONFLICT" in statement for statement in rollup_statements))
+        self.assertEqual(self._rollup()[(self.user.id, self.gadget.id, sale_date.date())], (5, 125.0, 2))
+
+    def test_dashboard_reads_rollup(self) -> None:
+        stats = asyncio.run(get_dashboard_stats(db=self.db, current_user=self.user))
+        self.assertEqual(stats.total_revenue, 115.0)
+        self.assertEqual(stats.total_orders, 4)
+        self.assertEqual([trend.quantity for trend in stats.recent_trends], [0, 0, 0, 0, 1, 0, 5])
+        self.assertEqual([seller.product_name for seller in stats.top_sellers], ["Widget", "Gadget"])
+
+        best = asyncio.run(get_best_sellers(days=60, limit=1, db=self.db, current_user=self.user))
+        self.assertEqual((best[0].product_name, best[0].total_quantity, best[0].total_sales), ("Gadget", 6, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,268 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_stock_ledger.db")
+
+from app.database import Base
+from app.models import InventoryTransaction, LedgerArchive, Product, StockBalance, StockCheckpoint, User, Warehouse
+from app.services.ledger_partition_service import archive_ledger_history
+from app.services.stock_ledger_service import (
+    consume_reservation,
+    count_low_stock_products,
+    create_inventory_transactions_bulk,
+    find_product_stock_drift,
+    get_daily_closing_stock,
+    get_low_stock_items,
+    get_stock_position,
+    get_stock_position_as_of,
+    get_stock_positions,
+    rebuild_stock_balances,
+    reconcile_product_current_stock,
+    refresh_low_stock_flags,
+    receive_purchase,
+    record_damaged_stock,
+    release_reservation,
+    reserve_stock,
+    transfer_stock,
+    write_stock_checkpoints,
+)
+
+
+class StockLedgerTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="ledger@example.com", firebase_uid="ledger-user", full_name="Ledger User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.product = Product(name="Widget", sku="WIDGET-001", price=10.0, cost=4.0, min_stock_threshold=5, owner_id=self.user.id)
+        self.warehouse_a = Warehouse(name="Warehouse A", code="WHA", owner_id=self.user.id)
+        self.warehouse_b = Warehouse(name="Warehouse B", code="WHB", owner_id=self.user.id)
+        self.db.add_all([self.product, self.warehouse_a, self.warehouse_b])
+        self.db.commit()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def _balances(self) -> dict:
+        return {
+            (row.product_id, row.warehouse_id): (row.on_hand, row.reserved, row.damaged, row.quarantined)
+            for row in self.db.query(StockBalance).populate_existing().all()
+        }
+
+    def test_balances_follow_ledger_writes(self) -> None:
+        receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=100)
+        reservation = reserve_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=30)
+        consume_reservation(self.db, reservation.id, quantity=10)
+        release_reservation(self.db, reservation.id)
+        record_damaged_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=5, reason="Crushed")
+        transfer_stock(
+            self.db,
+            product_id=self.product.id,
+            from_warehouse_id=self.warehouse_a.id,
+            to_warehouse_id=self.warehouse_b.id,
+            quantity=20,
+        )
+
+        position_a = get_stock_position(self.db, self.product.id, self.warehouse_a.id)
+        position_b = get_stock_position(self.db, self.product.id, self.warehouse_b.id)
+        total = get_stock_position(self.db, self.product.id)
+        self.assertEqual((position_a["on_hand"], position_a["reserved"], position_a["available"]), (70, 0, 65))
+        self.assertEqual((position_b["on_hand"], position_b["available"]), (20, 20))
+        self.assertEqual((total["on_hand"], total["damaged"], total["available"]), (90, 5, 85))
+
+        self.db.refresh(self.product)
+        self.assertEqual(self.product.current_stock, 85)
+
+    def test_current_stock_is_incremented_in_sql_across_sessions(self) -> None:
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        for warehouse, quantity in ((self.warehouse_a, 3), (self.warehouse_b, 4)):
+            session = self.SessionLocal()
+            try:
+                receive_purchase(session, product_id=self.product.id, warehouse_id=warehouse.id, quantity=quantity)
+            finally:
+                session.close()
+
+        # Each writer adds its own change to the committed value, so neither receipt overwrites the other.
+        product_updates = [statement for statement in statements if statement.startswith("UPDATE products")]
+        self.assertEqual(len(product_updates), 2)
+        self.assertTrue(all("current_stock=(coalesce(products.current_stock, ?) + ?)" in statement for statement in product_updates))
+        self.db.refresh(self.product)
+        self.assertEqual((self.product.current_stock, self.product.is_low_stock), (7, False))
+
+    def test_consuming_fully_reserved_stock_is_allowed(self) -> None:
+        receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=10)
+        reservation = reserve_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=10)
+        consume_reservation(self.db, reservation.id)
+
+        position = get_stock_position(self.db, self.product.id, self.warehouse_a.id)
+        self.assertEqual((position["on_hand"], position["reserved"], position["available"]), (0, 0, 0))
+
+    def test_bulk_positions_match_single_product_reads(self) -> None:
+        other = Product(name="Gadget", sku="GADGET-001", price=5.0, cost=2.0, min_stock_threshold=5, owner_id=self.user.id)
+        self.db.add(other)
+        self.db.commit()
+        receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=12)
+        receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_b.id, quantity=8)
+        reserve_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_b.id, quantity=3)
+
+        product_ids = [self.product.id, other.id]
+        for warehouse_id in (None, self.warehouse_a.id, self.warehouse_b.id):
+            positions = get_stock_positions(self.db, product_ids, warehouse_id)
+            for product_id in product_ids:
+                self.assertEqual(positions[product_id], get_stock_position(self.db, product_id, warehouse_id))
+        self.assertEqual(get_stock_positions(self.db, []), {})
+        self.assertEqual(get_stock_positions(self.db, product_ids)[self.product.id]["available"], 17)
+
+    def test_rebuild_recomputes_balances_from_ledger(self) -> None:
+        receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=40)
+        reserve_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=15)
+        expected = self._balances()
+
+        self.db.query(StockBalance).update({StockBalance.on_hand: 999, StockBalance.reserved: 0})
+        self.db.commit()
+        rebuilt = rebuild_stock_balances(self.db, owner_id=self.user.id)
+
+        self.assertEqual(rebuilt, 1)
+        self.assertEqual(self._balances(), expected)
+        self.assertEqual(expected[(self.product.id, self.warehouse_a.id)], (40, 15, 0, 0))
+
+    def test_bulk_transactions_post_once_and_check_net_availability(self) -> None:
+        movements = [
+            {"product_id": self.product.id, "warehouse_id": self.warehouse_a.id, "transaction_type": "PURCHASE_RECEIVED", "quantity": 30, "direction": "IN"},
+            {"product_id": self.product.id, "warehouse_id": self.warehouse_a.id, "transaction_type": "SALE_SHIPPED", "quantity": 12, "direction": "OUT"},
+            {"product_id": self.product.id, "warehouse_id": self.warehouse_b.id, "transaction_type": "PURCHASE_RECEIVED", "quantity": 5, "direction": "IN"},
+            {"product_id": self.product.id, "warehouse_id": self.warehouse_b.id, "transaction_type": "DAMAGED", "quantity": 2, "direction": "NEUTRAL"},
+        ]
+        self.assertEqual(create_inventory_transactions_bulk(self.db, movements), 4)
+        self.assertEqual(self._balances()[(self.product.id, self.warehouse_a.id)], (18, 0, 0, 0))
+        self.assertEqual(self._balances()[(self.product.id, self.warehouse_b.id)], (5, 0, 2, 0))
+        self.db.refresh(self.product)
+        self.assertEqual(self.product.current_stock, 21)
+
+        oversell = [
+            {"product_id": self.product.id, "warehouse_id": self.warehouse_b.id, "transaction_type": "SALE_SHIPPED", "quantity": 4, "direction": "OUT"},
+        ]
+        with self.assertRaises(HTTPException):
+            create_inventory_transactions_bulk(self.db, oversell)
+        with self.assertRaises(HTTPException):
+            create_inventory_transactions_bulk(self.db, [{**movements[0], "warehouse_id": 999}])
+        self.assertEqual(self.db.query(InventoryTransaction).count(), 4)
+        self.assertEqual(self._balances()[(self.product.id, self.warehouse_b.id)], (5, 0, 2, 0))
+
+    def test_reconcile_fixes_current_stock_drift(self) -> None:
+        receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=25)
+        reserve_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=5)
+        self.assertEqual(find_product_stock_drift(self.db), [])
+
+        self.db.query(Product).filter(Product.id == self.product.id).update({Product.current_stock: 3})
+        self.db.commit()
+        drift = find_product_stock_drift(self.db, owner_id=self.user.id)
+        self.assertEqual([(row["sku"], row["current_stock"], row["available"]) for row in drift], [("WIDGET-001", 3, 20)])
+
+        self.assertEqual(reconcile_product_current_stock(self.db, owner_id=self.user.id), 1)
+        self.db.refresh(self.product)
+        self.assertEqual(self.product.current_stock, 20)
+        self.assertEqual(find_product_stock_drift(self.db), [])
+
+    def test_low_stock_flags_follow_ledger_and_threshold_changes(self) -> None:
+        def low_skus(warehouse_id=None):
+            return [item["sku"] for item in get_low_stock_items(self.db, warehouse_id, owner_id=self.user.id)]
+
+        self.assertEqual(low_skus(), ["WIDGET-001"])
+        receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=8)
+        self.assertEqual(low_skus(), [])
+        self.assertEqual(low_skus(self.warehouse_a.id), [])
+        self.assertEqual(low_skus(self.warehouse_b.id), ["WIDGET-001"])
+
+        reservation = reserve_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=4)
+        self.assertEqual(low_skus(), ["WIDGET-001"])
+        self.assertEqual(count_low_stock_products(self.db, owner_id=self.user.id), 1)
+        release_reservation(self.db, reservation.id)
+        self.assertEqual(low_skus(), [])
+
+        self.product.min_stock_threshold = 8
+        self.db.flush()
+        refresh_low_stock_flags(self.db, [self.product.id])
+        self.db.commit()
+        self.assertEqual(low_skus(), ["WIDGET-001"])
+        self.assertEqual(low_skus(self.warehouse_a.id), ["WIDGET-001"])
+
+    def test_point_in_time_stock_uses_checkpoints_and_ledger_tail(self) -> None:
+        today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+        movements = [
+            (receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=50), 3),
+            (receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_b.id, quantity=10), 2),
+            (record_damaged_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=4, reason="Dented"), 1),
+            (receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=7), 0),
+        ]
+        for transaction, days_ago in movements:
+            self.db.query(InventoryTransaction).filter(InventoryTransaction.id == transaction.id).update(
+                {InventoryTransaction.created_at: today - timedelta(days=days_ago)}
+            )
+        self.db.commit()
+
+        self.assertEqual(write_stock_checkpoints(self.db, through_date=(today - timedelta(days=2)).date()), 2)
+        self.assertEqual(write_stock_checkpoints(self.db), 1)
+        self.assertEqual(write_stock_checkpoints(self.db), 0)
+        self.assertEqual(self.db.query(StockCheckpoint).count(), 3)
+
+        as_of = get_stock_position_as_of(self.db, self.product.id, self.warehouse_a.id, today - timedelta(hours=1))
+        self.assertEqual((as_of["on_hand"], as_of["damaged"]), (50, 4))
+        self.assertEqual(as_of["checkpoint_date"], (today - timedelta(days=1)).date())
+        self.assertEqual(get_stock_position_as_of(self.db, self.product.id, None, today)["on_hand"], 67)
+        self.assertEqual(get_stock_position_as_of(self.db, self.product.id, None, today - timedelta(days=3, hours=1))["on_hand"], 0)
+
+        closing = get_daily_closing_stock(self.db, self.product.id, None, (today - timedelta(days=4)).date(), today.date())
+        self.assertEqual([row["on_hand"] for row in closing], [0, 50, 60, 60, 67])
+        self.assertEqual([row["damaged"] for row in closing], [0, 0, 0, 4, 4])
+        window = get_daily_closing_stock(self.db, self.product.id, self.warehouse_a.id, (today - timedelta(days=1)).date(), today.date())
+        self.assertEqual([row["on_hand"] for row in window], [50, 57])
+
+    def test_archiving_closed_months_keeps_stock_positions(self) -> None:
+        today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+        movements = [
+            (receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=40), 70),
+            (receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_b.id, quantity=12), 65),
+            (record_damaged_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=3, reason="Dented"), 40),
+            (receive_purchase(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=5), 0),
+        ]
+        for transaction, days_ago in movements:
+            self.db.query(InventoryTransaction).filter(InventoryTransaction.id == transaction.id).update(
+                {InventoryTransaction.created_at: today - timedelta(days=days_ago)}
+            )
+        self.db.commit()
+        reserve_stock(self.db, product_id=self.product.id, warehouse_id=self.warehouse_a.id, quantity=2)
+        month_start = today.date().replace(day=1)
+        window = ((today - timedelta(days=75)).date(), today.date())
+        balances_before = self._balances()
+        closing_before = get_daily_closing_stock(self.db, self.product.id, None, *window)
+
+        result = archive_ledger_history(self.db, before=month_start)
+        self.assertEqual(sum(month["row_count"] for month in result["months"]), 3)
+        self.assertEqual(self.db.query(InventoryTransaction).count(), 2)
+        self.assertEqual(self.db.query(LedgerArchive).order_by(LedgerArchive.period_end.desc()).first().period_end, month_start)
+
+        self.assertEqual(self._balances(), balances_before)
+        self.assertEqual(get_daily_closing_stock(self.db, self.product.id, None, *window), closing_before)
+        rebuild_stock_balances(self.db)
+        self.assertEqual(self._balances(), balances_before)
+        self.assertEqual(get_stock_position_as_of(self.db, self.product.id, None, today)["on_hand"], 57)
+        with self.assertRaises(HTTPException):
+            get_stock_position_as_of(self.db, self.product.id, None, today - timedelta(days=60))
+        self.assertEqual(archive_ledger_history(self.db, before=month_start)["months"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
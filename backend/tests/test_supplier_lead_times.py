@@ -0,0 +1,99 @@
+import math
+import os
+import statistics
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_supplier_lead_times.db")
+
+from app.database import Base
+from app.models import InventoryTransaction, Product, PurchaseOrder, Supplier, SupplierLeadTime, User, Warehouse
+from app.services.atp_service import get_available_to_promise
+from app.services.lead_time_service import get_lead_time_stats, refresh_supplier_lead_times
+from app.services.purchasing_service import create_purchase_order, mark_purchase_order_ordered, receive_purchase_order_item
+
+
+class SupplierLeadTimeTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="leadtime@example.com", firebase_uid="leadtime-user", full_name="Lead Time User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.owner_id = self.user.id
+        self.supplier = Supplier(name="Slowboat", lead_time_days=3, owner_id=self.owner_id)
+        self.widget = Product(name="Widget", sku="LT-WIDGET", price=10.0, cost=4.0, supplier="Slowboat", owner_id=self.owner_id)
+        self.gadget = Product(name="Gadget", sku="LT-GADGET", price=10.0, cost=4.0, supplier="Slowboat", owner_id=self.owner_id)
+        self.warehouse = Warehouse(name="Lead Time Warehouse", code="LTW", owner_id=self.owner_id)
+        self.db.add_all([self.supplier, self.widget, self.gadget, self.warehouse])
+        self.db.commit()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def _order(self, product: Product, days_ago: float, *, receive: bool = True):
+        order = create_purchase_order(
+            self.db,
+            owner_id=self.owner_id,
+            supplier_id=self.supplier.id,
+            items=[{"product_id": product.id, "warehouse_id": self.warehouse.id, "quantity_ordered": 10}],
+            order_date=datetime.utcnow() - timedelta(days=days_ago),
+        )
+        mark_purchase_order_ordered(self.db, order.id, owner_id=self.owner_id)
+        if receive:
+            receive_purchase_order_item(self.db, owner_id=self.owner_id, purchase_order_id=order.id, item_id=order.items[0].id, quantity=10)
+        return order
+
+    def _age_receipts(self, delta: timedelta) -> None:
+        # Receipts and order dates move back together, so lead times are unchanged.
+        for receipt in self.db.query(InventoryTransaction).filter(InventoryTransaction.transaction_type == "PURCHASE_RECEIVED"):
+            receipt.created_at -= delta
+        for order in self.db.query(PurchaseOrder):
+            order.order_date -= delta
+        self.db.commit()
+
+    def test_incremental_refresh_matches_the_full_history(self) -> None:
+        for days_ago in (4, 6, 11):
+            self._order(self.widget, days_ago)
+        self._order(self.gadget, 20)
+        # Receipts inside the lag window may still have earlier-stamped transactions committing behind them.
+        self.assertEqual(refresh_supplier_lead_times(self.db, owner_id=self.owner_id), 0)
+        self._age_receipts(timedelta(hours=1))
+        self.assertEqual(refresh_supplier_lead_times(self.db, owner_id=self.owner_id), 4)
+        self.assertEqual(refresh_supplier_lead_times(self.db, owner_id=self.owner_id), 0)
+
+        self._order(self.widget, 9)
+        self.assertEqual(refresh_supplier_lead_times(self.db, owner_id=self.owner_id, lag=timedelta(0)), 1)
+        self.assertEqual(self.db.query(SupplierLeadTime).count(), 3)
+
+        stats = get_lead_time_stats(self.db, [(self.supplier.id, self.widget.id), (self.supplier.id, None)], owner_id=self.owner_id)
+        widget = stats[(self.supplier.id, self.widget.id)]
+        self.assertEqual(widget["receipt_count"], 4)
+        self.assertAlmostEqual(widget["mean_days"], statistics.mean([4, 6, 11, 9]), places=2)
+        self.assertAlmostEqual(widget["variance_days"], statistics.pvariance([4, 6, 11, 9]), places=2)
+        self.assertEqual(widget["p90_days"], 11.0)
+        overall = stats[(self.supplier.id, None)]
+        self.assertEqual(overall["receipt_count"], 5)
+        self.assertAlmostEqual(overall["std_days"], math.sqrt(statistics.pvariance([4, 6, 11, 9, 20])), places=2)
+
+    def test_atp_dates_undated_purchase_orders_with_the_observed_p90(self) -> None:
+        for days_ago in (10, 12):
+            self._order(self.gadget, days_ago)
+        refresh_supplier_lead_times(self.db, owner_id=self.owner_id, lag=timedelta(0))
+        self._order(self.gadget, 2, receive=False)
+
+        atp = get_available_to_promise(self.db, self.gadget.id, self.warehouse.id, owner_id=self.owner_id)
+        self.assertEqual(atp["undated_inbound"], 0)
+        self.assertEqual(atp["timeline"][-1], {"date": (datetime.utcnow() + timedelta(days=10)).date(), "available_to_promise": 30})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import unittest
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_weekly_series.db")
+
+from app.database import Base
+from app.models import Product, ReturnOrder, ReturnOrderItem, Sale, User
+from app.services.analytics_service import get_weekly_sales
+from app.services.returns_service import get_weekly_returns
+
+
+def _label(day) -> str:
+    iso = day.isocalendar()
+    return f"{iso.year}-W{iso.week:02d}"
+
+
+class WeeklySeriesTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.engine = create_engine("sqlite:///:memory:")
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(email="weekly@example.com", firebase_uid="weekly-user", full_name="Weekly User")
+        self.db.add(self.user)
+        self.db.flush()
+        self.product = Product(name="Weekly Widget", sku="WEEKLY-1", price=10.0, cost=6.0, owner_id=self.user.id)
+        self.other = Product(name="Other Widget", sku="WEEKLY-2", price=5.0, cost=1.0, owner_id=self.user.id)
+        self.db.add_all([self.product, self.other])
+        self.db.flush()
+
+        today = datetime.utcnow().date()
+        self.monday = today - timedelta(days=today.weekday())
+        # Two sales a week for twelve weeks: on Monday and on Sunday, the edges of each bucket.
+        for weeks_ago in range(12):
+            week_start = self.monday - timedelta(weeks=weeks_ago)
+            for day, quantity in ((week_start, 1), (week_start + timedelta(days=6), 2)):
+                if day > today:
+                    day = today
+                sale_date = datetime.combine(day, time(23, 30) if quantity == 2 else time(0, 5))
+                self.db.add(Sale(product_id=self.product.id, quantity=quantity, unit_price=10.0, total_amount=quantity * 10.0, sale_date=sale_date, owner_id=self.user.id))
+            self.db.add(Sale(product_id=self.other.id, quantity=4, unit_price=5.0, total_amount=20.0, sale_date=datetime.combine(week_start, time(12)), owner_id=self.user.id))
+
+        return_order = ReturnOrder(return_number="RET-WEEKLY-1", owner_id=self.user.id, return_date=datetime.combine(self.monday - timedelta(days=1), time(18)))
+        self.db.add(return_order)
+        self.db.flush()
+        self.db.add(ReturnOrderItem(return_order_id=return_order.id, product_id=self.product.id, quantity=2, refund_amount=20.0))
+        self.db.commit()
+
+    def tearDown(self) -> None:
+        self.db.close()
+        self.engine.dispose()
+
+    def test_weekly_sales_are_grouped_and_paged_in_sql(self) -> None:
+        owner_id = self.user.id
+        statements = []
+        event.listen(self.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        page = get_weekly_sales(db=self.db, owner_id=owner_id, sku="WEEKLY-1", weeks=4)
+        # Product lookup, the grouped weeks and the has-more probe; no per-row loading.
+        self.assertEqual(len(statements), 3)
+
+        expected_labels = [_label(self.monday - timedelta(weeks=weeks_ago)) for weeks_ago in (3, 2, 1, 0)]
+        self.assertEqual([week["week"] for week in page["weeks"]], expected_labels)
+        self.assertEqual([week["units_sold"] for week in page["weeks"]], [3, 3, 3, 3])
+        self.assertEqual(page["weeks"][0]["gross_margin"], 12.0)
+        self.assertEqual(page["next_offset"], 4)
+
+        last_page = get_weekly_sales(db=self.db, owner_id=owner_id, weeks=8, offset=4)
+        self.assertEqual([week["units_sold"] for week in last_page["weeks"]], [7] * 8)
+        self.assertIsNone(last_page["next_offset"])
+
+    def test_weekly_returns_use_the_return_date_week(self) -> None:
+        result = get_weekly_returns(self.db, owner_id=self.user.id, weeks=2)
+        self.assertEqual(
+            result["weeks"],
+            [
+                {
+                    "week": _label(self.monday - timedelta(weeks=1)),
+                    "week_start": (self.monday - timedelta(weeks=1)).isoformat(),
+                    "returned_quantity": 2,
+                    "refund_cost": 20.0,
+                    "replacement_cost": 0.0,
+                }
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()